@@ -0,0 +1 @@
+"""Código compartido por las etapas p1-p9 del análisis de accidentes viales de Monterrey."""
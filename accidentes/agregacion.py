@@ -0,0 +1,179 @@
+import numpy as np
+import pandas as pd
+
+# Arriba de este número de celdas (grupos x valores) la moda se calcula ordenando
+# los pares presentes en lugar de con una tabla densa de bincount
+MAX_CELDAS_DENSAS = 10_000_000
+
+
+def codificar(serie: pd.Series):
+    """Códigos enteros y valores en el mismo orden que usa groupby (-1 = nulo)"""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return np.asarray(serie.cat.codes, dtype=np.int64), serie.cat.categories
+    codigos, valores = pd.factorize(serie, sort=True)
+    return codigos.astype(np.int64), valores
+
+
+def _contar(codigos, pesos, minlength):
+    if pesos is None:
+        return np.bincount(codigos, minlength=minlength)
+    return np.bincount(codigos, weights=pesos, minlength=minlength).astype(np.int64)
+
+
+def _moda_densa(grupos, valores, pesos, n_grupos, n_valores):
+    tabla = _contar(grupos * n_valores + valores, pesos, n_grupos * n_valores).reshape(
+        n_grupos, n_valores
+    )
+    # argmax devuelve el primer máximo: en empate gana el menor valor, como Series.mode
+    return tabla.argmax(axis=1), tabla.max(axis=1)
+
+
+def _moda_dispersa(grupos, valores, pesos, n_grupos, n_valores):
+    pares, inverso = np.unique(grupos * n_valores + valores, return_inverse=True)
+    conteos = _contar(inverso, pesos, len(pares))
+    grupo_par, valor_par = np.divmod(pares, n_valores)
+    orden = np.lexsort((valor_par, -conteos, grupo_par))
+    grupo_par, valor_par, conteos = grupo_par[orden], valor_par[orden], conteos[orden]
+    primero = np.r_[True, grupo_par[1:] != grupo_par[:-1]]
+    moda = np.zeros(n_grupos, dtype=np.int64)
+    maximo = np.zeros(n_grupos, dtype=np.int64)
+    moda[grupo_par[primero]] = valor_par[primero]
+    maximo[grupo_par[primero]] = conteos[primero]
+    return moda, maximo
+
+
+class Agregador:
+    """Conteos, medias y modas por grupo sobre códigos enteros.
+
+    Cada columna se factoriza una sola vez y se reutiliza en todas las
+    agrupaciones; las modas salen de un conteo conjunto (grupo, valor) y un argmax,
+    sin llamar a Series.mode por grupo. Con `pesos` cada fila cuenta tantas veces
+    como indique esa columna, lo que permite agregar sobre el cubo de conteos.
+    """
+
+    def __init__(self, df: pd.DataFrame, pesos: str = None):
+        self.df = df
+        self.pesos = None if pesos is None else df[pesos].to_numpy(dtype=np.int64)
+        self._codigos = {}
+
+    def _pesos(self, validos):
+        return None if self.pesos is None else self.pesos[validos]
+
+    def codigos(self, columna: str):
+        if columna not in self._codigos:
+            self._codigos[columna] = codificar(self.df[columna])
+        return self._codigos[columna]
+
+    def _conteo(self, grupos, n_grupos, columna):
+        validos = grupos >= 0
+        if columna is not None:
+            validos &= self.df[columna].notna().to_numpy()
+        return _contar(grupos[validos], self._pesos(validos), n_grupos)
+
+    def _media(self, grupos, n_grupos, columna):
+        valores = self.df[columna].to_numpy(dtype=np.float64, na_value=np.nan)
+        validos = (grupos >= 0) & ~np.isnan(valores)
+        pesos = 1.0 if self.pesos is None else self.pesos[validos]
+        suma = np.bincount(
+            grupos[validos], weights=valores[validos] * pesos, minlength=n_grupos
+        )
+        conteo = _contar(grupos[validos], self._pesos(validos), n_grupos)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return suma / conteo
+
+    def _moda(self, grupos, n_grupos, columna):
+        codigos, valores = self.codigos(columna)
+        validos = (grupos >= 0) & (codigos >= 0)
+        if n_grupos * len(valores) <= MAX_CELDAS_DENSAS:
+            calcular = _moda_densa
+        else:
+            calcular = _moda_dispersa
+        moda, maximo = calcular(
+            grupos[validos],
+            codigos[validos],
+            self._pesos(validos),
+            n_grupos,
+            len(valores),
+        )
+        resultado = np.asarray(valores.take(moda))
+        if (maximo == 0).any():
+            resultado = resultado.astype(object)
+            resultado[maximo == 0] = None
+        return resultado
+
+    def agregar(self, por: str, **especificaciones) -> pd.DataFrame:
+        """Equivalente a df.groupby(por, observed=True).agg(**especificaciones).
+
+        Cada especificación es (columna, función) con función "count", "mean" o
+        "moda"; ("count" con columna None cuenta todas las filas del grupo).
+        """
+        grupos, etiquetas = self.codigos(por)
+        n_grupos = len(etiquetas)
+        presentes = self._conteo(grupos, n_grupos, None) > 0
+        funciones = {"count": self._conteo, "mean": self._media, "moda": self._moda}
+
+        columnas = {}
+        for nombre, (columna, funcion) in especificaciones.items():
+            columnas[nombre] = funciones[funcion](grupos, n_grupos, columna)[presentes]
+        indice = pd.Index(etiquetas[presentes], name=por)
+        return pd.DataFrame(columnas, index=indice)
+
+    def tabla_cruzada(self, fila: str, columna: str) -> pd.DataFrame:
+        """Equivalente a df.groupby([fila, columna]).size().unstack(fill_value=0)"""
+        codigos_fila, etiquetas_fila = self.codigos(fila)
+        codigos_columna, etiquetas_columna = self.codigos(columna)
+        validos = (codigos_fila >= 0) & (codigos_columna >= 0)
+        n_filas, n_columnas = len(etiquetas_fila), len(etiquetas_columna)
+        tabla = _contar(
+            codigos_fila[validos] * n_columnas + codigos_columna[validos],
+            self._pesos(validos),
+            n_filas * n_columnas,
+        ).reshape(n_filas, n_columnas)
+
+        filas_presentes = tabla.sum(axis=1) > 0
+        columnas_presentes = tabla.sum(axis=0) > 0
+        return pd.DataFrame(
+            tabla[np.ix_(filas_presentes, columnas_presentes)],
+            index=pd.Index(etiquetas_fila[filas_presentes], name=fila),
+            columns=pd.Index(etiquetas_columna[columnas_presentes], name=columna),
+        )
+
+
+def _cuantil_ponderado(valores, acumulado, q):
+    """Cuantil con interpolación lineal, igual a np.percentile sobre los datos expandidos"""
+    posicion = (acumulado[-1] - 1) * q
+    abajo = int(np.floor(posicion))
+    arriba = min(abajo + 1, int(acumulado[-1]) - 1)
+    valor_abajo = valores[np.searchsorted(acumulado, abajo, side="right")]
+    valor_arriba = valores[np.searchsorted(acumulado, arriba, side="right")]
+    return valor_abajo + (posicion - abajo) * (valor_arriba - valor_abajo)
+
+
+def estadisticas_caja(valores, pesos, etiqueta=None) -> dict:
+    """Estadísticas de Axes.bxp a partir de valores distintos y sus frecuencias.
+
+    Da la misma caja que boxplot sobre las filas originales (bigotes a 1.5 IQR)
+    sin expandir los conteos.
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    pesos = np.asarray(pesos, dtype=np.int64)
+    orden = np.argsort(valores)
+    valores, pesos = valores[orden], pesos[orden]
+    valores, pesos = valores[pesos > 0], pesos[pesos > 0]
+    acumulado = np.cumsum(pesos)
+
+    q1, mediana, q3 = (
+        _cuantil_ponderado(valores, acumulado, q) for q in (0.25, 0.5, 0.75)
+    )
+    rango = q3 - q1
+    dentro = (valores >= q1 - 1.5 * rango) & (valores <= q3 + 1.5 * rango)
+    return {
+        "label": etiqueta,
+        "med": mediana,
+        "q1": q1,
+        "q3": q3,
+        "whislo": min(valores[dentro].min(), q1),
+        "whishi": max(valores[dentro].max(), q3),
+        "mean": np.average(valores, weights=pesos),
+        "fliers": valores[~dentro],
+    }
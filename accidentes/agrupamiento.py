@@ -0,0 +1,220 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.metrics import silhouette_score
+from sklearn.preprocessing import StandardScaler
+
+from accidentes import calidad
+from accidentes.carga import DIR_CACHE
+from accidentes.caracteristicas import GRUPOS_HORARIO
+from accidentes.esquema import RUTA_PARQUET
+from accidentes.graficas import PIXELES_DENSIDAD, rasterizar
+from accidentes.instrumentacion import medido
+
+COLUMNAS = ["Latitud", "Longitud", "es_fin_semana", "grupo_horario"]
+RUTA_MODELO = "modelos/kmeans.joblib"
+TAMANO_LOTE = 50_000
+TAMANO_MUESTRA = 20_000
+
+# ruta -> artefacto ya leído, para predecir varias veces sin volver a abrirlo
+_modelos = {}
+
+
+def lotes(columnas=COLUMNAS, tamano=TAMANO_LOTE, ruta=RUTA_PARQUET):
+    """DataFrames de hasta `tamano` filas leyendo el parquet parte por parte.
+
+    Igual que el modo por omisión de p7, se quitan los accidentes marcados por
+    p1/calidad.py (coordenadas fuera de la zona, invertidas o duplicados). Los
+    restos de cada parte se juntan con la siguiente para que ningún lote (salvo
+    el último) quede más chico que `tamano`, lo que pide partial_fit.
+    """
+    marcados = calidad.folios_marcados()
+    leer = [*columnas, "Folio"] if "Folio" not in columnas else columnas
+    pendiente = []
+    filas = 0
+    for parte in sorted(Path(ruta).glob("*.parquet")):
+        for lote in pq.ParquetFile(parte).iter_batches(tamano, columns=leer):
+            df = calidad.descartar(lote.to_pandas(), marcados=marcados)
+            pendiente.append(df[columnas])
+            filas += len(df)
+            if filas >= tamano:
+                yield pd.concat(pendiente, ignore_index=True)
+                pendiente, filas = [], 0
+    if filas:
+        yield pd.concat(pendiente, ignore_index=True)
+
+
+def caracteristicas(df: pd.DataFrame) -> np.ndarray:
+    """Matriz de k-means; grupo_horario como código 0-3 (madrugada a noche)"""
+    grupo = pd.Categorical(df["grupo_horario"], categories=GRUPOS_HORARIO).codes
+    return np.column_stack(
+        [df["Latitud"], df["Longitud"], df["es_fin_semana"], grupo]
+    ).astype(np.float64)
+
+
+def explorar(tamano_muestra=TAMANO_MUESTRA, ruta=RUTA_PARQUET, semilla=42):
+    """Una pasada: escalador, extensión lon/lat y muestra uniforme ya escalada"""
+    total = sum(
+        pq.ParquetFile(p).metadata.num_rows for p in Path(ruta).glob("*.parquet")
+    )
+    fraccion = min(1.0, tamano_muestra / max(total, 1))
+    generador = np.random.default_rng(semilla)
+
+    escalador = StandardScaler()
+    extension = [np.inf, -np.inf, np.inf, -np.inf]
+    muestra = []
+    for df in lotes(ruta=ruta):
+        X = caracteristicas(df)
+        escalador.partial_fit(X)
+        extension = [
+            min(extension[0], X[:, 1].min()),
+            max(extension[1], X[:, 1].max()),
+            min(extension[2], X[:, 0].min()),
+            max(extension[3], X[:, 0].max()),
+        ]
+        muestra.append(X[generador.random(len(X)) < fraccion])
+    return escalador, tuple(extension), escalador.transform(np.concatenate(muestra))
+
+
+def escalar_a_disco(escalador, destino: Path, ruta=RUTA_PARQUET) -> Path:
+    """Una pasada sobre el parquet: la matriz escalada de todos los lotes en un
+    archivo float64 crudo, que los procesos de `seleccionar_k` leen con memmap"""
+    with open(destino, "wb") as archivo:
+        for df in lotes(ruta=ruta):
+            escalador.transform(caracteristicas(df)).astype(np.float64).tofile(archivo)
+    return destino
+
+
+def leer_escalada(ruta_matriz) -> np.ndarray:
+    return np.memmap(ruta_matriz, dtype=np.float64, mode="r").reshape(-1, len(COLUMNAS))
+
+
+@medido("ajuste")
+def ajustar(k, X, epocas=1, tamano=TAMANO_LOTE, semilla=42):
+    """MiniBatchKMeans entrenado con partial_fit lote por lote sobre X ya escalada"""
+    modelo = MiniBatchKMeans(n_clusters=k, random_state=semilla, n_init=3)
+    for _ in range(epocas):
+        for desde in range(0, len(X), tamano):
+            modelo.partial_fit(np.asarray(X[desde : desde + tamano]))
+    return modelo
+
+
+def _evaluar(k, ruta_matriz, muestra, epocas=1):
+    modelo = ajustar(k, leer_escalada(ruta_matriz), epocas)
+    etiquetas = modelo.predict(muestra)
+    silueta = silhouette_score(
+        muestra, etiquetas, sample_size=min(len(muestra), 10_000), random_state=42
+    )
+    return {"k": k, "inercia": -modelo.score(muestra), "silueta": silueta}, modelo
+
+
+def seleccionar_k(ks, escalador, muestra, epocas=1, procesos=None, ruta=RUTA_PARQUET):
+    """Entrena y evalúa un modelo por cada k en paralelo; gana la mejor silueta.
+
+    El parquet se lee y escala una sola vez a un archivo temporal en
+    csv/.cache; cada proceso entrena su k leyendo ese archivo con memmap, así
+    que la lectura no se repite por k ni por época. Inercia y silueta se miden
+    sobre la muestra de `explorar`; regresa la curva completa para poder
+    revisar el codo.
+    """
+    ks = list(ks)
+    Path(DIR_CACHE).mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix=".kmeans-", dir=DIR_CACHE) as directorio:
+        matriz = escalar_a_disco(escalador, Path(directorio) / "escalada.f64", ruta)
+        evaluar = partial(
+            _evaluar, ruta_matriz=str(matriz), muestra=muestra, epocas=epocas
+        )
+        procesos = min(procesos or os.cpu_count() or 1, len(ks))
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            resultados = list(pool.map(evaluar, ks))
+    curva = pd.DataFrame([fila for fila, _ in resultados]).set_index("k")
+    mejor = int(curva["silueta"].idxmax())
+    return curva, resultados[ks.index(mejor)][1]
+
+
+def guardar_modelo(escalador, modelo, curva=None, ruta=RUTA_MODELO):
+    Path(ruta).parent.mkdir(parents=True, exist_ok=True)
+    artefacto = {
+        "columnas": COLUMNAS,
+        "escalador": escalador,
+        "modelo": modelo,
+        "curva": curva,
+    }
+    joblib.dump(artefacto, ruta)
+    _modelos[ruta] = artefacto
+
+
+def cargar_modelo(ruta=RUTA_MODELO) -> dict:
+    if ruta not in _modelos:
+        _modelos[ruta] = joblib.load(ruta)
+    return _modelos[ruta]
+
+
+@medido("prediccion")
+def predecir(df: pd.DataFrame, artefacto=None) -> np.ndarray:
+    """Cluster de cada fila con los centroides guardados, sin reentrenar"""
+    artefacto = artefacto or cargar_modelo()
+    faltantes = [columna for columna in artefacto["columnas"] if columna not in df]
+    if faltantes:
+        raise ValueError(
+            f"Faltan columnas: {', '.join(faltantes)} (el archivo debe traer las "
+            "columnas derivadas, como las que agrega caracteristicas.derivar en p1)"
+        )
+    desconocidos = ~df["grupo_horario"].isin(GRUPOS_HORARIO)
+    if desconocidos.any():
+        raise ValueError(
+            f"grupo_horario debe ser uno de: {', '.join(GRUPOS_HORARIO)} "
+            f"({int(desconocidos.sum())} filas con otro valor)"
+        )
+    X = artefacto["escalador"].transform(caracteristicas(df))
+    return artefacto["modelo"].predict(X)
+
+
+def resumir(artefacto, extension, pixeles=PIXELES_DENSIDAD, ruta=RUTA_PARQUET):
+    """Rejilla de densidad por cluster y perfiles, asignando lote por lote.
+
+    Los perfiles equivalen al groupby("Cluster") de p7 (moda del tipo y del
+    grupo horario, medias del resto) sin tener todas las filas en memoria.
+    """
+    k = artefacto["modelo"].n_clusters
+    conteos = 0
+    sumas = np.zeros((k, 4))
+    grupos = np.zeros((k, len(GRUPOS_HORARIO)), dtype=np.int64)
+    tipos = None
+    for df in lotes([*COLUMNAS, "Tipo_simplificado"], ruta=ruta):
+        X = caracteristicas(df)
+        cluster = artefacto["modelo"].predict(artefacto["escalador"].transform(X))
+        conteos = (
+            conteos + rasterizar(X[:, 1], X[:, 0], cluster, k, pixeles, extension)[0]
+        )
+        for j, valores in enumerate([X[:, 2], X[:, 0], X[:, 1], np.ones(len(X))]):
+            sumas[:, j] += np.bincount(cluster, weights=valores, minlength=k)
+        grupos += np.bincount(
+            cluster * len(GRUPOS_HORARIO) + X[:, 3].astype(np.int64),
+            minlength=k * len(GRUPOS_HORARIO),
+        ).reshape(k, -1)
+        parcial = pd.crosstab(cluster, df["Tipo_simplificado"].astype(str))
+        tipos = parcial if tipos is None else tipos.add(parcial, fill_value=0)
+
+    n = sumas[:, 3]
+    presentes = n > 0
+    tipos = tipos.reindex(range(k), fill_value=0)
+    perfiles = pd.DataFrame(
+        {
+            "Tipo_simplificado": tipos.idxmax(axis=1).to_numpy(),
+            "es_fin_semana": sumas[:, 0] / np.where(presentes, n, 1),
+            "grupo_horario": grupos.argmax(axis=1),
+            "Latitud": sumas[:, 1] / np.where(presentes, n, 1),
+            "Longitud": sumas[:, 2] / np.where(presentes, n, 1),
+        },
+        index=pd.Index(range(k), name="Cluster"),
+    )[presentes]
+    return conteos, perfiles.sort_values("grupo_horario")
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+from sklearn.metrics import accuracy_score, f1_score, silhouette_score
+from sklearn.model_selection import KFold, ParameterGrid, StratifiedKFold
+from sklearn.preprocessing import StandardScaler
+
+from accidentes.carga import DIR_CACHE, escribir_atomico
+from accidentes.clasificacion import pesos_sobremuestreo
+from accidentes.instrumentacion import medido
+from accidentes.vecinos import ClasificadorVecinos, IndiceExacto
+
+DIR_BUSQUEDA = Path(DIR_CACHE) / "busqueda"
+CAMPOS_CLAVE = ["familia", "parametros", "pliegue", "semilla", "datos"]
+
+
+def _evaluar_knn(X, y, entrenamiento, prueba, parametros, semilla):
+    """Como en p6: escala con el pliegue de entrenamiento y sobremuestrea con
+    pesos, sin copiar filas"""
+    parametros = dict(parametros)
+    escalador = StandardScaler().fit(X[entrenamiento])
+    y_train = y[entrenamiento]
+    pesos = (
+        pesos_sobremuestreo(y_train, semilla)
+        if parametros.pop("sobremuestreo", True)
+        else None
+    )
+    knn = ClasificadorVecinos(
+        IndiceExacto(metrica=parametros.pop("metric", "manhattan")),
+        n_neighbors=parametros.pop("n_neighbors", 5),
+        weights=parametros.pop("weights", "distance"),
+    )
+    knn.fit(escalador.transform(X[entrenamiento]), y_train, sample_weight=pesos)
+    y_pred = knn.predict(escalador.transform(X[prueba]))
+    return {
+        "exactitud": accuracy_score(y[prueba], y_pred),
+        "f1_macro": f1_score(y[prueba], y_pred, average="macro"),
+    }
+
+
+def _evaluar_kmeans(X, y, entrenamiento, prueba, parametros, semilla):
+    modelo = KMeans(random_state=semilla, **parametros).fit(X[entrenamiento])
+    etiquetas = modelo.predict(X[prueba])
+    return {
+        # Inercia por fila para que no dependa del tamaño del pliegue
+        "inercia": -modelo.score(X[prueba]) / len(prueba),
+        "silueta": silhouette_score(
+            X[prueba],
+            etiquetas,
+            sample_size=min(len(prueba), 5_000),
+            random_state=semilla,
+        ),
+    }
+
+
+# familia -> (evaluador, métrica para ordenar, pliegues estratificados por y)
+FAMILIAS = {
+    "knn": (_evaluar_knn, "f1_macro", True),
+    "kmeans": (_evaluar_kmeans, "silueta", False),
+}
+
+
+def _huella_arreglo(arreglo: np.ndarray) -> str:
+    resumen = hashlib.sha256(f"{arreglo.dtype}{arreglo.shape}".encode())
+    resumen.update(np.ascontiguousarray(arreglo).tobytes())
+    return resumen.hexdigest()[:16]
+
+
+def compartir(arreglo: np.ndarray, directorio: Path) -> str:
+    """Guarda el arreglo como .npy en `directorio` para abrirlo con mmap.
+
+    Los procesos del pool reciben solo la ruta y leen las mismas páginas del
+    archivo en lugar de una copia serializada cada uno. El nombre lleva la
+    huella del contenido, que también va en la clave de cada resultado.
+    """
+    ruta = Path(directorio) / f"matriz-{_huella_arreglo(arreglo)}.npy"
+    np.save(ruta, arreglo)
+    return str(ruta)
+
+
+def _ruta_resultado(clave: dict) -> Path:
+    texto = json.dumps(clave, sort_keys=True)
+    return DIR_BUSQUEDA / f"{hashlib.sha256(texto.encode()).hexdigest()[:24]}.json"
+
+
+def _evaluar_pliegue(tarea):
+    clave, ruta_X, ruta_y, ruta_pliegues = tarea
+    X = np.load(ruta_X, mmap_mode="r")
+    y = np.load(ruta_y, mmap_mode="r")
+    pliegues = np.load(ruta_pliegues, mmap_mode="r")
+    prueba = np.flatnonzero(pliegues == clave["pliegue"])
+    entrenamiento = np.flatnonzero(pliegues != clave["pliegue"])
+
+    evaluar = FAMILIAS[clave["familia"]][0]
+    metricas = evaluar(
+        X, y, entrenamiento, prueba, clave["parametros"], clave["semilla"]
+    )
+    resultado = {
+        **clave,
+        **{nombre: float(valor) for nombre, valor in metricas.items()},
+    }
+    # Un proceso interrumpido a media escritura no deja un JSON truncado
+    escribir_atomico(
+        _ruta_resultado(clave),
+        lambda ruta: Path(ruta).write_text(json.dumps(resultado)),
+    )
+    return resultado
+
+
+def _leer_resultado(ruta: Path):
+    """Resultado guardado de un pliegue, o None si falta o quedó ilegible"""
+    try:
+        return json.loads(ruta.read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+@medido("ajuste", filas_de=1)
+def buscar(
+    familia: str,
+    X,
+    y=None,
+    rejilla: dict = None,
+    n_pliegues: int = 5,
+    procesos: int = None,
+    semilla: int = 42,
+) -> pd.DataFrame:
+    """Validación cruzada de cada combinación de `rejilla` en paralelo.
+
+    Cada (parámetros, pliegue) es una tarea independiente del pool; su
+    resultado se guarda como JSON en csv/.cache/busqueda con una clave que
+    incluye la huella de los datos, así que una búsqueda interrumpida o con
+    más valores en la rejilla solo calcula lo que falta. Las matrices que
+    comparten los procesos van en un directorio temporal que se borra al
+    terminar. Regresa media y desviación de cada métrica por combinación, de
+    mejor a peor.
+    """
+    _, metrica, estratificar = FAMILIAS[familia]
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    y = np.zeros(len(X), dtype=np.int64) if y is None else pd.factorize(y)[0]
+
+    divisor = (StratifiedKFold if estratificar else KFold)(
+        n_pliegues, shuffle=True, random_state=semilla
+    )
+    pliegues = np.empty(len(X), dtype=np.int8)
+    for numero, (_, prueba) in enumerate(divisor.split(X, y)):
+        pliegues[prueba] = numero
+
+    datos = "-".join(
+        f"matriz-{_huella_arreglo(arreglo)}" for arreglo in (X, y, pliegues)
+    )
+    resultados, pendientes = [], []
+    for parametros in ParameterGrid(rejilla or {}):
+        for pliegue in range(n_pliegues):
+            clave = {
+                "familia": familia,
+                "parametros": parametros,
+                "pliegue": pliegue,
+                "semilla": semilla,
+                "datos": datos,
+            }
+            guardado = _leer_resultado(_ruta_resultado(clave))
+            if guardado is None:
+                pendientes.append(clave)
+            else:
+                resultados.append(guardado)
+
+    print(
+        f"Búsqueda {familia}: {len(pendientes)} pliegues por calcular, "
+        f"{len(resultados)} en caché"
+    )
+    if pendientes:
+        DIR_BUSQUEDA.mkdir(parents=True, exist_ok=True)
+        with tempfile.TemporaryDirectory(prefix=".matrices-", dir=DIR_BUSQUEDA) as d:
+            rutas = [compartir(arreglo, d) for arreglo in (X, y, pliegues)]
+            with ProcessPoolExecutor(max_workers=procesos) as pool:
+                resultados.extend(
+                    pool.map(
+                        _evaluar_pliegue, [(clave, *rutas) for clave in pendientes]
+                    )
+                )
+
+    tabla = pd.DataFrame(resultados)
+    tabla["parametros"] = tabla["parametros"].map(
+        lambda p: json.dumps(p, sort_keys=True)
+    )
+    metricas = [c for c in tabla.columns if c not in CAMPOS_CLAVE]
+    resumen = tabla.groupby("parametros")[metricas].agg(["mean", "std"])
+    return resumen.sort_values((metrica, "mean"), ascending=False)
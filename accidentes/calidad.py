@@ -0,0 +1,180 @@
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from accidentes.caracteristicas import por_valores_unicos
+from accidentes.instrumentacion import medido
+from accidentes.rejilla import haversine
+
+RUTA_REPORTE = "csv/calidad_reporte.json"
+RUTA_MARCAS = "csv/calidad_marcas.csv"
+
+# Zona metropolitana de Monterrey: (lat_min, lon_min, lat_max, lon_max)
+CAJA_MONTERREY = (25.40, -100.70, 26.10, -99.90)
+
+COLUMNAS = ["Folio", "Fecha", "Hora", "Latitud", "Longitud", "Nombre_de_asentamiento"]
+MARCAS = ["fuera_de_caja", "coordenadas_invertidas", "signo_invertido", "duplicado"]
+
+
+def en_caja(latitud, longitud, caja=CAJA_MONTERREY) -> np.ndarray:
+    lat_min, lon_min, lat_max, lon_max = caja
+    latitud, longitud = np.asarray(latitud), np.asarray(longitud)
+    return (
+        (latitud >= lat_min)
+        & (latitud <= lat_max)
+        & (longitud >= lon_min)
+        & (longitud <= lon_max)
+    )
+
+
+def revisar_coordenadas(latitud, longitud, caja=CAJA_MONTERREY) -> pd.DataFrame:
+    """Marcas por fila: fuera de la caja y, de esas, cuáles caerían dentro con
+    latitud y longitud intercambiadas o con el signo de la longitud corregido"""
+    fuera = ~en_caja(latitud, longitud, caja)
+    return pd.DataFrame(
+        {
+            "fuera_de_caja": fuera,
+            "coordenadas_invertidas": fuera & en_caja(longitud, latitud, caja),
+            "signo_invertido": fuera & en_caja(latitud, -np.asarray(longitud), caja),
+        }
+    )
+
+
+def momento_en_minutos(fecha: pd.Series, hora: pd.Series) -> np.ndarray:
+    """Minutos desde la época de Fecha + Hora (HH:MM:SS)"""
+    minutos = por_valores_unicos(
+        hora, lambda horas: pd.to_timedelta(horas) // pd.Timedelta(minutes=1)
+    )
+    dias = fecha.to_numpy("datetime64[D]").astype(np.int64)
+    return dias * 1440 + minutos.to_numpy(np.int64)
+
+
+def pares_cercanos(momento, latitud, longitud, ventana: int, metros: float):
+    """Pares (i, j) a `ventana` minutos o menos y `metros` o menos entre sí.
+
+    Con las filas ordenadas por momento, la fila i solo se compara con i + 1,
+    i + 2, ... mientras sigan dentro de la ventana. Cada desplazamiento es una
+    operación vectorizada sobre las filas que aún tienen vecinos en tiempo, así
+    que el trabajo es n más el número de pares dentro de la ventana, no n².
+    """
+    orden = np.argsort(momento, kind="stable")
+    t = np.asarray(momento)[orden]
+    latitud = np.asarray(latitud, dtype=np.float64)[orden]
+    longitud = np.asarray(longitud, dtype=np.float64)[orden]
+
+    pares_i, pares_j = [], []
+    activas = np.arange(len(t))
+    desplazamiento = 1
+    while len(activas):
+        activas = activas[activas + desplazamiento < len(t)]
+        siguiente = activas + desplazamiento
+        en_ventana = t[siguiente] - t[activas] <= ventana
+        activas, siguiente = activas[en_ventana], siguiente[en_ventana]
+        cerca = (
+            haversine(
+                latitud[activas],
+                longitud[activas],
+                latitud[siguiente],
+                longitud[siguiente],
+            )
+            <= metros
+        )
+        pares_i.append(orden[activas[cerca]])
+        pares_j.append(orden[siguiente[cerca]])
+        desplazamiento += 1
+    return np.concatenate(pares_i), np.concatenate(pares_j)
+
+
+def agrupar_duplicados(momento, latitud, longitud, ventana=30, metros=50):
+    """Grupo de cada fila (componentes conexas de los pares cercanos) y si es
+    la copia de otra; en cada grupo se queda la primera en el tiempo"""
+    n = len(momento)
+    i, j = pares_cercanos(momento, latitud, longitud, ventana, metros)
+    grafo = coo_matrix((np.ones(len(i), dtype=np.int8), (i, j)), shape=(n, n))
+    _, grupo = connected_components(grafo, directed=False)
+
+    orden = np.argsort(momento, kind="stable")
+    rango = np.empty(n, dtype=np.int64)
+    rango[orden] = np.arange(n)
+    primera = np.full(grupo.max() + 1, n)
+    np.minimum.at(primera, grupo, rango)
+    original = orden[primera[grupo]]
+    return grupo, original, original != np.arange(n)
+
+
+@medido("limpieza", filas_de=0)
+def revisar(
+    df: pd.DataFrame, ventana: int = 30, metros: float = 50, caja=CAJA_MONTERREY
+):
+    """Marcas de calidad por accidente y el reporte resumido.
+
+    Regresa (marcas, reporte): marcas tiene una fila por accidente con las
+    columnas de MARCAS y el Folio del reporte original en duplicado_de.
+    """
+    inicio = time.perf_counter()
+    marcas = revisar_coordenadas(df["Latitud"], df["Longitud"], caja)
+    marcas.index = df.index
+    momento = momento_en_minutos(df["Fecha"], df["Hora"])
+    grupo, original, duplicado = agrupar_duplicados(
+        momento, df["Latitud"], df["Longitud"], ventana, metros
+    )
+    folios = df["Folio"].to_numpy()
+    marcas["duplicado"] = duplicado
+    marcas["duplicado_de"] = np.where(duplicado, folios[original], None)
+    marcas.insert(0, "Folio", folios)
+
+    con_marca = marcas[MARCAS].any(axis=1)
+    reporte = {
+        "filas": len(df),
+        "filas_con_marca": int(con_marca.sum()),
+        **{marca: int(marcas[marca].sum()) for marca in MARCAS},
+        "grupos_duplicados": int(len(np.unique(grupo[duplicado]))),
+        "parametros": {"ventana_minutos": ventana, "metros": metros, "caja": caja},
+        "colonias_con_mas_marcas": df.loc[con_marca, "Nombre_de_asentamiento"]
+        .value_counts()
+        .loc[lambda conteos: conteos > 0]
+        .head(10)
+        .astype(int)
+        .to_dict(),
+        "segundos": round(time.perf_counter() - inicio, 3),
+    }
+    return marcas, reporte
+
+
+def guardar(
+    marcas: pd.DataFrame,
+    reporte: dict,
+    ruta_marcas=RUTA_MARCAS,
+    ruta_reporte=RUTA_REPORTE,
+):
+    """Escribe solo las filas con alguna marca y el reporte en JSON"""
+    marcas[marcas[MARCAS].any(axis=1)].to_csv(ruta_marcas, index=False)
+    with open(ruta_reporte, "w", encoding="utf-8") as archivo:
+        json.dump(reporte, archivo, ensure_ascii=False, indent=2, default=str)
+
+
+def folios_marcados(ruta_marcas: str = RUTA_MARCAS) -> pd.Index:
+    """Folios marcados por la última revisión; vacío si no se ha corrido"""
+    if not Path(ruta_marcas).exists():
+        return pd.Index([], dtype=str)
+    return pd.Index(pd.read_csv(ruta_marcas, usecols=["Folio"])["Folio"].astype(str))
+
+
+def descartar(
+    df: pd.DataFrame, ruta_marcas: str = RUTA_MARCAS, marcados: pd.Index = None
+) -> pd.DataFrame:
+    """Quita los accidentes marcados por la última revisión (si existe).
+
+    Con `marcados` de `folios_marcados` no se relee el archivo, para filtrar
+    muchos lotes seguidos.
+    """
+    if marcados is None:
+        marcados = folios_marcados(ruta_marcas)
+    if len(marcados) == 0:
+        return df
+    return df[~df["Folio"].astype(str).isin(marcados)]
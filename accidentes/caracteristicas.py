@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from accidentes.constantes import DIAS_ORDEN, MES_ORDEN
+from accidentes.instrumentacion import medido
+from accidentes.rejilla import celda
+
+GRUPOS_HORARIO = ["madrugada", "mañana", "tarde", "noche"]
+
+# Límites de grupo_horario en horas: [0, 6) madrugada, [6, 12) mañana, etc.
+LIMITES_HORARIO = [6, 12, 18]
+
+
+def _arrow(serie: pd.Series) -> pa.Array:
+    arreglo = pa.array(serie, type=pa.string(), from_pandas=True)
+    if isinstance(arreglo, pa.ChunkedArray):
+        arreglo = arreglo.combine_chunks()
+    return arreglo
+
+
+def diccionario(serie: pd.Series):
+    """Códigos por fila y valores distintos de una columna de texto (nulo incluido)"""
+    codificado = pc.dictionary_encode(_arrow(serie), null_encoding="encode")
+    return (
+        codificado.indices.to_numpy(zero_copy_only=False),
+        pd.Series(codificado.dictionary.to_pandas()),
+    )
+
+
+def _expandir(valores: pd.Series, codigos, indice) -> pd.Series:
+    """valores[codigos]; el texto se expande en arrow para no crear un str por fila"""
+    if pd.api.types.is_numeric_dtype(valores):
+        return pd.Series(valores.to_numpy()[codigos], index=indice)
+    arreglo = pa.array(valores, type=pa.string(), from_pandas=True)
+    return pc.take(arreglo, codigos).to_pandas().set_axis(indice)
+
+
+def por_valores_unicos(serie: pd.Series, funcion) -> pd.Series:
+    """Aplica `funcion` (vectorizada) solo a los valores distintos y expande.
+
+    Hora, Tipo_de_accidente, etc. tienen pocos valores distintos comparados
+    con el número de filas, así que el trabajo caro se hace una vez por valor.
+    """
+    codigos, unicos = diccionario(serie)
+    return _expandir(pd.Series(funcion(unicos)), codigos, serie.index)
+
+
+def parsear_hora(hora: pd.Series):
+    """Texto HH:MM:SS y número de hora, con una sola conversión por valor distinto.
+
+    Los archivos traen tanto HH:MM como HH:MM:SS; con format="mixed" cada valor
+    se interpreta por separado en lugar de inferir un formato del primero (y
+    avisar en cada bloque).
+    """
+    codigos, unicos = diccionario(hora)
+    tiempos = pd.to_datetime(unicos, format="mixed")
+    return (
+        _expandir(tiempos.dt.strftime("%H:%M:%S"), codigos, hora.index),
+        _expandir(tiempos.dt.hour, codigos, hora.index),
+    )
+
+
+def codigos_orden(serie: pd.Series, orden) -> np.ndarray:
+    """Posición de cada valor en `orden` (-1 si no está), como Categorical.codes"""
+    posiciones = pc.index_in(_arrow(serie), value_set=pa.array(orden))
+    return pc.fill_null(posiciones, -1).to_numpy(zero_copy_only=False).astype(np.int8)
+
+
+def grupo_horario(hora_num) -> np.ndarray:
+    """Código 0-3 (madrugada, mañana, tarde, noche) con una búsqueda binaria"""
+    return np.searchsorted(LIMITES_HORARIO, np.asarray(hora_num), side="right")
+
+
+def separar_coordenadas(georreferencia: pd.Series):
+    """Latitud y longitud de "lat, lon" sin pasar por objetos de Python"""
+    texto = _arrow(georreferencia)
+    partes = pc.split_pattern(pc.fill_null(texto, ""), ", ", max_splits=1)
+    if pc.all(pc.equal(pc.list_value_length(partes), 2)).as_py():
+        # Todas con las dos partes: lat y lon quedan alternadas en la lista plana
+        pares = pc.cast(partes.flatten(), pa.float64()).to_numpy().reshape(-1, 2)
+        latitud, longitud = pares[:, 0], pares[:, 1]
+    else:
+        # Las que no tienen la forma "lat, lon" quedan nulas y se van en el dropna
+        campos = pc.extract_regex(texto, r"^(?P<lat>[^,]*), (?P<lon>.*)$")
+        latitud, longitud = (
+            pc.cast(pc.struct_field(campos, nombre), pa.float64()).to_numpy(
+                zero_copy_only=False
+            )
+            for nombre in ("lat", "lon")
+        )
+    return (
+        pd.Series(latitud, index=georreferencia.index),
+        pd.Series(longitud, index=georreferencia.index),
+    )
+
+
+def celda_espacial(latitud: pd.Series, longitud: pd.Series) -> pd.Series:
+    """Id de celda de la rejilla (Int64, nulo si falta alguna coordenada)"""
+    validos = (latitud.notna() & longitud.notna()).to_numpy()
+    ids = celda(latitud.fillna(0), longitud.fillna(0))
+    return pd.Series(pd.array(ids, dtype="Int64"), index=latitud.index).where(validos)
+
+
+@medido("caracteristicas")
+def derivar(df: pd.DataFrame) -> pd.DataFrame:
+    """Todas las columnas que salen de cada fila por sí sola.
+
+    Normaliza Hora a HH:MM:SS y agrega Hora_num, Latitud, Longitud, Celda,
+    Dia_num, Mes_num, grupo_horario y es_fin_semana; Tipo_de_accidente queda en
+    minúsculas y sin espacios a los lados.
+    """
+    df["Hora"], df["Hora_num"] = parsear_hora(df["Hora"])
+    df["Latitud"], df["Longitud"] = separar_coordenadas(df["Georreferencia"])
+    df["Celda"] = celda_espacial(df["Latitud"], df["Longitud"])
+    df["Dia_num"] = codigos_orden(df["Dia"], DIAS_ORDEN)
+    df["Mes_num"] = codigos_orden(df["Mes"], MES_ORDEN)
+    df["grupo_horario"] = _expandir(
+        pd.Series(GRUPOS_HORARIO), grupo_horario(df["Hora_num"]), df.index
+    )
+    df["es_fin_semana"] = df["Dia"].isin(["Sabado", "Domingo"]).astype(int)
+    df["Tipo_de_accidente"] = por_valores_unicos(
+        df["Tipo_de_accidente"], lambda tipos: tipos.str.lower().str.strip()
+    )
+    return df
+
+
+def agregar_globales(df: pd.DataFrame, top_colonias, tipos_validos) -> pd.DataFrame:
+    """Columnas que dependen de los conteos de todo el historial"""
+    df["colonia_alto_riesgo"] = (
+        df["Nombre_de_asentamiento"].isin(top_colonias).astype(int)
+    )
+    df["Tipo_simplificado"] = df["Tipo_de_accidente"].where(
+        df["Tipo_de_accidente"].isin(tipos_validos), "otro"
+    )
+    return df
@@ -0,0 +1,122 @@
+import hashlib
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+from accidentes.caracteristicas import GRUPOS_HORARIO
+from accidentes.esquema import RUTA_PARQUET
+from accidentes.instrumentacion import medido
+
+DIR_CACHE = "csv/.cache"
+
+# ruta -> (huella, {columna: Series}); se llena columna por columna según lo que
+# pidan las etapas. Solo se guarda la huella vigente: al cambiar el parquet la
+# anterior se suelta en lugar de acumular un DataFrame por ingesta
+_memoria = {}
+
+
+def huella(ruta: str = RUTA_PARQUET) -> str:
+    """Hash del nombre, tamaño y fecha de modificación de cada parte del parquet"""
+    partes = sorted(Path(ruta).glob("*.parquet"))
+    if not partes:
+        raise FileNotFoundError(f"No existe el dataset en {ruta}")
+    resumen = hashlib.sha256()
+    for parte in partes:
+        info = parte.stat()
+        resumen.update(f"{parte.name}:{info.st_size}:{info.st_mtime_ns}".encode())
+    return resumen.hexdigest()[:16]
+
+
+def preparar(df: pd.DataFrame) -> pd.DataFrame:
+    """Columnas derivadas que las etapas calculaban cada una por su cuenta"""
+    df["grupo_horario"] = pd.Categorical(
+        df["grupo_horario"], categories=GRUPOS_HORARIO, ordered=True
+    )
+    return df
+
+
+def escribir_atomico(ruta: Path, escribir):
+    """`escribir(temporal)` en el mismo directorio y luego `os.replace` a `ruta`.
+
+    Varias etapas pueden armar el mismo caché a la vez; así ninguna lee un
+    archivo a medias y la última en terminar solo reemplaza uno completo.
+    """
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(
+        prefix=f".{ruta.name}.", suffix=".tmp", dir=ruta.parent
+    )
+    os.close(descriptor)
+    try:
+        escribir(temporal)
+        os.replace(temporal, ruta)
+    except BaseException:
+        Path(temporal).unlink(missing_ok=True)
+        raise
+
+
+def borrar_anteriores(ruta: Path, patron: str):
+    """Borra las versiones viejas de un caché, menos `ruta`. Quien ya las tenga
+    abiertas las sigue leyendo: el archivo desaparece del directorio, no del disco"""
+    for anterior in ruta.parent.glob(patron):
+        if anterior != ruta:
+            anterior.unlink(missing_ok=True)
+
+
+def _ruta_cache(clave: str) -> Path:
+    return Path(DIR_CACHE) / f"preparado-{clave}.feather"
+
+
+def _escribir_cache(clave: str, ruta: str):
+    df = preparar(pd.read_parquet(ruta)).reset_index(drop=True)
+    escribir_atomico(_ruta_cache(clave), df.to_feather)
+    borrar_anteriores(_ruta_cache(clave), "preparado-*.feather")
+
+
+@medido("carga")
+def cargar_datos(columnas=None, ruta: str = RUTA_PARQUET) -> pd.DataFrame:
+    """Devuelve el dataset tipado con sus columnas derivadas.
+
+    El resultado de `preparar` se guarda en disco como feather junto a la huella
+    del parquet, así que solo la primera etapa después de una ingesta lo calcula.
+    Dentro del proceso cada columna se lee una sola vez y se reutiliza.
+    """
+    for intento in range(2):
+        clave = huella(ruta)
+        ruta_cache = _ruta_cache(clave)
+        if not ruta_cache.exists():
+            _escribir_cache(clave, ruta)
+
+        vigente, memoria = _memoria.get(ruta, (None, {}))
+        if vigente != clave:
+            memoria = {}
+            _memoria[ruta] = (clave, memoria)
+        try:
+            nombres = columnas
+            if nombres is None:
+                with pa.memory_map(str(ruta_cache)) as archivo:
+                    nombres = pa.ipc.open_file(archivo).schema.names
+            faltantes = [columna for columna in nombres if columna not in memoria]
+            if faltantes:
+                memoria.update(pd.read_feather(ruta_cache, columns=faltantes).items())
+            return pd.DataFrame({columna: memoria[columna] for columna in nombres})
+        except FileNotFoundError:
+            # Una ingesta más nueva reemplazó el caché entre la huella y la
+            # lectura: se reintenta una vez con la huella nueva
+            _memoria.pop(ruta, None)
+            if intento:
+                raise
+
+
+def cargar_etapa(columnas=None, cargador=cargar_datos) -> pd.DataFrame:
+    """`cargar_datos` (o `cargar_cubo`) con los mensajes y la salida de error de los scripts"""
+    try:
+        df = cargador(columnas)
+    except Exception as e:
+        print(f"Error al leer archivo: {e}")
+        sys.exit(1)
+    print("Archivo cargado correctamente :)")
+    return df
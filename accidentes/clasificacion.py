@@ -0,0 +1,159 @@
+import time
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import sklearn
+from sklearn.neighbors import KNeighborsClassifier
+
+from accidentes.ingesta import limpiar_chunk, limpiar_columnas
+from accidentes.instrumentacion import medido
+from accidentes.vecinos import ClasificadorVecinos, IndiceExacto, IndiceIVF
+
+CARACTERISTICAS = [
+    "Dia_num",
+    "Hora_num",
+    "Latitud",
+    "Longitud",
+    "Mes_num",
+    "es_fin_semana",
+    "colonia_alto_riesgo",
+]
+RUTA_MODELO = "modelos/knn.joblib"
+INDICES = ["exacto", "ivf", "sklearn"]
+
+# Subir cuando cambie el contenido del artefacto; los anteriores se rechazan
+VERSION_ARTEFACTO = 2
+
+# ruta -> artefacto ya leído
+_modelos = {}
+
+
+def crear_knn(indice: str = "exacto", nprobe: int = 4):
+    """El clasificador de p6 con el motor de búsqueda de vecinos elegido.
+
+    exacto: KDTree sobre las filas de entrenamiento con su multiplicidad como
+    peso; ivf: índice aproximado por celdas, también con pesos; sklearn:
+    KNeighborsClassifier con kd_tree (repite las filas sobremuestreadas).
+    """
+    if indice == "sklearn":
+        return KNeighborsClassifier(
+            n_neighbors=5,
+            weights="distance",
+            metric="manhattan",
+            algorithm="kd_tree",
+        )
+    if indice == "exacto":
+        return ClasificadorVecinos(IndiceExacto(), n_neighbors=5)
+    if indice == "ivf":
+        return ClasificadorVecinos(IndiceIVF(nprobe=nprobe), n_neighbors=5)
+    raise ValueError(f"Índice desconocido: {indice} (opciones: {INDICES})")
+
+
+def pesos_sobremuestreo(y, semilla: int = 42) -> np.ndarray:
+    """Copias de cada fila que daría RandomOverSampler, sin crear las copias.
+
+    Igual que la estrategia "auto": cada clase se completa hasta el tamaño de la
+    mayoritaria sorteando filas de esa clase con reemplazo.
+    """
+    generador = np.random.default_rng(semilla)
+    _, codigos = np.unique(np.asarray(y), return_inverse=True)
+    conteos = np.bincount(codigos)
+    pesos = np.ones(len(codigos), dtype=np.int64)
+    for clase, conteo in enumerate(conteos):
+        filas = np.flatnonzero(codigos == clase)
+        np.add.at(pesos, generador.choice(filas, conteos.max() - conteo), 1)
+    return pesos
+
+
+@medido("ajuste", filas_de=1)
+def entrenar(knn, X, y, pesos):
+    """Ajusta con los pesos de sobremuestreo.
+
+    ClasificadorVecinos los usa como multiplicidad de cada punto; el de sklearn
+    no acepta pesos y necesita las filas repetidas.
+    """
+    X, y = np.asarray(X), np.asarray(y)
+    if isinstance(knn, ClasificadorVecinos):
+        return knn.fit(X, y, sample_weight=pesos)
+    filas = np.repeat(np.arange(len(X)), pesos)
+    return knn.fit(X[filas], y[filas])
+
+
+def crear_artefacto(escalador, knn, top_colonias, huella=None) -> dict:
+    return {
+        "version": VERSION_ARTEFACTO,
+        "sklearn": sklearn.__version__,
+        "creado": datetime.now().isoformat(timespec="seconds"),
+        "huella_datos": huella,
+        "caracteristicas": CARACTERISTICAS,
+        "top_colonias": sorted(top_colonias),
+        "escalador": escalador,
+        "knn": knn,
+    }
+
+
+def guardar_modelo(artefacto: dict, ruta: str = RUTA_MODELO):
+    Path(ruta).parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(artefacto, ruta)
+    _modelos[ruta] = artefacto
+
+
+def cargar_modelo(ruta: str = RUTA_MODELO) -> dict:
+    if ruta not in _modelos:
+        artefacto = joblib.load(ruta)
+        if artefacto.get("version") != VERSION_ARTEFACTO:
+            raise ValueError(
+                f"{ruta} es de la versión {artefacto.get('version')} y se esperaba "
+                f"la {VERSION_ARTEFACTO}; vuelve a entrenar con p6/knn.py"
+            )
+        _modelos[ruta] = artefacto
+    return _modelos[ruta]
+
+
+def preparar_lote(df: pd.DataFrame, artefacto: dict) -> pd.DataFrame:
+    """Acepta filas tal como las exporta el portal o ya limpias (csv de p1)"""
+    if "Latitud" not in df.columns:
+        df.columns = limpiar_columnas(df.columns)
+        df = limpiar_chunk(df)
+    if "colonia_alto_riesgo" not in df.columns:
+        df["colonia_alto_riesgo"] = (
+            df["Nombre_de_asentamiento"].isin(artefacto["top_colonias"]).astype(int)
+        )
+    return df
+
+
+@medido("prediccion")
+def predecir(df: pd.DataFrame, artefacto: dict = None) -> pd.Series:
+    """Tipo_simplificado estimado para cada fila de un lote ya preparado"""
+    artefacto = artefacto or cargar_modelo()
+    X = artefacto["escalador"].transform(df[artefacto["caracteristicas"]])
+    return pd.Series(artefacto["knn"].predict(X), index=df.index, name="Prediccion")
+
+
+def _lotes_archivo(ruta: Path, chunksize: int):
+    if ruta.suffix == ".parquet":
+        for lote in pq.ParquetFile(ruta).iter_batches(chunksize):
+            yield lote.to_pandas()
+    else:
+        yield from pd.read_csv(ruta, chunksize=chunksize)
+
+
+def puntuar_archivo(ruta, artefacto: dict = None, chunksize: int = 50_000):
+    """Predicciones de un CSV o parquet de accidentes nuevos, bloque por bloque.
+
+    Regresa (resultado, filas por segundo); el resultado trae las columnas de
+    entrada más Prediccion.
+    """
+    artefacto = artefacto or cargar_modelo()
+    inicio = time.perf_counter()
+    bloques = []
+    for lote in _lotes_archivo(Path(ruta), chunksize):
+        lote = preparar_lote(lote, artefacto)
+        bloques.append(lote.assign(Prediccion=predecir(lote, artefacto)))
+    resultado = pd.concat(bloques, ignore_index=True)
+    segundos = time.perf_counter() - inicio
+    return resultado, len(resultado) / max(segundos, 1e-9)
@@ -0,0 +1,144 @@
+"""Punto de entrada único de las etapas.
+
+mty-accidents p2
+mty-accidents --timing p8 --por colonia
+mty-accidents flujo --forzar
+
+Este módulo solo usa la biblioteca estándar: pandas, sklearn, matplotlib y
+demás se importan cuando el comando elegido los pide. Cada etapa corre como
+su script (`runpy`) con el backend Agg ya configurado.
+"""
+
+import argparse
+import builtins
+import os
+import runpy
+import sys
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parents[1]
+
+# comando -> (script o módulo, descripción)
+COMANDOS = {
+    "p1": ("p1/dataAdquisition.py", "Descarga y limpia los accidentes del portal"),
+    "preparar": ("p1/preparar.py", "Arma los cachés del dataset y del índice espacial"),
+    "calidad": ("p1/calidad.py", "Coordenadas fuera de la zona y duplicados"),
+    "p2": ("p2/descriptiveStatistics.py", "Estadísticas descriptivas"),
+    "p3": ("p3/dataVisualization.py", "Gráficas de tipos, horas, días y colonias"),
+    "p4": ("p4/statisticTest.py", "Pruebas estadísticas"),
+    "p6": ("p6/knn.py", "Entrena el KNN de tipo de accidente"),
+    "inferencia": ("p6/inferencia.py", "Predice el tipo con el KNN guardado"),
+    "vecinos": ("p6/benchmark_vecinos.py", "Compara los motores de vecinos"),
+    "p7": ("p7/k-means.py", "Clusters k-means"),
+    "hotspots": ("p7/hotspots.py", "Hotspots y consultas por radio o caja"),
+    "p8": ("p8/linearRegression.py", "Pronóstico de accidentes"),
+    "p9": ("p9/cloud.py", "Nubes de palabras"),
+    "flujo": ("accidentes.flujo", "Corre las etapas con dependencias y caché"),
+    "sintetico": ("accidentes.sintetico", "Genera accidentes sintéticos"),
+    "escalamiento": ("benchmarks/escalamiento.py", "Benchmark de escalamiento"),
+    "servicio": ("accidentes.servicio", "Servicio HTTP local de conteos con caché"),
+    "carga-servicio": ("benchmarks/carga_servicio.py", "Prueba de carga del servicio"),
+}
+
+
+class RelojImportaciones:
+    """Tiempo dentro de `import`: el total de las llamadas más externas y el
+    propio de cada paquete (sin los paquetes que importa a su vez)"""
+
+    def __init__(self):
+        self.segundos = 0.0
+        self.por_paquete = {}
+        self._pila = []
+        self._original = builtins.__import__
+
+    def _importar(self, nombre, globales=None, locales=None, lista=(), nivel=0):
+        # [segundos de imports anidados]
+        self._pila.append([0.0])
+        inicio = time.perf_counter()
+        try:
+            return self._original(nombre, globales, locales, lista, nivel)
+        finally:
+            segundos = time.perf_counter() - inicio
+            (anidados,) = self._pila.pop()
+            if nivel:
+                # Import relativo: cuenta para el paquete que lo hace
+                nombre = (globales or {}).get("__package__") or "?"
+            paquete = nombre.split(".")[0]
+            self.por_paquete[paquete] = (
+                self.por_paquete.get(paquete, 0.0) + segundos - anidados
+            )
+            if self._pila:
+                self._pila[-1][0] += segundos
+            else:
+                self.segundos += segundos
+
+    def __enter__(self):
+        builtins.__import__ = self._importar
+        return self
+
+    def __exit__(self, *excepcion):
+        builtins.__import__ = self._original
+
+
+def correr(comando: str, argumentos) -> None:
+    objetivo = COMANDOS[comando][0]
+    if objetivo.endswith(".py"):
+        ruta = str(RAIZ / objetivo)
+        sys.argv = [ruta, *argumentos]
+        runpy.run_path(ruta, run_name="__main__")
+    else:
+        sys.argv = [objetivo, *argumentos]
+        runpy.run_module(objetivo, run_name="__main__", alter_sys=True)
+
+
+def reportar_tiempos(reloj: RelojImportaciones, total: float):
+    lentos = sorted(reloj.por_paquete.items(), key=lambda par: -par[1])[:5]
+    print(
+        f"\nTiempo: importación {reloj.segundos:.2f} s, "
+        f"cómputo {total - reloj.segundos:.2f} s, total {total:.2f} s",
+        file=sys.stderr,
+    )
+    print(
+        "Paquetes más lentos de importar: "
+        + ", ".join(f"{paquete} {segundos:.2f} s" for paquete, segundos in lentos),
+        file=sys.stderr,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="mty-accidents",
+        description="Análisis de accidentes viales de Monterrey.",
+        epilog="Comandos:\n"
+        + "\n".join(
+            f"  {comando:15} {descripcion}"
+            for comando, (_, descripcion) in COMANDOS.items()
+        )
+        + "\n\n`mty-accidents <comando> --help` muestra las opciones de cada uno.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--timing",
+        action="store_true",
+        help="Al terminar, separar el tiempo de importación del de cómputo",
+    )
+    parser.add_argument("comando", choices=list(COMANDOS), metavar="comando")
+    parser.add_argument("argumentos", nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    if not args.timing:
+        correr(args.comando, args.argumentos)
+        return
+
+    inicio = time.perf_counter()
+    with RelojImportaciones() as reloj:
+        try:
+            correr(args.comando, args.argumentos)
+        finally:
+            reportar_tiempos(reloj, time.perf_counter() - inicio)
+
+
+if __name__ == "__main__":
+    main()
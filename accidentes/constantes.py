@@ -0,0 +1,30 @@
+URL_EXPORTACION = "https://nuevoleon.opendatasoft.com/api/explore/v2.1/catalog/datasets/indices-de-estadisticas-de-accidentes-viales-monterrey/exports/csv"
+PARAMETROS_EXPORTACION = {
+    "lang": "en",
+    "timezone": "America/Mexico_City",
+    "use_labels": "true",
+    "delimiter": ",",
+}
+
+RUTA_CSV = "csv/accidentes_viales_mty.csv"
+
+# Nombre del campo (no la etiqueta) que acepta el filtro `where=` de la API
+CAMPO_FECHA_API = "fecha"
+
+VALORES_INVALIDOS = ["SD", "No Dato", "sd"]
+
+DIAS_ORDEN = ["Lunes", "Martes", "Miercoles", "Jueves", "Viernes", "Sabado", "Domingo"]
+MES_ORDEN = [
+    "Enero",
+    "Febrero",
+    "Marzo",
+    "Abril",
+    "Mayo",
+    "Junio",
+    "Julio",
+    "Agosto",
+    "Septiembre",
+    "Octubre",
+    "Noviembre",
+    "Diciembre",
+]
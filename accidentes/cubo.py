@@ -0,0 +1,77 @@
+from pathlib import Path
+
+import pandas as pd
+
+from accidentes.esquema import RUTA_PARQUET
+from accidentes.instrumentacion import medido
+
+RUTA_CUBO = "csv/cubo_accidentes.parquet"
+
+# Dia y Tipo_de_accidente dependen de Dia_num/Fecha y Tipo_simplificado no agrega
+# combinaciones nuevas, pero se guardan para que los reportes usen las etiquetas
+DIMENSIONES = [
+    "Fecha",
+    "Hora_num",
+    "Dia_num",
+    "Dia",
+    "Tipo_de_accidente",
+    "Tipo_simplificado",
+    "Nombre_de_asentamiento",
+    "Resolucion",
+]
+TEXTO = [
+    "Dia",
+    "Tipo_de_accidente",
+    "Tipo_simplificado",
+    "Nombre_de_asentamiento",
+    "Resolucion",
+]
+
+
+def cubo_de(df: pd.DataFrame) -> pd.DataFrame:
+    """Número de accidentes por cada combinación observada de las dimensiones"""
+    df = df[DIMENSIONES].assign(Fecha=df["Fecha"].dt.normalize())
+    return df.groupby(DIMENSIONES, observed=True).size().rename("Total").reset_index()
+
+
+def sumar_cubos(cubos) -> pd.DataFrame:
+    """Une cubos parciales sumando los conteos de las celdas repetidas"""
+    cubo = pd.concat(
+        [c.astype({columna: str for columna in TEXTO}) for c in cubos],
+        ignore_index=True,
+    )
+    cubo = cubo.groupby(DIMENSIONES)["Total"].sum().reset_index()
+    return cubo.astype(
+        {
+            **{columna: "category" for columna in TEXTO},
+            "Hora_num": "int8",
+            "Dia_num": "int8",
+            "Total": "int64",
+        }
+    )
+
+
+@medido("carga")
+def construir_cubo(ruta_parquet: str = RUTA_PARQUET) -> pd.DataFrame:
+    """Cubo completo, leyendo el parquet una parte a la vez.
+
+    Solo se guarda el cubo de cada parte y al final se suman todos en un
+    groupby; volver a agrupar el acumulado en cada parte costaba cuadrático.
+    """
+    return sumar_cubos(
+        [
+            cubo_de(pd.read_parquet(parte, columns=DIMENSIONES))
+            for parte in sorted(Path(ruta_parquet).glob("*.parquet"))
+        ]
+    )
+
+
+def guardar_cubo(cubo: pd.DataFrame, ruta: str = RUTA_CUBO):
+    cubo.to_parquet(ruta, index=False)
+
+
+@medido("carga")
+def cargar_cubo(columnas=None, ruta: str = RUTA_CUBO) -> pd.DataFrame:
+    if columnas is not None and "Total" not in columnas:
+        columnas = [*columnas, "Total"]
+    return pd.read_parquet(ruta, columns=columnas)
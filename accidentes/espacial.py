@@ -0,0 +1,279 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from scipy.ndimage import gaussian_filter, maximum_filter
+
+from accidentes.agregacion import codificar
+from accidentes.calidad import CAJA_MONTERREY, en_caja
+from accidentes.carga import DIR_CACHE, borrar_anteriores, escribir_atomico, huella
+from accidentes.esquema import RUTA_PARQUET
+from accidentes.instrumentacion import medido
+from accidentes.rejilla import (
+    COLUMNAS_REJILLA,
+    GRADOS_LAT,
+    GRADOS_LON,
+    TAMANO_CELDA,
+    caja_de_radio,
+    celda,
+    centro,
+    fila_columna,
+    haversine,
+    separar,
+)
+
+COLUMNAS = [
+    "Celda",
+    "Fecha",
+    "Hora_num",
+    "Dia_num",
+    "Tipo_simplificado",
+    "Latitud",
+    "Longitud",
+]
+
+# ruta -> (huella, índice ya leído); solo la huella vigente de cada dataset
+_indices = {}
+
+
+class IndiceEspacial:
+    """Accidentes ordenados por (celda, fecha) con el rango de filas de cada celda.
+
+    `celdas` son los ids ocupados en orden y las filas de celdas[i] van de
+    inicios[i] a inicios[i + 1]. Como los ids de una fila de la rejilla son
+    consecutivos, una caja se resuelve con un searchsorted por fila de la
+    rejilla y solo se revisan los accidentes de esas celdas. Guarda además los
+    conteos por celda y hora, día y tipo.
+    """
+
+    ARREGLOS = [
+        "celdas",
+        "inicios",
+        "fecha",
+        "hora",
+        "dia",
+        "tipo",
+        "latitud",
+        "longitud",
+        "por_hora",
+        "por_dia",
+        "por_tipo",
+        "tipos",
+    ]
+
+    @medido("caracteristicas", filas_de=1)
+    def construir(self, df: pd.DataFrame):
+        ids = df["Celda"].to_numpy(np.int64)
+        fecha = df["Fecha"].to_numpy("datetime64[D]")
+        orden = np.lexsort((fecha, ids))
+        ids = ids[orden]
+
+        self.celdas, self.inicios = np.unique(ids, return_index=True)
+        self.inicios = np.append(self.inicios, len(ids))
+        self.fecha = fecha[orden]
+        self.hora = df["Hora_num"].to_numpy(np.int8)[orden]
+        self.dia = df["Dia_num"].to_numpy(np.int8)[orden]
+        codigos, tipos = codificar(df["Tipo_simplificado"])
+        self.tipo = codigos[orden].astype(np.int16)
+        self.tipos = np.asarray(tipos, dtype=str)
+        self.latitud = df["Latitud"].to_numpy(np.float64)[orden]
+        self.longitud = df["Longitud"].to_numpy(np.float64)[orden]
+
+        posicion = np.repeat(np.arange(len(self.celdas)), np.diff(self.inicios))
+        self.por_hora = self._conteos(posicion, self.hora, 24)
+        self.por_dia = self._conteos(posicion, self.dia, 7)
+        self.por_tipo = self._conteos(posicion, self.tipo, len(self.tipos))
+        return self
+
+    def _conteos(self, posicion, valores, n):
+        validos = valores >= 0
+        return (
+            np.bincount(
+                posicion[validos] * n + valores[validos],
+                minlength=len(self.celdas) * n,
+            )
+            .reshape(len(self.celdas), n)
+            .astype(np.int32)
+        )
+
+    def guardar(self, ruta):
+        # Con un archivo abierto np.savez no agrega la extensión .npz
+        with open(ruta, "wb") as archivo:
+            np.savez(
+                archivo, **{nombre: getattr(self, nombre) for nombre in self.ARREGLOS}
+            )
+
+    @classmethod
+    def leer(cls, ruta):
+        indice = cls()
+        with np.load(ruta) as archivo:
+            for nombre in cls.ARREGLOS:
+                setattr(indice, nombre, archivo[nombre])
+        return indice
+
+    @property
+    def totales(self) -> np.ndarray:
+        return self.por_hora.sum(axis=1)
+
+    def _candidatos(self, lat_min, lon_min, lat_max, lon_max) -> np.ndarray:
+        """Filas de las celdas que tocan la caja"""
+        fila_min, columna_min = fila_columna(lat_min, lon_min)
+        fila_max, columna_max = fila_columna(lat_max, lon_max)
+        filas = np.arange(fila_min, fila_max + 1) * COLUMNAS_REJILLA
+        desde = np.searchsorted(self.celdas, filas + columna_min)
+        hasta = np.searchsorted(self.celdas, filas + columna_max, side="right")
+        inicio, fin = self.inicios[desde], self.inicios[hasta]
+        # Rangos [inicio, fin) de cada fila de la rejilla concatenados sin ciclo
+        largos = fin - inicio
+        total = largos.sum()
+        desplazamiento = np.repeat(inicio - np.cumsum(largos) + largos, largos)
+        return np.arange(total) + desplazamiento
+
+    def _en_fechas(self, filas, desde, hasta):
+        mascara = np.ones(len(filas), dtype=bool)
+        if desde is not None:
+            mascara &= self.fecha[filas] >= np.datetime64(desde, "D")
+        if hasta is not None:
+            mascara &= self.fecha[filas] <= np.datetime64(hasta, "D")
+        return filas[mascara]
+
+    def en_caja(self, lat_min, lon_min, lat_max, lon_max, desde=None, hasta=None):
+        """Filas del índice dentro de la caja y del rango de fechas (inclusivo)"""
+        filas = self._en_fechas(
+            self._candidatos(lat_min, lon_min, lat_max, lon_max), desde, hasta
+        )
+        latitud, longitud = self.latitud[filas], self.longitud[filas]
+        return filas[
+            (latitud >= lat_min)
+            & (latitud <= lat_max)
+            & (longitud >= lon_min)
+            & (longitud <= lon_max)
+        ]
+
+    def en_radio(self, latitud, longitud, metros, desde=None, hasta=None):
+        """Filas del índice a `metros` o menos del punto, ordenadas por distancia"""
+        filas = self._en_fechas(
+            self._candidatos(*caja_de_radio(latitud, longitud, metros)), desde, hasta
+        )
+        distancia = haversine(
+            latitud, longitud, self.latitud[filas], self.longitud[filas]
+        )
+        cerca = distancia <= metros
+        orden = np.argsort(distancia[cerca], kind="stable")
+        return filas[cerca][orden]
+
+    def filas(self, posiciones) -> pd.DataFrame:
+        """Accidentes del índice como tabla"""
+        return pd.DataFrame(
+            {
+                "Celda": np.repeat(self.celdas, np.diff(self.inicios))[posiciones],
+                "Fecha": self.fecha[posiciones].astype("datetime64[ns]"),
+                "Hora_num": self.hora[posiciones],
+                "Dia_num": self.dia[posiciones],
+                "Tipo_simplificado": np.where(
+                    self.tipo[posiciones] >= 0,
+                    self.tipos[np.maximum(self.tipo[posiciones], 0)],
+                    None,
+                ),
+                "Latitud": self.latitud[posiciones],
+                "Longitud": self.longitud[posiciones],
+            }
+        )
+
+    def densidad(self, ancho_banda: float = 300, caja=CAJA_MONTERREY):
+        """Superficie de densidad por kernel gaussiano sobre la rejilla.
+
+        Los conteos por celda se suavizan con un filtro gaussiano de desviación
+        `ancho_banda` metros, que es la KDE de los accidentes evaluada en el
+        centro de cada celda. Solo entran las celdas dentro de `caja`: unas
+        cuantas coordenadas invertidas bastarían para que la rejilla densa
+        ocupara cientos de GiB. Regresa accidentes por km², las celdas de la
+        superficie y su extensión (lon_min, lon_max, lat_min, lat_max).
+        """
+        dentro = en_caja(*centro(self.celdas), caja)
+        if not dentro.any():
+            raise ValueError(f"Ningún accidente dentro de la zona {caja}")
+        filas, columnas = separar(self.celdas[dentro])
+        margen = int(np.ceil(3 * ancho_banda / TAMANO_CELDA))
+        fila_0, columna_0 = filas.min() - margen, columnas.min() - margen
+        alto = filas.max() + margen + 1 - fila_0
+        ancho = columnas.max() + margen + 1 - columna_0
+        conteos = np.zeros((alto, ancho))
+        conteos[filas - fila_0, columnas - columna_0] = self.totales[dentro]
+        superficie = gaussian_filter(
+            conteos, sigma=ancho_banda / TAMANO_CELDA, mode="constant"
+        ) / ((TAMANO_CELDA / 1000) ** 2)
+
+        todas = (np.arange(alto) + fila_0)[:, None] * COLUMNAS_REJILLA + (
+            np.arange(ancho) + columna_0
+        )
+        lat_min, lon_min = centro(todas[0, 0])
+        extension = (
+            lon_min - GRADOS_LON / 2,
+            lon_min + (ancho - 0.5) * GRADOS_LON,
+            lat_min - GRADOS_LAT / 2,
+            lat_min + (alto - 0.5) * GRADOS_LAT,
+        )
+        return superficie, todas, extension
+
+    @medido("prediccion")
+    def hotspots(
+        self, n: int = 10, ancho_banda: float = 300, caja=CAJA_MONTERREY
+    ) -> pd.DataFrame:
+        """Máximos locales de la densidad, de mayor a menor.
+
+        Solo cuenta una celda si es el máximo en la ventana de un ancho de
+        banda, para que un mismo hotspot no ocupe varios lugares del top. Trae
+        también los accidentes a un ancho de banda del centro de la celda.
+        """
+        superficie, todas, _ = self.densidad(ancho_banda, caja)
+        ventana = 2 * int(np.ceil(ancho_banda / TAMANO_CELDA)) + 1
+        maximos = (superficie == maximum_filter(superficie, ventana)) & (superficie > 0)
+        mejores = np.argsort(-superficie[maximos], kind="stable")[:n]
+        ids = todas[maximos][mejores]
+        latitud, longitud = centro(ids)
+        return pd.DataFrame(
+            {
+                "Celda": ids,
+                "Latitud": latitud,
+                "Longitud": longitud,
+                "Densidad_km2": superficie[maximos][mejores],
+                f"Accidentes_{ancho_banda:g}m": [
+                    len(self.en_radio(lat, lon, ancho_banda))
+                    for lat, lon in zip(latitud, longitud)
+                ],
+            }
+        )
+
+
+def _leer_columnas(ruta: str) -> pd.DataFrame:
+    disponibles = pq.read_schema(next(Path(ruta).glob("*.parquet"))).names
+    df = pd.read_parquet(ruta, columns=[c for c in COLUMNAS if c in disponibles])
+    if "Celda" not in df.columns:
+        # Parquet anterior a la columna Celda
+        df["Celda"] = celda(df["Latitud"], df["Longitud"])
+    return df
+
+
+@medido("carga")
+def cargar_indice(ruta: str = RUTA_PARQUET) -> IndiceEspacial:
+    """Índice del dataset actual; se construye una vez por huella del parquet"""
+    for intento in range(2):
+        clave = huella(ruta)
+        vigente, indice = _indices.get(ruta, (None, None))
+        if vigente == clave:
+            return indice
+        ruta_indice = Path(DIR_CACHE) / f"espacial-{clave}.npz"
+        if not ruta_indice.exists():
+            indice = IndiceEspacial().construir(_leer_columnas(ruta))
+            escribir_atomico(ruta_indice, indice.guardar)
+            borrar_anteriores(ruta_indice, "espacial-*.npz")
+        try:
+            _indices[ruta] = (clave, IndiceEspacial.leer(ruta_indice))
+            return _indices[ruta][1]
+        except FileNotFoundError:
+            # Una ingesta más nueva reemplazó el índice entre la huella y la
+            # lectura: se reintenta una vez con la huella nueva
+            if intento:
+                raise
@@ -0,0 +1,51 @@
+import shutil
+from pathlib import Path
+
+import pandas as pd
+
+RUTA_PARQUET = "csv/accidentes_viales_mty.parquet"
+
+CATEGORICAS = [
+    "Dia",
+    "Tipo_de_accidente",
+    "Nombre_de_asentamiento",
+    "Tipo_simplificado",
+]
+ENTERAS = ["Hora_num", "Dia_num", "Mes_num", "es_fin_semana", "colonia_alto_riesgo"]
+# Ids de la rejilla espacial (accidentes.rejilla), no caben en int8
+IDENTIFICADORES = ["Celda"]
+FLOTANTES = ["Latitud", "Longitud"]
+
+
+def aplicar_esquema(df: pd.DataFrame) -> pd.DataFrame:
+    """Convierte las columnas a los tipos fijos del archivo columnar"""
+    df = df.copy()
+    for columna in df.columns:
+        if columna == "Fecha":
+            df[columna] = pd.to_datetime(df[columna]).astype("datetime64[ns]")
+        elif columna in CATEGORICAS:
+            df[columna] = df[columna].astype("category")
+        elif columna in ENTERAS:
+            df[columna] = df[columna].astype("int8")
+        elif columna in IDENTIFICADORES:
+            df[columna] = df[columna].astype("int64")
+        elif columna in FLOTANTES:
+            df[columna] = df[columna].astype("float32")
+        else:
+            # Folio, Hora, Resolucion, etc. se guardan como texto para que todas
+            # las partes tengan el mismo esquema sin importar lo que infiera read_csv
+            df[columna] = df[columna].astype(str)
+    return df
+
+
+def limpiar_parquet(ruta: str = RUTA_PARQUET):
+    shutil.rmtree(ruta, ignore_errors=True)
+    Path(ruta).mkdir(parents=True)
+
+
+def escribir_parte(df: pd.DataFrame, ruta: str = RUTA_PARQUET):
+    """Agrega `df` como un archivo más dentro del directorio parquet"""
+    numero = len(list(Path(ruta).glob("parte-*.parquet")))
+    aplicar_esquema(df).to_parquet(
+        Path(ruta) / f"parte-{numero:05d}.parquet", index=False
+    )
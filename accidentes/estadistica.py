@@ -0,0 +1,237 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from accidentes.agregacion import codificar
+from accidentes.constantes import DIAS_ORDEN, MES_ORDEN
+from accidentes.instrumentacion import medido
+
+# nombre del factor -> columna del cubo (Mes sale de Fecha)
+FACTORES = {
+    "Dia": "Dia_num",
+    "Hora": "Hora_num",
+    "Mes": "Fecha",
+    "Tipo": "Tipo_simplificado",
+    "Resolucion": "Resolucion",
+    "Colonia": "Nombre_de_asentamiento",
+}
+
+# Factores con una exposición esperada conocida (ver `exposicion`)
+FACTORES_TIEMPO = ["Dia", "Hora", "Mes"]
+
+# Categorías que se conservan por factor; las demás se juntan en una sola. El
+# costo del p por permutación crece con las celdas de la tabla y las colonias
+# con pocos accidentes casi no aportan a la chi-cuadrada
+MAX_CATEGORIAS = 30
+
+
+def codificar_factor(cubo: pd.DataFrame, factor: str):
+    """Códigos por fila del cubo y etiquetas de un factor de FACTORES"""
+    columna = cubo[FACTORES[factor]]
+    if factor == "Dia":
+        return columna.to_numpy(np.int64), pd.Index(DIAS_ORDEN)
+    if factor == "Hora":
+        return columna.to_numpy(np.int64), pd.RangeIndex(24)
+    if factor == "Mes":
+        return columna.dt.month.to_numpy(np.int64) - 1, pd.Index(MES_ORDEN)
+    return codificar(columna)
+
+
+def agrupar_raras(codigos, n, pesos, maximo: int = MAX_CATEGORIAS):
+    """Conserva las `maximo` categorías con más accidentes y junta el resto"""
+    if n <= maximo + 1:
+        return codigos, n
+    validos = codigos >= 0
+    totales = np.bincount(codigos[validos], pesos[validos], n)
+    nuevos = np.full(n, maximo)
+    nuevos[np.argsort(-totales, kind="stable")[:maximo]] = np.arange(maximo)
+    return np.where(validos, nuevos[codigos], -1), maximo + 1
+
+
+def tabla_contingencia(a, n_a, b, n_b, pesos) -> np.ndarray:
+    """Conteos (n_a x n_b) con un bincount sobre los códigos de las dos variables"""
+    validos = (a >= 0) & (b >= 0)
+    return (
+        np.bincount(
+            a[validos] * n_b + b[validos], weights=pesos[validos], minlength=n_a * n_b
+        )
+        .reshape(n_a, n_b)
+        .astype(np.int64)
+    )
+
+
+def _sin_vacios(tabla):
+    return tabla[tabla.sum(axis=1) > 0][:, tabla.sum(axis=0) > 0]
+
+
+def chi2(tabla: np.ndarray):
+    """Chi-cuadrada de independencia: estadístico, grados de libertad, p asintótico"""
+    tabla = _sin_vacios(tabla)
+    esperados = np.outer(tabla.sum(axis=1), tabla.sum(axis=0)) / tabla.sum()
+    estadistico = ((tabla - esperados) ** 2 / esperados).sum()
+    gl = (tabla.shape[0] - 1) * (tabla.shape[1] - 1)
+    return estadistico, gl, stats.chi2.sf(estadistico, gl)
+
+
+def p_permutacion_independencia(
+    tabla: np.ndarray, n_permutaciones: int = 10_000, semilla: int = 42
+) -> float:
+    """p de Monte Carlo de la chi-cuadrada con los márgenes fijos.
+
+    Permutar una variable contra la otra equivale a sortear tablas con los
+    mismos totales por fila y columna. Cada fila se reparte entre las columnas
+    con hipergeométricas sucesivas, todas las permutaciones a la vez; el ciclo
+    es por celda, no por permutación, así que el costo no depende del número
+    de accidentes.
+    """
+    tabla = _sin_vacios(tabla)
+    # Las filas con muchas categorías y pocos accidentes terminan antes
+    if tabla.shape[0] < tabla.shape[1]:
+        tabla = tabla.T
+    filas, columnas = tabla.sum(axis=1), tabla.sum(axis=0)
+    esperados = np.outer(filas, columnas) / tabla.sum()
+    observado = ((tabla - esperados) ** 2 / esperados).sum()
+
+    generador = np.random.default_rng(semilla)
+    restantes = np.tile(columnas, (n_permutaciones, 1))
+    simulados = np.zeros(n_permutaciones)
+    for i, total_fila in enumerate(filas[:-1]):
+        por_asignar = np.full(n_permutaciones, total_fila)
+        resto = restantes.sum(axis=1)
+        for j in range(len(columnas)):
+            if j == len(columnas) - 1:
+                celda = por_asignar
+            else:
+                resto -= restantes[:, j]
+                celda = generador.hypergeometric(restantes[:, j], resto, por_asignar)
+            simulados += (celda - esperados[i, j]) ** 2 / esperados[i, j]
+            restantes[:, j] -= celda
+            por_asignar = por_asignar - celda
+            if not por_asignar.any():
+                # El resto de la fila es cero en todas las permutaciones
+                simulados += esperados[i, j + 1 :].sum()
+                break
+    # La última fila se queda con lo que sobra de cada columna
+    simulados += ((restantes - esperados[-1]) ** 2 / esperados[-1]).sum(axis=1)
+    return (1 + np.count_nonzero(simulados >= observado * (1 - 1e-9))) / (
+        n_permutaciones + 1
+    )
+
+
+def bondad_ajuste(conteos, proporciones, n_permutaciones=10_000, semilla=42):
+    """Chi-cuadrada contra `proporciones`: estadístico, gl, p asintótico y p de
+    Monte Carlo con todas las muestras multinomiales en un solo arreglo"""
+    conteos = np.asarray(conteos)
+    proporciones = np.asarray(proporciones, dtype=np.float64)
+    proporciones = proporciones / proporciones.sum()
+    esperados = conteos.sum() * proporciones
+    estadistico = ((conteos - esperados) ** 2 / esperados).sum()
+    gl = len(conteos) - 1
+
+    generador = np.random.default_rng(semilla)
+    muestras = generador.multinomial(conteos.sum(), proporciones, n_permutaciones)
+    simulados = ((muestras - esperados) ** 2 / esperados).sum(axis=1)
+    p_mc = (1 + np.count_nonzero(simulados >= estadistico * (1 - 1e-9))) / (
+        n_permutaciones + 1
+    )
+    return estadistico, gl, stats.chi2.sf(estadistico, gl), p_mc
+
+
+def exposicion(cubo: pd.DataFrame, factor: str) -> np.ndarray:
+    """Proporciones esperadas si el factor no influyera.
+
+    Dia y Mes se comparan contra los días del calendario en el periodo (no
+    todos los meses ni días de la semana aparecen igual número de veces);
+    Hora contra una distribución uniforme.
+    """
+    calendario = pd.date_range(cubo["Fecha"].min(), cubo["Fecha"].max(), freq="D")
+    if factor == "Dia":
+        return np.bincount(calendario.dayofweek, minlength=7)
+    if factor == "Mes":
+        return np.bincount(calendario.month - 1, minlength=12)
+    if factor == "Hora":
+        return np.ones(24)
+    raise ValueError(f"Sin exposición para {factor} (opciones: {FACTORES_TIEMPO})")
+
+
+def corregir(p, metodo: str = "holm") -> np.ndarray:
+    """p ajustados por comparaciones múltiples (holm o bh, Benjamini-Hochberg)"""
+    p = np.asarray(p, dtype=np.float64)
+    m = len(p)
+    orden = np.argsort(p)
+    if metodo == "holm":
+        ajustados = np.maximum.accumulate((m - np.arange(m)) * p[orden])
+    elif metodo == "bh":
+        ajustados = np.minimum.accumulate((m / np.arange(m, 0, -1) * p[orden][::-1]))[
+            ::-1
+        ]
+    else:
+        raise ValueError(f"Método desconocido: {metodo} (opciones: holm, bh)")
+    resultado = np.empty(m)
+    resultado[orden] = np.minimum(ajustados, 1)
+    return resultado
+
+
+@medido("ajuste", filas_de=0)
+def bateria(
+    cubo: pd.DataFrame,
+    factores=None,
+    n_permutaciones: int = 10_000,
+    semilla: int = 42,
+) -> pd.DataFrame:
+    """Bondad de ajuste de los factores de tiempo e independencia de cada par.
+
+    Todas las tablas salen de los conteos del cubo, con las categorías raras
+    agrupadas (MAX_CATEGORIAS). Cada prueba trae su p
+    asintótico y el de Monte Carlo; los ajustes de Holm y BH se aplican sobre
+    los p de Monte Carlo de toda la batería. Para independencia se agrega la V
+    de Cramér como tamaño del efecto.
+    """
+    factores = factores or list(FACTORES)
+    pesos = cubo["Total"].to_numpy(np.float64)
+    codigos = {}
+    for factor in factores:
+        valores, etiquetas = codificar_factor(cubo, factor)
+        codigos[factor] = agrupar_raras(valores, len(etiquetas), pesos)
+
+    filas = []
+    for factor in [f for f in factores if f in FACTORES_TIEMPO]:
+        valores, n = codigos[factor]
+        conteos = np.bincount(valores[valores >= 0], pesos[valores >= 0], n)
+        estadistico, gl, p, p_mc = bondad_ajuste(
+            conteos, exposicion(cubo, factor), n_permutaciones, semilla
+        )
+        filas.append(
+            {
+                "prueba": "bondad de ajuste",
+                "factores": factor,
+                "chi2": estadistico,
+                "gl": gl,
+                "p_asintotico": p,
+                "p_permutacion": p_mc,
+            }
+        )
+    for a, b in combinations(factores, 2):
+        tabla = tabla_contingencia(*codigos[a], *codigos[b], pesos)
+        estadistico, gl, p = chi2(tabla)
+        minimo = min(_sin_vacios(tabla).shape) - 1
+        filas.append(
+            {
+                "prueba": "independencia",
+                "factores": f"{a} x {b}",
+                "chi2": estadistico,
+                "gl": gl,
+                "p_asintotico": p,
+                "p_permutacion": p_permutacion_independencia(
+                    tabla, n_permutaciones, semilla
+                ),
+                "V_cramer": np.sqrt(estadistico / (tabla.sum() * max(minimo, 1))),
+            }
+        )
+
+    resultado = pd.DataFrame(filas)
+    resultado["p_holm"] = corregir(resultado["p_permutacion"], "holm")
+    resultado["p_bh"] = corregir(resultado["p_permutacion"], "bh")
+    return resultado
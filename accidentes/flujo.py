@@ -0,0 +1,379 @@
+"""Corre las etapas p1-p9 en orden de dependencias, en paralelo y con caché.
+
+python -m accidentes.flujo              # todo lo que cambió
+python -m accidentes.flujo p3 p8        # esas etapas y lo que necesitan
+python -m accidentes.flujo --descargar  # también p1 (modo incremental)
+python -m accidentes.flujo --forzar --perfil tiempos,memoria  # con reporte
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple
+
+from accidentes.carga import DIR_CACHE
+from accidentes.constantes import RUTA_CSV
+from accidentes.cubo import RUTA_CUBO
+from accidentes.esquema import RUTA_PARQUET
+from accidentes.instrumentacion import DIR_PERFILES
+
+RAIZ = Path(__file__).resolve().parents[1]
+RUTA_ESTADO = Path(DIR_CACHE) / "flujo.json"
+DIR_LOGS = Path(DIR_CACHE) / "flujo"
+
+MARCAS_CALIDAD = "csv/calidad_marcas.csv"
+
+
+class Etapa(NamedTuple):
+    script: str
+    entradas: tuple = ()
+    salidas: tuple = ()
+    depende: tuple = ()
+    argumentos: tuple = ()
+
+
+DATOS = (RUTA_CSV, RUTA_PARQUET, RUTA_CUBO)
+
+ETAPAS = {
+    "p1": Etapa("p1/dataAdquisition.py", salidas=DATOS, argumentos=("--incremental",)),
+    # Los cachés de csv/.cache que leen calidad, p6, p7 y hotspots
+    "preparar": Etapa("p1/preparar.py", (RUTA_PARQUET,), depende=("p1",)),
+    "calidad": Etapa(
+        "p1/calidad.py",
+        entradas=(RUTA_PARQUET,),
+        salidas=("csv/calidad_reporte.json", MARCAS_CALIDAD),
+        depende=("preparar",),
+    ),
+    "p2": Etapa("p2/descriptiveStatistics.py", (RUTA_CUBO,), depende=("p1",)),
+    "p3": Etapa(
+        "p3/dataVisualization.py",
+        (RUTA_CUBO,),
+        (
+            "distribucion_tipos_accidentes.png",
+            "patron_accidentes_hora.png",
+            "accidentes_por_dia.png",
+            "top_colonias_heatmap.png",
+            "top5_tipos_pie.png",
+        ),
+        depende=("p1",),
+    ),
+    "p4": Etapa(
+        "p4/statisticTest.py",
+        (RUTA_CUBO,),
+        (
+            "accidentes_por_dia_chi2.png",
+            "horario_de_accidentes.png",
+            "tipos_accidentes_semana.png",
+            "accidentes_dias_laborales.png",
+            "csv/pruebas_estadisticas.csv",
+        ),
+        depende=("p1",),
+    ),
+    "p6": Etapa("p6/knn.py", (RUTA_PARQUET,), ("modelos/knn.joblib",), ("preparar",)),
+    "p7": Etapa(
+        "p7/k-means.py",
+        (RUTA_PARQUET, MARCAS_CALIDAD),
+        ("clusters.png",),
+        ("preparar", "calidad"),
+    ),
+    "hotspots": Etapa(
+        "p7/hotspots.py", (RUTA_PARQUET,), ("hotspots.png",), ("preparar",)
+    ),
+    "p8": Etapa(
+        "p8/linearRegression.py",
+        (RUTA_CUBO,),
+        ("pronostico_accidentes.png",),
+        ("p1",),
+    ),
+    "p9": Etapa(
+        "p9/cloud.py",
+        (RUTA_CUBO,),
+        ("palabras_frecuentes_accidentes.png", "tipos_accidentes_frecuentes.png"),
+        ("p1",),
+    ),
+}
+
+
+def dependencias(etapas: dict) -> dict:
+    """Dependencias declaradas más un orden fijo entre etapas que escriben el
+    mismo archivo, para que no corran a la vez"""
+    resultado = {nombre: set(etapa.depende) for nombre, etapa in etapas.items()}
+    nombres = list(etapas)
+    for i, anterior in enumerate(nombres):
+        for siguiente in nombres[i + 1 :]:
+            if set(etapas[anterior].salidas) & set(etapas[siguiente].salidas):
+                resultado[siguiente].add(anterior)
+    return resultado
+
+
+def con_prerrequisitos(pedidas, grafo: dict) -> list:
+    """Las etapas pedidas y todas las que necesitan, en el orden de ETAPAS"""
+    incluidas, pendientes = set(), list(pedidas)
+    while pendientes:
+        nombre = pendientes.pop()
+        if nombre not in incluidas:
+            incluidas.add(nombre)
+            pendientes.extend(grafo[nombre])
+    return [nombre for nombre in grafo if nombre in incluidas]
+
+
+def modulos(script: Path) -> list:
+    """El script y los módulos de accidentes que importa, directa o indirectamente"""
+    vistos, pendientes = set(), [script]
+    while pendientes:
+        ruta = pendientes.pop()
+        if ruta in vistos or not ruta.exists():
+            continue
+        vistos.add(ruta)
+        for nodo in ast.walk(ast.parse(ruta.read_text(encoding="utf-8"))):
+            if isinstance(nodo, ast.ImportFrom) and nodo.module:
+                nombres = [nodo.module] + [
+                    f"{nodo.module}.{alias.name}" for alias in nodo.names
+                ]
+            elif isinstance(nodo, ast.Import):
+                nombres = [alias.name for alias in nodo.names]
+            else:
+                continue
+            for nombre in nombres:
+                if nombre.startswith("accidentes."):
+                    pendientes.append(RAIZ / (nombre.replace(".", "/") + ".py"))
+    return sorted(vistos)
+
+
+class Huellas:
+    """Hash del contenido de archivos y directorios.
+
+    El hash de cada archivo se recuerda junto a su tamaño y fecha de
+    modificación, así que solo se vuelve a leer un archivo que cambió.
+    """
+
+    def __init__(self, conocidas: dict = None):
+        self.conocidas = dict(conocidas or {})
+        self._candado = threading.Lock()
+
+    def _archivo(self, ruta: Path) -> str:
+        info = ruta.stat()
+        firma = f"{info.st_size}:{info.st_mtime_ns}"
+        with self._candado:
+            conocida = self.conocidas.get(str(ruta))
+        if conocida and conocida[0] == firma:
+            return conocida[1]
+        resumen = hashlib.sha256()
+        with open(ruta, "rb") as archivo:
+            for bloque in iter(lambda: archivo.read(1 << 20), b""):
+                resumen.update(bloque)
+        with self._candado:
+            self.conocidas[str(ruta)] = (firma, resumen.hexdigest())
+        return resumen.hexdigest()
+
+    def de(self, ruta) -> str:
+        ruta = Path(ruta)
+        if ruta.is_dir():
+            resumen = hashlib.sha256()
+            for parte in sorted(p for p in ruta.rglob("*") if p.is_file()):
+                resumen.update(
+                    f"{parte.relative_to(ruta)}:{self._archivo(parte)}".encode()
+                )
+            return resumen.hexdigest()
+        if ruta.exists():
+            return self._archivo(ruta)
+        return "sin archivo"
+
+
+def clave(etapa: Etapa, huellas: Huellas) -> str:
+    """Código de la etapa (script y módulos importados), entradas y argumentos"""
+    resumen = hashlib.sha256(json.dumps(etapa.argumentos).encode())
+    for ruta in modulos(RAIZ / etapa.script):
+        resumen.update(f"{ruta.relative_to(RAIZ)}:{huellas.de(ruta)}".encode())
+    for entrada in etapa.entradas:
+        resumen.update(f"{entrada}:{huellas.de(entrada)}".encode())
+    return resumen.hexdigest()[:24]
+
+
+def leer_estado(ruta: Path = RUTA_ESTADO) -> dict:
+    try:
+        return json.loads(ruta.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {"etapas": {}, "huellas": {}}
+
+
+def guardar_estado(estado: dict, ruta: Path = RUTA_ESTADO):
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    temporal = ruta.with_suffix(".tmp")
+    temporal.write_text(json.dumps(estado, indent=2), encoding="utf-8")
+    temporal.replace(ruta)
+
+
+def ejecutar(nombre: str, etapa: Etapa) -> tuple:
+    """Corre el script en su propio proceso; la salida queda en DIR_LOGS"""
+    DIR_LOGS.mkdir(parents=True, exist_ok=True)
+    inicio = time.perf_counter()
+    with open(DIR_LOGS / f"{nombre}.log", "w", encoding="utf-8") as log:
+        proceso = subprocess.run(
+            [sys.executable, str(RAIZ / etapa.script), *etapa.argumentos],
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            env={**os.environ, "MPLBACKEND": "Agg"},
+        )
+    return proceso.returncode, time.perf_counter() - inicio
+
+
+def correr(
+    pedidas=None,
+    forzar: bool = False,
+    descargar: bool = False,
+    procesos: int = None,
+    etapas: dict = ETAPAS,
+) -> dict:
+    """Corre las etapas pedidas (todas por omisión) y sus prerrequisitos.
+
+    Una etapa se lanza en cuanto terminan sus dependencias y se salta si su
+    clave (código + entradas) es la misma de su última corrida exitosa y sus
+    salidas existen. p1 descarga datos, así que solo corre con `descargar` o si
+    faltan sus salidas. Regresa el resultado de cada etapa.
+    """
+    grafo = dependencias(etapas)
+    seleccion = con_prerrequisitos(pedidas or list(etapas), grafo)
+    estado = leer_estado()
+    huellas = Huellas(estado.get("huellas"))
+    resultados = {}
+
+    def decidir(nombre):
+        etapa = etapas[nombre]
+        if any(
+            resultados.get(d, ("",))[0] in ("falló", "omitida") for d in grafo[nombre]
+        ):
+            return "omitida", None
+        faltan = not all(Path(salida).exists() for salida in etapa.salidas)
+        if nombre == "p1":
+            return ("correr" if descargar or faltan or forzar else "sin cambios"), None
+        actual = clave(etapa, huellas)
+        anterior = estado["etapas"].get(nombre, {}).get("clave")
+        if forzar or faltan or actual != anterior:
+            return "correr", actual
+        return "sin cambios", actual
+
+    pendientes = list(seleccion)
+    corriendo = {}
+    with ThreadPoolExecutor(max_workers=procesos or os.cpu_count()) as pool:
+        while pendientes or corriendo:
+            for nombre in [
+                n
+                for n in pendientes
+                if grafo[n].isdisjoint(pendientes + list(corriendo.values()))
+            ]:
+                pendientes.remove(nombre)
+                accion, _ = decidir(nombre)
+                if accion == "correr":
+                    print(f"{nombre}: corriendo {etapas[nombre].script}")
+                    corriendo[pool.submit(ejecutar, nombre, etapas[nombre])] = nombre
+                else:
+                    resultados[nombre] = (accion, 0.0)
+                    print(f"{nombre}: {accion}")
+            if not corriendo:
+                continue
+            hechos, _ = wait(corriendo, return_when=FIRST_COMPLETED)
+            for futuro in hechos:
+                nombre = corriendo.pop(futuro)
+                codigo, segundos = futuro.result()
+                if codigo == 0:
+                    resultados[nombre] = ("corrida", segundos)
+                    # La clave se calcula después de correr: las entradas de p1
+                    # no existen antes y el código pudo cambiar mientras corría
+                    estado["etapas"][nombre] = {
+                        "clave": clave(etapas[nombre], huellas),
+                        "terminada": datetime.now().isoformat(timespec="seconds"),
+                        "segundos": round(segundos, 2),
+                    }
+                    estado["huellas"] = huellas.conocidas
+                    guardar_estado(estado)
+                    print(f"{nombre}: terminada en {segundos:.1f} s")
+                else:
+                    resultados[nombre] = ("falló", segundos)
+                    print(
+                        f"{nombre}: falló con código {codigo} "
+                        f"(ver {DIR_LOGS / f'{nombre}.log'})"
+                    )
+    estado["huellas"] = huellas.conocidas
+    guardar_estado(estado)
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Corre las etapas del análisis en orden de dependencias, en paralelo y con caché."
+    )
+    parser.add_argument(
+        "etapas",
+        nargs="*",
+        metavar="ETAPA",
+        help=f"Etapas a correr con sus prerrequisitos (opciones: {', '.join(ETAPAS)})",
+    )
+    parser.add_argument(
+        "--forzar", action="store_true", help="Correr aunque no haya cambios"
+    )
+    parser.add_argument(
+        "--descargar",
+        action="store_true",
+        help="Correr p1 para traer los registros nuevos del portal",
+    )
+    parser.add_argument(
+        "--procesos", type=int, default=None, help="(default: todos los núcleos)"
+    )
+    parser.add_argument(
+        "--lista", action="store_true", help="Mostrar las etapas y sus dependencias"
+    )
+    parser.add_argument(
+        "--perfil",
+        metavar="MODOS",
+        help=(
+            "Instrumentar las etapas que corran (tiempos, memoria, cprofile "
+            "separados por comas); el reporte queda en "
+            f"{DIR_PERFILES}/<corrida>. Las etapas sin cambios no se miden, "
+            "usar con --forzar para medir todas"
+        ),
+    )
+    args = parser.parse_args()
+    desconocidas = set(args.etapas) - set(ETAPAS)
+    if desconocidas:
+        parser.error(f"Etapas desconocidas: {', '.join(sorted(desconocidas))}")
+
+    if args.lista:
+        for nombre, previas in dependencias(ETAPAS).items():
+            print(
+                f"{nombre:10} {ETAPAS[nombre].script:30} <- {', '.join(sorted(previas)) or '-'}"
+            )
+        return
+
+    if args.perfil:
+        # Las etapas heredan el entorno y escriben en la misma corrida
+        corrida = datetime.now().strftime("%Y%m%d-%H%M%S")
+        os.environ["ACCIDENTES_PERFIL"] = args.perfil
+        os.environ["ACCIDENTES_CORRIDA"] = corrida
+
+    inicio = time.perf_counter()
+    resultados = correr(args.etapas, args.forzar, args.descargar, args.procesos)
+    corridas = [n for n, (accion, _) in resultados.items() if accion == "corrida"]
+    fallidas = [n for n, (accion, _) in resultados.items() if accion == "falló"]
+    print(
+        f"\nEtapas corridas: {len(corridas)}, sin cambios: "
+        f"{sum(accion == 'sin cambios' for accion, _ in resultados.values())}, "
+        f"fallidas: {len(fallidas)} ({time.perf_counter() - inicio:.1f} s)"
+    )
+    if args.perfil:
+        print(f"Reporte de instrumentación en {Path(DIR_PERFILES) / corrida}")
+    if fallidas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
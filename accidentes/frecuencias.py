@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+
+from accidentes.agregacion import codificar
+from accidentes.caracteristicas import diccionario
+
+STOPWORDS = {"de", "la", "en", "y", "del", "los", "las", "el", "por", "con"}
+LONGITUD_MINIMA = 4
+
+
+def tokens_por_valor(
+    valores: pd.Series, stopwords=STOPWORDS, longitud_minima=LONGITUD_MINIMA
+):
+    """Pares (posición del valor, token) de cada texto distinto, tokenizado una vez"""
+    posiciones, tokens = [], []
+    for posicion, texto in enumerate(valores):
+        if pd.isna(texto):
+            continue
+        for token in str(texto).lower().split():
+            if token not in stopwords and len(token) >= longitud_minima:
+                posiciones.append(posicion)
+                tokens.append(token)
+    return np.asarray(posiciones, dtype=np.int64), tokens
+
+
+def frecuencias(
+    df: pd.DataFrame,
+    columnas,
+    por: str = None,
+    pesos: str = None,
+    stopwords=STOPWORDS,
+    longitud_minima: int = LONGITUD_MINIMA,
+):
+    """Frecuencia de cada token en el texto de `columnas`.
+
+    Cada columna se codifica por valor distinto, los valores distintos se
+    tokenizan una sola vez y la frecuencia de un token es la suma de las
+    frecuencias de los valores que lo contienen (una multiplicación dispersa
+    valores x tokens). `pesos` es la columna de conteos si `df` es el cubo.
+    Sin `por` regresa una Series token -> frecuencia; con `por` una tabla
+    (valor de `por` x token) para nubes por faceta.
+    """
+    if por is None:
+        facetas, etiquetas = np.zeros(len(df), dtype=np.int64), pd.Index(["Total"])
+    else:
+        facetas, etiquetas = codificar(df[por])
+    validas = facetas >= 0
+    peso = np.ones(len(df)) if pesos is None else df[pesos].to_numpy(np.float64)
+
+    partes, vocabulario = [], {}
+    for columna in columnas:
+        codigos, valores = diccionario(df[columna])
+        posiciones, tokens = tokens_por_valor(valores, stopwords, longitud_minima)
+        ids = np.array(
+            [vocabulario.setdefault(token, len(vocabulario)) for token in tokens],
+            dtype=np.int64,
+        )
+        # Frecuencia de cada valor distinto en cada faceta
+        por_valor = coo_matrix(
+            (peso[validas], (facetas[validas], codigos[validas])),
+            shape=(len(etiquetas), len(valores)),
+        ).tocsr()
+        partes.append((por_valor, posiciones, ids, len(valores)))
+
+    total = np.zeros((len(etiquetas), len(vocabulario)))
+    for por_valor, posiciones, ids, n_valores in partes:
+        incidencia = coo_matrix(
+            (np.ones(len(ids)), (posiciones, ids)),
+            shape=(n_valores, len(vocabulario)),
+        ).tocsr()
+        total += (por_valor @ incidencia).toarray()
+
+    tabla = pd.DataFrame(
+        total.round().astype(np.int64),
+        index=etiquetas,
+        columns=pd.Index(list(vocabulario), name="token"),
+    )
+    if por is None:
+        return (
+            tabla.iloc[0]
+            .rename("Frecuencia")
+            .sort_values(ascending=False, kind="stable")
+        )
+    return tabla.rename_axis(por)
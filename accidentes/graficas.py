@@ -0,0 +1,172 @@
+import hashlib
+import inspect
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from accidentes.carga import DIR_CACHE
+from accidentes.instrumentacion import medido
+
+DIR_HUELLAS = Path(DIR_CACHE) / "graficas"
+
+# Resolución (ancho, alto) de la rejilla en modo densidad
+PIXELES_DENSIDAD = (300, 200)
+
+
+class Grafica(NamedTuple):
+    """Un PNG independiente: `dibujar(fig, datos)` llena una Figure nueva.
+
+    matplotlib, seaborn, wordcloud, etc. se importan dentro de `dibujar` (y
+    aquí al renderizar), así que solo se cargan si hay gráficas que regenerar.
+    """
+
+    archivo: str
+    dibujar: Callable
+    datos: object
+    tamano: tuple = None
+    guardar: dict = None
+
+
+def rasterizar(
+    x, y, categorias, n_categorias, pixeles=PIXELES_DENSIDAD, extension=None
+):
+    """Conteos por (categoría, fila, columna) en una rejilla sobre la extensión de x/y.
+
+    Equivale a un histogram2d por categoría pero con un solo bincount; el
+    resultado tiene tamaño fijo sin importar el número de puntos. La fila 0
+    corresponde al y mínimo (usar origin="lower" en imshow). Con `extension` fija
+    se pueden sumar rejillas calculadas por lotes.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    ancho, alto = pixeles
+    if extension is None:
+        extension = (x.min(), x.max(), y.min(), y.max())
+    columna = _celda(x, extension[0], extension[1], ancho)
+    fila = _celda(y, extension[2], extension[3], alto)
+    conteos = np.bincount(
+        (np.asarray(categorias, dtype=np.int64) * alto + fila) * ancho + columna,
+        minlength=n_categorias * alto * ancho,
+    ).reshape(n_categorias, alto, ancho)
+    return conteos, extension
+
+
+def _celda(valores, minimo, maximo, n):
+    escala = n / (maximo - minimo) if maximo > minimo else 0.0
+    return np.minimum(((valores - minimo) * escala).astype(np.int64), n - 1)
+
+
+def imagen_densidad(conteos, cmap, norm):
+    """RGBA con el color de la categoría dominante y opacidad logarítmica en el total"""
+    total = conteos.sum(axis=0)
+    imagen = cmap(norm(conteos.argmax(axis=0)))
+    imagen[..., 3] = np.log1p(total) / np.log1p(max(total.max(), 1))
+    return imagen
+
+
+def _huella_datos(resumen, datos):
+    if isinstance(datos, (pd.DataFrame, pd.Series)):
+        etiquetas = datos.columns if isinstance(datos, pd.DataFrame) else datos.name
+        resumen.update(repr(etiquetas).encode())
+        resumen.update(
+            pd.util.hash_pandas_object(datos, index=True).to_numpy().tobytes()
+        )
+    elif isinstance(datos, np.ndarray):
+        resumen.update(f"{datos.dtype}{datos.shape}".encode())
+        resumen.update(np.ascontiguousarray(datos).tobytes())
+    elif isinstance(datos, dict):
+        for llave, valor in datos.items():
+            resumen.update(repr(llave).encode())
+            _huella_datos(resumen, valor)
+    elif isinstance(datos, (list, tuple)):
+        for valor in datos:
+            _huella_datos(resumen, valor)
+    else:
+        resumen.update(pickle.dumps(datos))
+
+
+def huella(grafica: Grafica) -> str:
+    """Hash de los datos de entrada, el código que dibuja y las opciones de guardado.
+
+    El código es el módulo completo donde se define `dibujar`, para que también
+    cuenten las funciones auxiliares y constantes que usa.
+    """
+    resumen = hashlib.sha256(grafica.dibujar.__qualname__.encode())
+    try:
+        resumen.update(inspect.getsource(inspect.getmodule(grafica.dibujar)).encode())
+    except (OSError, TypeError):
+        pass
+    resumen.update(repr((grafica.tamano, grafica.guardar)).encode())
+    _huella_datos(resumen, grafica.datos)
+    return resumen.hexdigest()
+
+
+def _ruta_huella(grafica: Grafica) -> Path:
+    """Una huella por ruta completa: dos etapas pueden usar el mismo nombre de PNG"""
+    archivo = Path(grafica.archivo).resolve()
+    ruta = hashlib.sha256(str(archivo).encode()).hexdigest()[:16]
+    return DIR_HUELLAS / f"{archivo.name}-{ruta}.sha256"
+
+
+def _renderizar_una(grafica: Grafica):
+    import matplotlib
+
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=grafica.tamano)
+    try:
+        grafica.dibujar(fig, grafica.datos)
+        fig.savefig(grafica.archivo, **(grafica.guardar or {}))
+    finally:
+        # Sin pyplot nada más guarda referencias a la figura; se limpia explícitamente
+        fig.clear()
+
+
+@medido("graficas")
+def renderizar(graficas, procesos: int = None):
+    """Genera en paralelo las gráficas cuyos datos o código cambiaron.
+
+    Cada gráfica se dibuja en su propia Figure (API orientada a objetos, backend
+    Agg) dentro de un proceso del pool. Las que tienen la misma huella que en la
+    última ejecución y cuyo archivo existe se omiten.
+
+    Las funciones `dibujar` viven en el `__main__` de cada etapa (o en el de
+    mty-accidents cuando corre con runpy), que un proceso nuevo con spawn no
+    puede importar; por eso el pool usa fork y, donde no existe, se dibuja en
+    serie.
+    """
+    DIR_HUELLAS.mkdir(parents=True, exist_ok=True)
+    pendientes = []
+    for grafica in graficas:
+        actual = huella(grafica)
+        ruta = _ruta_huella(grafica)
+        if (
+            Path(grafica.archivo).exists()
+            and ruta.exists()
+            and ruta.read_text() == actual
+        ):
+            continue
+        pendientes.append((grafica, actual))
+
+    procesos = min(procesos or os.cpu_count() or 1, len(pendientes))
+    if procesos <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        for grafica, _ in pendientes:
+            _renderizar_una(grafica)
+    else:
+        contexto = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as pool:
+            list(pool.map(_renderizar_una, [grafica for grafica, _ in pendientes]))
+
+    for grafica, actual in pendientes:
+        _ruta_huella(grafica).write_text(actual)
+    print(
+        f"Gráficas generadas: {len(pendientes)}, "
+        f"sin cambios: {len(graficas) - len(pendientes)}"
+    )
@@ -0,0 +1,292 @@
+import json
+import time
+from pathlib import Path
+
+import pandas as pd
+import requests
+
+from accidentes.caracteristicas import agregar_globales, derivar
+from accidentes.constantes import (
+    CAMPO_FECHA_API,
+    PARAMETROS_EXPORTACION,
+    RUTA_CSV,
+    URL_EXPORTACION,
+    VALORES_INVALIDOS,
+)
+from accidentes.cubo import (
+    cargar_cubo,
+    construir_cubo,
+    cubo_de,
+    guardar_cubo,
+    sumar_cubos,
+)
+from accidentes.esquema import RUTA_PARQUET, escribir_parte, limpiar_parquet
+from accidentes.instrumentacion import medido
+
+RUTA_ESTADO = "csv/.estado_ingesta.json"
+
+
+def ruta_parcial(ruta_salida) -> Path:
+    """Archivo de trabajo junto a la salida, para que replace no cruce discos"""
+    ruta = Path(ruta_salida)
+    return ruta.with_name(f".{ruta.stem}_parcial{ruta.suffix}")
+
+
+def limpiar_columnas(columnas: pd.Index) -> pd.Index:
+    """Quita espacios y acentos de los nombres de columnas"""
+    return (
+        columnas.str.strip()
+        .str.replace(" ", "_")
+        .str.replace("á", "a")
+        .str.replace("é", "e")
+        .str.replace("í", "i")
+        .str.replace("ó", "o")
+        .str.replace("ú", "u")
+    )
+
+
+def iterar_chunks_url(url: str, params=None, chunksize: int = 50_000):
+    """Descarga el csv en streaming y lo entrega en bloques de `chunksize` filas.
+
+    Una ruta local (p. ej. datos de accidentes/sintetico.py) se lee directo.
+    """
+    if not url.startswith(("http://", "https://")):
+        yield from pd.read_csv(url, chunksize=chunksize, encoding="utf-8")
+        return
+    with requests.get(url, params=params, stream=True, timeout=60) as respuesta:
+        respuesta.raise_for_status()
+        respuesta.raw.decode_content = True
+        yield from pd.read_csv(respuesta.raw, chunksize=chunksize, encoding="utf-8")
+
+
+@medido("limpieza")
+def limpiar_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    """Limpieza fila por fila: no depende de los demás bloques"""
+    df = df.drop(columns=["Nota", "Ejercicio"])
+    df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce")
+
+    df = df[~df["Hora"].isin(VALORES_INVALIDOS)].copy()
+    return derivar(df).dropna()
+
+
+def _reportar(etapa: str, filas: int, inicio: float):
+    segundos = time.perf_counter() - inicio
+    print(
+        f"{etapa}: {filas} filas en {segundos:.1f} s ({filas / max(segundos, 1e-9):,.0f} filas/s)"
+    )
+
+
+def _calcular_globales(conteo_colonias: pd.Series, conteo_tipos: pd.Series):
+    top_colonias = conteo_colonias.sort_values(ascending=False).head(10).index
+    tipos_validos = conteo_tipos[conteo_tipos > 300].index
+    return top_colonias, tipos_validos
+
+
+def _actualizar_marca(marca: dict, chunk: pd.DataFrame) -> dict:
+    """Guarda la fecha máxima vista y los folios de ese día"""
+    fecha_max = chunk["Fecha"].max().strftime("%Y-%m-%d")
+    folios = set(chunk.loc[chunk["Fecha"] == fecha_max, "Folio"].astype(str))
+    if marca.get("fecha_max") == fecha_max:
+        folios |= set(marca["folios_fecha_max"])
+    elif marca.get("fecha_max", "") > fecha_max:
+        return marca
+    return {"fecha_max": fecha_max, "folios_fecha_max": sorted(folios)}
+
+
+def leer_estado(ruta: str = RUTA_ESTADO):
+    try:
+        with open(ruta, encoding="utf-8") as archivo:
+            return json.load(archivo)
+    except FileNotFoundError:
+        return None
+
+
+def guardar_estado(estado: dict, ruta: str = RUTA_ESTADO):
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump(estado, archivo, ensure_ascii=False)
+
+
+def _estado(marca, siguiente_indice, conteo_colonias, conteo_tipos) -> dict:
+    return {
+        **marca,
+        "siguiente_indice": int(siguiente_indice),
+        "conteo_colonias": conteo_colonias.astype(int).to_dict(),
+        "conteo_tipos": conteo_tipos.astype(int).to_dict(),
+    }
+
+
+def ingestar(
+    url: str = URL_EXPORTACION,
+    params=PARAMETROS_EXPORTACION,
+    ruta_salida: str = RUTA_CSV,
+    chunksize: int = 50_000,
+    ruta_parquet: str = RUTA_PARQUET,
+):
+    """Descarga, limpia y escribe el csv y el parquet sin tener el historial completo en memoria.
+
+    La primera pasada limpia cada bloque y lo agrega a un archivo parcial mientras
+    acumula los conteos de colonias y tipos. La segunda relee el parcial por bloques
+    y agrega las columnas que dependen de esos conteos globales; cada bloque final
+    se escribe también como una parte del directorio parquet.
+    """
+    Path(ruta_salida).parent.mkdir(parents=True, exist_ok=True)
+    parcial = ruta_parcial(ruta_salida)
+    nulos = None
+    conteo_colonias = pd.Series(dtype="int64")
+    conteo_tipos = pd.Series(dtype="int64")
+    marca = {}
+    filas_crudas = 0
+    filas_limpias = 0
+
+    print("Descargando y limpiando csv por bloques...")
+    inicio = time.perf_counter()
+    primero = True
+    for chunk in iterar_chunks_url(url, params=params, chunksize=chunksize):
+        filas_crudas += len(chunk)
+        chunk.columns = limpiar_columnas(chunk.columns)
+        conteo_nulos = chunk.isnull().sum()
+        nulos = conteo_nulos if nulos is None else nulos + conteo_nulos
+
+        chunk = limpiar_chunk(chunk)
+        if chunk.empty:
+            continue
+        conteo_colonias = conteo_colonias.add(
+            chunk["Nombre_de_asentamiento"].value_counts(), fill_value=0
+        )
+        conteo_tipos = conteo_tipos.add(
+            chunk["Tipo_de_accidente"].value_counts(), fill_value=0
+        )
+        marca = _actualizar_marca(marca, chunk)
+        chunk.to_csv(parcial, mode="w" if primero else "a", header=primero)
+        primero = False
+        filas_limpias += len(chunk)
+    _reportar("Descarga y limpieza", filas_crudas, inicio)
+
+    if primero:
+        raise ValueError("La descarga no contiene filas válidas")
+
+    print(f"Valores nulos por columna: \n{nulos}")
+    print(f"Filas con nulos u hora inválida eliminadas: {filas_crudas - filas_limpias}")
+
+    top_colonias, tipos_validos = _calcular_globales(conteo_colonias, conteo_tipos)
+
+    inicio = time.perf_counter()
+    primero = True
+    limpiar_parquet(ruta_parquet)
+    for chunk in pd.read_csv(parcial, index_col=0, chunksize=chunksize):
+        chunk = agregar_globales(chunk, top_colonias, tipos_validos)
+        chunk.to_csv(ruta_salida, mode="w" if primero else "a", header=primero)
+        escribir_parte(chunk, ruta_parquet)
+        primero = False
+    parcial.unlink()
+    _reportar("Columnas globales", filas_limpias, inicio)
+
+    guardar_estado(_estado(marca, filas_crudas, conteo_colonias, conteo_tipos))
+    guardar_cubo(construir_cubo(ruta_parquet))
+    print(f"Archivos escritos en {ruta_salida} y {ruta_parquet}")
+    return filas_limpias
+
+
+def _reescribir_globales(
+    ruta: str, ruta_parquet: str, top_colonias, tipos_validos, chunksize: int
+):
+    """Recalcula las columnas globales del archivo existente, bloque por bloque"""
+    parcial = ruta_parcial(ruta)
+    primero = True
+    limpiar_parquet(ruta_parquet)
+    for chunk in pd.read_csv(ruta, index_col=0, chunksize=chunksize):
+        chunk = agregar_globales(chunk, top_colonias, tipos_validos)
+        chunk.to_csv(parcial, mode="w" if primero else "a", header=primero)
+        escribir_parte(chunk, ruta_parquet)
+        primero = False
+    parcial.replace(ruta)
+
+
+def actualizar(
+    url: str = URL_EXPORTACION,
+    params=PARAMETROS_EXPORTACION,
+    ruta_salida: str = RUTA_CSV,
+    chunksize: int = 50_000,
+    ruta_parquet: str = RUTA_PARQUET,
+):
+    """Agrega al csv y al parquet existentes solo los registros posteriores a la última ejecución.
+
+    Pide a la API los registros con fecha mayor o igual a la marca guardada y
+    descarta los folios ya procesados de ese día. Si los nuevos registros cambian
+    el top de colonias o los tipos válidos se reescriben las columnas globales del
+    historial; en otro caso solo se agregan filas al final del csv y una parte
+    nueva al parquet.
+    """
+    estado = leer_estado()
+    if estado is None or not Path(ruta_salida).exists():
+        print("No hay estado previo, se descarga el historial completo.")
+        return ingestar(url, params, ruta_salida, chunksize, ruta_parquet)
+
+    filtro = f"{CAMPO_FECHA_API} >= date'{estado['fecha_max']}'"
+    params = {**(params or {}), "where": filtro}
+    folios_vistos = set(estado["folios_fecha_max"])
+
+    print(f"Descargando registros desde {estado['fecha_max']}...")
+    inicio = time.perf_counter()
+    filas_crudas = 0
+    nuevos = []
+    for chunk in iterar_chunks_url(url, params=params, chunksize=chunksize):
+        filas_crudas += len(chunk)
+        chunk.columns = limpiar_columnas(chunk.columns)
+        chunk = limpiar_chunk(chunk)
+        chunk = chunk[
+            (chunk["Fecha"] >= estado["fecha_max"])
+            & ~chunk["Folio"].astype(str).isin(folios_vistos)
+        ]
+        nuevos.append(chunk)
+    _reportar("Descarga y limpieza", filas_crudas, inicio)
+
+    nuevos = pd.concat(nuevos) if nuevos else pd.DataFrame()
+    if not nuevos.empty:
+        nuevos = nuevos.drop_duplicates(subset="Folio")
+    if nuevos.empty:
+        print("No hay registros nuevos.")
+        return 0
+
+    conteo_colonias = pd.Series(estado["conteo_colonias"], dtype="int64")
+    conteo_tipos = pd.Series(estado["conteo_tipos"], dtype="int64")
+    top_anterior, tipos_anteriores = _calcular_globales(conteo_colonias, conteo_tipos)
+    conteo_colonias = conteo_colonias.add(
+        nuevos["Nombre_de_asentamiento"].value_counts(), fill_value=0
+    )
+    conteo_tipos = conteo_tipos.add(
+        nuevos["Tipo_de_accidente"].value_counts(), fill_value=0
+    )
+    top_colonias, tipos_validos = _calcular_globales(conteo_colonias, conteo_tipos)
+
+    reescribir = set(top_colonias) != set(top_anterior) or set(tipos_validos) != set(
+        tipos_anteriores
+    )
+    if reescribir:
+        print("Cambió el top de colonias o los tipos válidos, reescribiendo historial.")
+        _reescribir_globales(
+            ruta_salida, ruta_parquet, top_colonias, tipos_validos, chunksize
+        )
+
+    columnas = pd.read_csv(ruta_salida, index_col=0, nrows=0).columns
+    siguiente_indice = estado["siguiente_indice"]
+    nuevos.index = range(siguiente_indice, siguiente_indice + len(nuevos))
+    nuevos = agregar_globales(nuevos, top_colonias, tipos_validos)
+    nuevos = nuevos[columnas]
+    nuevos.to_csv(ruta_salida, mode="a", header=False)
+    escribir_parte(nuevos, ruta_parquet)
+    if reescribir:
+        guardar_cubo(construir_cubo(ruta_parquet))
+    else:
+        guardar_cubo(sumar_cubos([cargar_cubo(), cubo_de(nuevos)]))
+
+    marca = {
+        "fecha_max": estado["fecha_max"],
+        "folios_fecha_max": estado["folios_fecha_max"],
+    }
+    marca = _actualizar_marca(marca, nuevos)
+    guardar_estado(
+        _estado(marca, siguiente_indice + len(nuevos), conteo_colonias, conteo_tipos)
+    )
+    print(f"{len(nuevos)} registros nuevos agregados a {ruta_salida}")
+    return len(nuevos)
@@ -0,0 +1,240 @@
+"""Tiempos, memoria y filas por etapa y por tramo, con reporte en JSON.
+
+Se activa con la variable de entorno ACCIDENTES_PERFIL, una lista separada
+por comas de:
+
+    tiempos   duración, filas, filas/s y RSS pico de cada tramo
+    memoria   además, pico de tracemalloc y líneas que más asignaron
+    cprofile  además, el perfil completo de la etapa en un archivo .prof
+
+Cada etapa escribe csv/perfiles/<corrida>/<etapa>.json con un registro para
+la etapa y uno por tramo. La corrida se toma de ACCIDENTES_CORRIDA (el flujo
+la comparte entre sus etapas) o de la fecha y hora de inicio.
+"""
+
+import atexit
+import cProfile
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DIR_PERFILES = "csv/perfiles"
+MODOS = {"tiempos", "memoria", "cprofile"}
+
+_modos = {
+    modo.strip().lower()
+    for modo in os.environ.get("ACCIDENTES_PERFIL", "").split(",")
+    if modo.strip() and modo.strip() != "0"
+}
+# ACCIDENTES_PERFIL=1 equivale a "tiempos"
+if "1" in _modos:
+    _modos = (_modos - {"1"}) | {"tiempos"}
+ACTIVA = bool(_modos)
+
+# Registros terminados y tramos abiertos (el último es el actual)
+_registros = []
+_pila = []
+_etapa = {}
+
+
+def rss_pico_mb():
+    """Memoria residente máxima del proceso hasta ahora"""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux la da en KB y macOS en bytes
+    return round(pico / (1024 if sys.platform != "darwin" else 1024**2), 1)
+
+
+def _contar_filas(valor):
+    if isinstance(valor, tuple) and valor:
+        valor = valor[0]
+    if isinstance(valor, (pd.DataFrame, pd.Series, np.ndarray)):
+        return len(valor)
+    return None
+
+
+def _top_asignaciones(antes, despues, n=5):
+    return [
+        {
+            "linea": str(diferencia.traceback[0]),
+            "mb": round(diferencia.size_diff / 1024**2, 2),
+        }
+        for diferencia in despues.compare_to(antes, "lineno")[:n]
+    ]
+
+
+@contextmanager
+def tramo(nombre: str, categoria: str = None, filas: int = None):
+    """Mide el bloque; `filas` se puede fijar al entrar o en el dict que entrega.
+
+    Sin instrumentación activa no mide nada.
+    """
+    registro = {
+        "tipo": "tramo",
+        "nombre": nombre,
+        "categoria": categoria,
+        "filas": filas,
+    }
+    if not ACTIVA:
+        yield registro
+        return
+
+    padre = _pila[-1] if _pila else _etapa
+    registro["padre"] = padre.get("nombre")
+    memoria = "memoria" in _modos and tracemalloc.is_tracing()
+    if memoria:
+        # El pico del padre hasta aquí se guarda antes de reiniciar el contador
+        padre["_pico"] = max(padre.get("_pico", 0), tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        registro["_antes"] = tracemalloc.take_snapshot()
+    registro["_pico"] = 0
+    registro["_inicio"] = time.perf_counter()
+    _pila.append(registro)
+    try:
+        yield registro
+    finally:
+        _pila.pop()
+        segundos = time.perf_counter() - registro.pop("_inicio")
+        registro["segundos"] = round(segundos, 4)
+        if registro["filas"] is not None:
+            registro["filas_por_s"] = round(registro["filas"] / max(segundos, 1e-9))
+        registro["rss_pico_mb"] = rss_pico_mb()
+        pico = registro.pop("_pico")
+        antes = registro.pop("_antes", None)
+        if memoria:
+            pico = max(pico, tracemalloc.get_traced_memory()[1])
+            registro["memoria_pico_mb"] = round(pico / 1024**2, 2)
+            registro["top_asignaciones"] = _top_asignaciones(
+                antes, tracemalloc.take_snapshot()
+            )
+            padre["_pico"] = max(padre.get("_pico", 0), pico)
+        _registros.append(registro)
+
+
+def medido(categoria: str, filas_de: int = None):
+    """Decorador: cada llamada es un tramo con el nombre de la función.
+
+    Las filas salen de len(args[filas_de]) o, si no se indica, del resultado
+    cuando es un DataFrame, Series o arreglo (o una tupla que empieza con uno).
+    """
+
+    def decorador(funcion):
+        nombre = f"{funcion.__module__.rsplit('.', 1)[-1]}.{funcion.__qualname__}"
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not ACTIVA:
+                return funcion(*args, **kwargs)
+            filas = _contar_filas(args[filas_de]) if filas_de is not None else None
+            with tramo(nombre, categoria, filas) as registro:
+                resultado = funcion(*args, **kwargs)
+                if registro["filas"] is None:
+                    registro["filas"] = _contar_filas(resultado)
+            return resultado
+
+        return envoltura
+
+    return decorador
+
+
+def _corrida():
+    return os.environ.get("ACCIDENTES_CORRIDA") or datetime.now().strftime(
+        "%Y%m%d-%H%M%S"
+    )
+
+
+def registrar_etapa(nombre: str = None):
+    """Empieza a medir la etapa; el reporte se escribe al terminar el proceso.
+
+    Sin nombre se usa carpeta-script del programa, p. ej. p7-hotspots.
+    """
+    if not ACTIVA or "etapa" in _etapa:
+        return
+    if nombre is None:
+        script = Path(sys.argv[0]).resolve()
+        nombre = f"{script.parent.name}-{script.stem}"
+    desconocidos = _modos - MODOS
+    if desconocidos:
+        print(f"Modos de perfil desconocidos: {', '.join(sorted(desconocidos))}")
+    _etapa.update(
+        etapa=nombre,
+        corrida=_corrida(),
+        inicio=datetime.now().isoformat(timespec="seconds"),
+        _reloj=time.perf_counter(),
+    )
+    if "memoria" in _modos:
+        tracemalloc.start()
+    if "cprofile" in _modos:
+        _etapa["_perfil"] = cProfile.Profile()
+        _etapa["_perfil"].enable()
+    atexit.register(_terminar_etapa)
+
+
+def _terminar_etapa():
+    directorio = Path(DIR_PERFILES) / _etapa["corrida"]
+    directorio.mkdir(parents=True, exist_ok=True)
+    perfil = _etapa.pop("_perfil", None)
+    if perfil is not None:
+        perfil.disable()
+        ruta_perfil = directorio / f"{_etapa['etapa']}.prof"
+        perfil.dump_stats(ruta_perfil)
+        _etapa["cprofile"] = str(ruta_perfil)
+    pico = _etapa.pop("_pico", 0)
+    registro = {
+        "tipo": "etapa",
+        "nombre": _etapa["etapa"],
+        "segundos": round(time.perf_counter() - _etapa.pop("_reloj"), 4),
+        "rss_pico_mb": rss_pico_mb(),
+        "argumentos": sys.argv[1:],
+        "python": sys.version.split()[0],
+        **_etapa,
+    }
+    if tracemalloc.is_tracing():
+        pico = max(pico, tracemalloc.get_traced_memory()[1])
+        registro["memoria_pico_mb"] = round(pico / 1024**2, 2)
+    tramos = [{"etapa": _etapa["etapa"], **r} for r in _registros]
+    with open(directorio / f"{_etapa['etapa']}.json", "w", encoding="utf-8") as archivo:
+        json.dump([registro, *tramos], archivo, ensure_ascii=False, indent=2)
+
+
+def leer_reporte(corrida: str, directorio: str = DIR_PERFILES) -> pd.DataFrame:
+    """Todos los registros de una corrida en una tabla"""
+    registros = []
+    for ruta in sorted((Path(directorio) / corrida).glob("*.json")):
+        registros.extend(json.loads(ruta.read_text(encoding="utf-8")))
+    return pd.DataFrame(registros)
+
+
+def comparar(anterior: str, actual: str, directorio: str = DIR_PERFILES):
+    """Segundos y filas/s por etapa y tramo en dos corridas, con el cambio relativo"""
+    columnas = ["segundos", "filas", "filas_por_s", "rss_pico_mb"]
+    tablas = []
+    for corrida in (anterior, actual):
+        tabla = leer_reporte(corrida, directorio)
+        tabla["etapa"] = tabla["etapa"].fillna(tabla["nombre"])
+        tabla = tabla.reindex(columns=["etapa", "tipo", "nombre", *columnas])
+        tablas.append(
+            tabla.groupby(["etapa", "tipo", "nombre"])[columnas].sum(min_count=1)
+        )
+    resultado = tablas[0].join(
+        tablas[1], lsuffix="_antes", rsuffix="_despues", how="outer"
+    )
+    resultado["cambio_segundos"] = (
+        resultado["segundos_despues"] / resultado["segundos_antes"] - 1
+    )
+    return resultado
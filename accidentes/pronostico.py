@@ -0,0 +1,304 @@
+import numpy as np
+import pandas as pd
+
+from accidentes.agregacion import codificar
+from accidentes.instrumentacion import medido
+
+# Pasos por ciclo estacional según la frecuencia de la serie
+PERIODOS = {"diaria": 7, "horaria": 24}
+
+# Valores (origen x paso x serie) por bloque de series en `pronosticar_lote`
+MAX_VALORES_BLOQUE = 2_000_000
+
+
+def historia_minima(modelos: dict) -> int:
+    """Pasos observados que necesitan todos los modelos antes de pronosticar.
+
+    ingenuo y holt_winters leen el ciclo anterior: con menos de un periodo de
+    historia el índice negativo daría la vuelta al final de la serie y el
+    pronóstico usaría datos del futuro.
+    """
+    return max(getattr(modelo, "historia_minima", 1) for modelo in modelos.values())
+
+
+def serie_diaria(cubo: pd.DataFrame) -> pd.Series:
+    """Accidentes por día desde el cubo, con los días sin registros en cero"""
+    conteos = cubo.groupby("Fecha")["Total"].sum()
+    dias = pd.date_range(conteos.index.min(), conteos.index.max(), freq="D")
+    return conteos.reindex(dias, fill_value=0).rename("Accidentes")
+
+
+def serie_horaria(cubo: pd.DataFrame) -> pd.Series:
+    """Accidentes por hora desde el cubo, con las horas sin registros en cero"""
+    momento = cubo["Fecha"] + pd.to_timedelta(cubo["Hora_num"].astype(int), unit="h")
+    conteos = cubo["Total"].groupby(momento).sum()
+    horas = pd.date_range(
+        conteos.index.min().normalize(),
+        conteos.index.max().normalize() + pd.Timedelta(hours=23),
+        freq="h",
+    )
+    return conteos.reindex(horas, fill_value=0).rename("Accidentes")
+
+
+def matriz_series(cubo: pd.DataFrame, por: str) -> pd.DataFrame:
+    """Accidentes por día (filas) y valor de `por` (columnas), densa y con ceros.
+
+    Se llena con un solo bincount sobre (serie, día) en lugar de un pivot.
+    """
+    fechas = cubo["Fecha"]
+    dias = ((fechas - fechas.min()) // pd.Timedelta(days=1)).to_numpy()
+    codigos, etiquetas = codificar(cubo[por])
+    validos = codigos >= 0
+    n_dias, n_series = dias.max() + 1, len(etiquetas)
+    conteos = np.bincount(
+        codigos[validos] * n_dias + dias[validos],
+        weights=cubo["Total"].to_numpy()[validos],
+        minlength=n_series * n_dias,
+    )
+    return pd.DataFrame(
+        conteos.reshape(n_series, n_dias).T,
+        index=pd.date_range(fechas.min(), periods=n_dias, freq="D"),
+        columns=pd.Index(etiquetas, name=por),
+    )
+
+
+def extender(indice: pd.DatetimeIndex, pasos: int) -> pd.DatetimeIndex:
+    """El índice de la serie más `pasos` periodos futuros"""
+    return pd.date_range(indice[0], periods=len(indice) + pasos, freq=indice.freq)
+
+
+def diseno(indice: pd.DatetimeIndex, componentes) -> np.ndarray:
+    """Matriz de regresión: constante más las componentes pedidas.
+
+    tendencia va en años desde el inicio; dia_semana, mes y hora son dummies
+    con la primera categoría como referencia.
+    """
+    columnas = [np.ones(len(indice))]
+    if "tendencia" in componentes:
+        columnas.append(np.asarray((indice - indice[0]) / pd.Timedelta(days=365.25)))
+    for componente, valores, n in [
+        ("dia_semana", indice.dayofweek, 7),
+        ("mes", indice.month - 1, 12),
+        ("hora", indice.hour, 24),
+    ]:
+        if componente in componentes:
+            columnas.extend(np.asarray(valores) == v for v in range(1, n))
+    return np.column_stack(columnas).astype(np.float64)
+
+
+def _filas(origenes, horizonte):
+    return origenes[:, None] + np.arange(horizonte)
+
+
+def regresion(componentes):
+    """Mínimos cuadrados estacionales reajustados en cada origen.
+
+    X'X y X'y se acumulan de un origen al siguiente, así que reajustar en el
+    origen o solo suma las filas nuevas. Todas las series comparten X: la
+    pseudo-inversa de X'X de cada origen se calcula una vez y se reutiliza para
+    todas las series y para los bloques de series siguientes.
+    """
+    # (inicio, largo, orígenes) -> (X, pseudo-inversas por origen)
+    previas = {}
+
+    def inversas(indice, origenes):
+        llave = (indice[0], len(indice), origenes.tobytes())
+        if llave not in previas:
+            X = diseno(indice, componentes)
+            xx = np.zeros((len(origenes), X.shape[1], X.shape[1]))
+            acumulado, desde = np.zeros(xx.shape[1:]), 0
+            for m, hasta in enumerate(origenes):
+                acumulado += X[desde:hasta].T @ X[desde:hasta]
+                xx[m], desde = acumulado, hasta
+            previas.clear()
+            previas[llave] = X, np.linalg.pinv(xx, hermitian=True)
+        return previas[llave]
+
+    def pronosticar(Y, indice, origenes, horizonte):
+        X, inversa = inversas(indice, origenes)
+        xy = np.zeros((len(origenes), X.shape[1], Y.shape[1]))
+        acumulado, desde = np.zeros(xy.shape[1:]), 0
+        for m, hasta in enumerate(origenes):
+            acumulado += X[desde:hasta].T @ Y[desde:hasta]
+            xy[m], desde = acumulado, hasta
+        betas = inversa @ xy
+        return np.einsum("mhp,mps->mhs", X[_filas(origenes, horizonte)], betas)
+
+    return pronosticar
+
+
+def ingenuo(periodo):
+    """Repite el último ciclo observado (referencia mínima a superar)"""
+
+    def pronosticar(Y, indice, origenes, horizonte):
+        filas = _filas(origenes, horizonte)
+        return Y[filas - periodo * (np.arange(horizonte) // periodo + 1)]
+
+    pronosticar.historia_minima = periodo
+    return pronosticar
+
+
+def suavizar(y, periodo, alfa, gamma):
+    """Holt-Winters aditivo sin tendencia, en una sola pasada.
+
+    nivel[t] y estacion[t] son los estados después de observar y[t]; el
+    primer ciclo inicializa el nivel con su media. Con `y` de (tiempo x series)
+    cada paso actualiza todas las series a la vez.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    nivel = np.empty(y.shape)
+    estacion = np.empty(y.shape)
+    nivel[:periodo] = y[:periodo].mean(axis=0)
+    estacion[:periodo] = y[:periodo] - nivel[0]
+    for t in range(periodo, len(y)):
+        nivel[t] = alfa * (y[t] - estacion[t - periodo]) + (1 - alfa) * nivel[t - 1]
+        estacion[t] = gamma * (y[t] - nivel[t]) + (1 - gamma) * estacion[t - periodo]
+    return nivel, estacion
+
+
+def holt_winters(periodo, alfa=0.1, gamma=0.1):
+    """Suavizamiento exponencial estacional; una recursión sirve a todos los orígenes"""
+
+    def pronosticar(Y, indice, origenes, horizonte):
+        nivel, estacion = suavizar(Y[: origenes.max()], periodo, alfa, gamma)
+        filas = _filas(origenes, horizonte)
+        ultimo = origenes[:, None] - 1
+        # Último estado estacional de la misma fase que ya se había observado
+        fuente = filas - periodo * ((filas - ultimo + periodo - 1) // periodo)
+        return nivel[ultimo] + estacion[fuente]
+
+    pronosticar.historia_minima = periodo
+    return pronosticar
+
+
+def modelos(frecuencia: str = "diaria") -> dict:
+    periodo = PERIODOS[frecuencia]
+    estacional = ["dia_semana"] if frecuencia == "diaria" else ["hora", "dia_semana"]
+    return {
+        "ingenuo_estacional": ingenuo(periodo),
+        "tendencia": regresion(["tendencia"]),
+        "estacional": regresion(["tendencia", *estacional]),
+        "estacional_mes": regresion(["tendencia", *estacional, "mes"]),
+        "holt_winters": holt_winters(periodo),
+        "holt_winters_rapido": holt_winters(periodo, alfa=0.3, gamma=0.2),
+    }
+
+
+def _origenes(n, horizonte, inicio, paso, minimo=1):
+    if horizonte < 1 or paso < 1:
+        raise ValueError("El horizonte y el paso deben ser de al menos 1")
+    if inicio < minimo:
+        raise ValueError(
+            f"El primer origen necesita al menos {minimo} pasos de historia "
+            f"(inicio = {inicio})"
+        )
+    origenes = np.arange(inicio, n - horizonte + 1, paso)
+    if len(origenes) == 0:
+        raise ValueError(
+            f"La serie es muy corta ({n} pasos) para inicio {inicio} y horizonte "
+            f"{horizonte}"
+        )
+    return origenes
+
+
+def _errores(Y, indice, modelos, origenes, horizonte):
+    """(modelo, error por origen x paso x serie), un modelo a la vez"""
+    reales = Y[_filas(origenes, horizonte)]
+    for nombre, modelo in modelos.items():
+        yield nombre, modelo(Y, indice, origenes, horizonte) - reales
+
+
+@medido("ajuste", filas_de=0)
+def backtest(
+    serie: pd.Series, modelos: dict, horizonte: int, inicio: int, paso: int = 1
+):
+    """Evaluación con origen móvil: en cada origen se entrena con lo anterior y se
+    pronostican los siguientes `horizonte` pasos.
+
+    Regresa el resumen por modelo (MAE, RMSE, sesgo) y el RMSE por paso del
+    horizonte, que sirve para los intervalos de `pronosticar`.
+    """
+    Y = serie.to_numpy(dtype=np.float64)[:, None]
+    origenes = _origenes(len(Y), horizonte, inicio, paso, historia_minima(modelos))
+
+    resumen, rmse_por_paso = {}, {}
+    for nombre, error in _errores(Y, serie.index, modelos, origenes, horizonte):
+        resumen[nombre] = {
+            "MAE": np.abs(error).mean(),
+            "RMSE": np.sqrt((error**2).mean()),
+            "sesgo": error.mean(),
+        }
+        rmse_por_paso[nombre] = np.sqrt((error[..., 0] ** 2).mean(axis=0))
+    resumen = pd.DataFrame(resumen).T.sort_values("MAE")
+    resumen.attrs["origenes"] = len(origenes)
+    return resumen, pd.DataFrame(rmse_por_paso, index=np.arange(1, horizonte + 1))
+
+
+def pronosticar(serie: pd.Series, modelo, horizonte: int, rmse_por_paso=None):
+    """Pronóstico desde el final de la serie; con el RMSE del backtest agrega un
+    intervalo aproximado de 95%."""
+    Y = serie.to_numpy(dtype=np.float64)[:, None]
+    minimo = historia_minima({"modelo": modelo})
+    if len(Y) < minimo:
+        raise ValueError(f"Se necesitan al menos {minimo} pasos para pronosticar")
+    indice = extender(serie.index, horizonte)
+    valores = modelo(Y, indice, np.array([len(Y)]), horizonte)[0, :, 0]
+    resultado = pd.DataFrame(
+        {"Prediccion": valores}, index=indice[len(Y) :].rename("Fecha")
+    )
+    if rmse_por_paso is not None:
+        margen = 1.96 * np.asarray(rmse_por_paso)
+        resultado["Inferior"] = np.maximum(valores - margen, 0)
+        resultado["Superior"] = valores + margen
+    return resultado
+
+
+@medido("prediccion", filas_de=0)
+def pronosticar_lote(
+    matriz: pd.DataFrame, modelos: dict, horizonte: int, inicio: int, paso: int = 1
+) -> pd.DataFrame:
+    """Backtest y pronóstico de todas las columnas de `matriz` a la vez.
+
+    Cada modelo corre sobre bloques de muchas series a la vez; para cada serie se
+    elige el modelo con menor MAE fuera de muestra y su intervalo sale del RMSE
+    por paso de esa misma serie. Regresa una tabla larga (serie, Fecha).
+    """
+    Y = matriz.to_numpy(dtype=np.float64)
+    origenes = _origenes(len(Y), horizonte, inicio, paso, historia_minima(modelos))
+    nombres = list(modelos)
+    # Por bloques de series: el error completo (origen x paso x serie) de miles
+    # de colonias ocuparía varios GB; de cada bloque solo quedan MAE y RMSE
+    mae = np.empty((len(nombres), Y.shape[1]))
+    rmse = np.empty((len(nombres), horizonte, Y.shape[1]))
+    bloque = max(1, MAX_VALORES_BLOQUE // (len(origenes) * horizonte))
+    for desde in range(0, Y.shape[1], bloque):
+        series = slice(desde, desde + bloque)
+        errores = _errores(Y[:, series], matriz.index, modelos, origenes, horizonte)
+        for m, (_, error) in enumerate(errores):
+            mae[m, series] = np.abs(error).mean(axis=(0, 1))
+            rmse[m, :, series] = np.sqrt((error**2).mean(axis=0))
+
+    indice = extender(matriz.index, horizonte)
+    origen = np.array([len(Y)])
+    futuros = np.stack(
+        [modelos[nombre](Y, indice, origen, horizonte)[0] for nombre in nombres]
+    )
+
+    # Por serie: modelo ganador, su pronóstico (horizonte x series) y su margen
+    mejor = mae.argmin(axis=0)
+    series = np.arange(Y.shape[1])
+    valores = futuros[mejor, :, series].T
+    margen = 1.96 * rmse[mejor, :, series].T
+
+    n_series = Y.shape[1]
+    return pd.DataFrame(
+        {
+            matriz.columns.name or "serie": np.tile(matriz.columns, horizonte),
+            "Fecha": np.repeat(indice[len(Y) :], n_series),
+            "Prediccion": valores.ravel(),
+            "Inferior": np.maximum(valores - margen, 0).ravel(),
+            "Superior": (valores + margen).ravel(),
+            "modelo": np.tile(np.asarray(nombres)[mejor], horizonte),
+            "MAE_backtest": np.tile(mae[mejor, series], horizonte),
+        }
+    )
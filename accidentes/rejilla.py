@@ -0,0 +1,60 @@
+import numpy as np
+
+RADIO_TIERRA = 6_371_008.8
+
+# Celdas de ~100 m x 100 m alrededor de Monterrey. La rejilla es fija (no
+# depende de los datos), así que el id de una celda es el mismo en cada ingesta
+TAMANO_CELDA = 100
+LATITUD_REFERENCIA = 25.67
+GRADOS_LAT = np.degrees(TAMANO_CELDA / RADIO_TIERRA)
+GRADOS_LON = GRADOS_LAT / np.cos(np.radians(LATITUD_REFERENCIA))
+
+# Columnas de la rejilla en una vuelta completa; caben en 22 bits
+COLUMNAS_REJILLA = 1 << 22
+
+
+def fila_columna(latitud, longitud):
+    """Fila y columna de la rejilla que contiene cada punto"""
+    fila = np.floor((np.asarray(latitud, dtype=np.float64) + 90) / GRADOS_LAT)
+    columna = np.floor((np.asarray(longitud, dtype=np.float64) + 180) / GRADOS_LON)
+    return fila.astype(np.int64), columna.astype(np.int64)
+
+
+def celda(latitud, longitud) -> np.ndarray:
+    """Id entero de la celda: fila * COLUMNAS_REJILLA + columna.
+
+    Las celdas de una misma fila quedan contiguas al ordenar por id, así que
+    una franja de columnas de una fila es un solo rango de búsqueda.
+    """
+    fila, columna = fila_columna(latitud, longitud)
+    return fila * COLUMNAS_REJILLA + columna
+
+
+def separar(celdas):
+    celdas = np.asarray(celdas, dtype=np.int64)
+    return celdas // COLUMNAS_REJILLA, celdas % COLUMNAS_REJILLA
+
+
+def centro(celdas):
+    """Latitud y longitud del centro de cada celda"""
+    fila, columna = separar(celdas)
+    return (fila + 0.5) * GRADOS_LAT - 90, (columna + 0.5) * GRADOS_LON - 180
+
+
+def haversine(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Distancia en metros sobre la esfera"""
+    lat1, lon1, lat2, lon2 = (
+        np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2)
+    )
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * RADIO_TIERRA * np.arcsin(np.sqrt(np.minimum(a, 1)))
+
+
+def caja_de_radio(latitud, longitud, metros):
+    """Caja (lat_min, lon_min, lat_max, lon_max) que contiene el círculo"""
+    d_lat = np.degrees(metros / RADIO_TIERRA)
+    d_lon = d_lat / np.cos(np.radians(min(abs(latitud) + d_lat, 89.9)))
+    return latitud - d_lat, longitud - d_lon, latitud + d_lat, longitud + d_lon
@@ -0,0 +1,421 @@
+"""Servicio HTTP local de conteos sobre el cubo, para tableros.
+
+python -m accidentes.servicio --puerto 8765
+
+GET /conteo?colonia=Centro&dia=Viernes&hora=18-20
+GET /top?por=colonia&n=10&tipo=alcance&desde=2022-01-01
+GET /serie?frecuencia=M&dia=Sabado,Domingo
+GET /dimensiones
+GET /salud
+
+Filtros: dia, hora, mes, tipo, colonia, resolucion y desde/hasta (fechas,
+hasta incluida). Varios valores van separados por coma o con el parámetro
+repetido; un valor que lleva coma va entre comillas dobles, como en un CSV
+(colonia="Valle, Sector 1",Centro). hora y mes aceptan rangos a-b: con
+números el final queda excluido (hora=18-20 son las 18 y 19, mes=1-13 el año
+completo) y con nombres de mes incluido (mes=enero-diciembre).
+
+El cubo se lee una vez; cada dimensión tiene una lista de posiciones por
+valor, así que un filtro toma la lista más corta y revisa las demás
+dimensiones solo sobre esas filas. Las respuestas se guardan en un caché LRU
+por consulta normalizada (encabezado X-Cache: hit/miss) y X-Tiempo-Ms da lo
+que tardó el servicio en armar la respuesta.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import time
+import traceback
+from functools import lru_cache
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from accidentes.agregacion import codificar
+from accidentes.carga import cargar_etapa
+from accidentes.constantes import DIAS_ORDEN, MES_ORDEN
+from accidentes.cubo import cargar_cubo
+
+# parámetro -> columna del cubo (Mes sale de Fecha)
+DIMENSIONES = {
+    "dia": "Dia_num",
+    "hora": "Hora_num",
+    "mes": "Mes",
+    "tipo": "Tipo_simplificado",
+    "colonia": "Nombre_de_asentamiento",
+    "resolucion": "Resolucion",
+}
+FRECUENCIAS = ("D", "W", "M")
+TAMANO_CACHE = 4096
+
+
+class ErrorConsulta(ValueError):
+    """Parámetros inválidos; se responde con 400"""
+
+
+class IndiceAgregados:
+    """Cubo ordenado por fecha con códigos y listas de posiciones por dimensión"""
+
+    def __init__(self, cubo: pd.DataFrame):
+        cubo = cubo.sort_values("Fecha", kind="stable", ignore_index=True)
+        self.fechas = cubo["Fecha"].to_numpy("datetime64[D]")
+        self.total = cubo["Total"].to_numpy(np.int64)
+        self._preparar_series()
+        self.codigos, self.etiquetas, self.buscar = {}, {}, {}
+        self.orden, self.inicios = {}, {}
+        for parametro, columna in DIMENSIONES.items():
+            if columna == "Dia_num":
+                codigos, etiquetas = cubo[columna].to_numpy(np.int64), DIAS_ORDEN
+            elif columna == "Mes":
+                codigos, etiquetas = cubo["Fecha"].dt.month.to_numpy() - 1, MES_ORDEN
+            elif columna == "Hora_num":
+                codigos, etiquetas = cubo[columna].to_numpy(np.int64), range(24)
+            else:
+                codigos, etiquetas = codificar(cubo[columna])
+            etiquetas = [str(etiqueta) for etiqueta in etiquetas]
+            self.codigos[parametro] = codigos
+            self.etiquetas[parametro] = etiquetas
+            self.buscar[parametro] = {
+                etiqueta.lower(): codigo for codigo, etiqueta in enumerate(etiquetas)
+            }
+            # Posiciones de cada valor, ascendentes (= por fecha); los nulos (-1) al inicio
+            orden = np.argsort(codigos, kind="stable")
+            self.orden[parametro] = orden
+            self.inicios[parametro] = np.searchsorted(
+                codigos[orden], np.arange(len(etiquetas) + 1)
+            )
+
+    def codigos_de(self, parametro: str, texto: str) -> np.ndarray:
+        """Códigos de "a,b,c" (con comillas si un valor lleva coma); en hora y
+        mes también rangos "a-b", con b excluido si es número e incluido si es
+        nombre de mes"""
+        if parametro not in DIMENSIONES:
+            raise ErrorConsulta(f"Dimensión desconocida: {parametro}")
+        buscar = self.buscar[parametro]
+        codigos = []
+        for valor in next(csv.reader([texto], skipinitialspace=True), []):
+            valor = valor.strip().lower()
+            if parametro in ("hora", "mes") and "-" in valor:
+                inicio, fin = valor.split("-", 1)
+                codigos.extend(
+                    range(
+                        self._numero(parametro, inicio),
+                        self._numero(parametro, fin) + (not fin.isdigit()),
+                    )
+                )
+            elif parametro in ("hora", "mes") and valor.isdigit():
+                codigos.append(self._numero(parametro, valor))
+            elif valor in buscar:
+                codigos.append(buscar[valor])
+            else:
+                raise ErrorConsulta(f"Valor desconocido para {parametro}: {valor}")
+        codigos = np.unique(np.asarray(codigos, dtype=np.int64))
+        if len(codigos) == 0:
+            raise ErrorConsulta(f"Rango vacío para {parametro}: {texto}")
+        if len(codigos) and codigos[-1] >= len(self.etiquetas[parametro]):
+            raise ErrorConsulta(f"Fuera de rango para {parametro}: {texto}")
+        return codigos
+
+    def _numero(self, parametro: str, valor: str) -> int:
+        """Hora 0-24 tal cual; mes 1-13 (o nombre) a código 0-12"""
+        if not valor.isdigit():
+            if valor not in self.buscar[parametro]:
+                raise ErrorConsulta(f"Valor desconocido para {parametro}: {valor}")
+            return self.buscar[parametro][valor]
+        numero = int(valor) - (parametro == "mes")
+        if not 0 <= numero <= len(self.etiquetas[parametro]):
+            raise ErrorConsulta(f"Fuera de rango para {parametro}: {valor}")
+        return numero
+
+    def _lista(self, parametro: str, codigos: np.ndarray) -> np.ndarray:
+        orden, inicios = self.orden[parametro], self.inicios[parametro]
+        partes = [orden[inicios[c] : inicios[c + 1]] for c in codigos]
+        if len(partes) == 1:
+            return partes[0]
+        return np.sort(np.concatenate(partes))
+
+    def filas(self, filtros: dict, desde=None, hasta=None) -> np.ndarray:
+        """Posiciones del cubo que cumplen todos los filtros {parámetro: códigos}"""
+        primera = 0 if desde is None else np.searchsorted(self.fechas, desde)
+        ultima = (
+            len(self.fechas)
+            if hasta is None
+            else np.searchsorted(self.fechas, hasta, side="right")
+        )
+        if not filtros:
+            return np.arange(primera, ultima)
+
+        # La dimensión con menos filas da los candidatos
+        def tamano(parametro):
+            inicios = self.inicios[parametro]
+            return int(
+                np.sum(inicios[filtros[parametro] + 1] - inicios[filtros[parametro]])
+            )
+
+        principal = min(filtros, key=tamano)
+        candidatos = self._lista(principal, filtros[principal])
+        candidatos = candidatos[
+            np.searchsorted(candidatos, primera) : np.searchsorted(candidatos, ultima)
+        ]
+        for parametro, codigos in filtros.items():
+            if parametro == principal:
+                continue
+            # Tabla de permitidos con una casilla extra al final para el -1 (nulo)
+            permitidos = np.zeros(len(self.etiquetas[parametro]) + 1, dtype=bool)
+            permitidos[codigos] = True
+            candidatos = candidatos[permitidos[self.codigos[parametro][candidatos]]]
+        return candidatos
+
+    def conteo(self, filas: np.ndarray) -> int:
+        return int(self.total[filas].sum())
+
+    def top(self, filas: np.ndarray, por: str, n: int) -> list:
+        codigos = self.codigos[por][filas]
+        validos = codigos >= 0
+        conteos = np.bincount(
+            codigos[validos],
+            weights=self.total[filas][validos],
+            minlength=len(self.etiquetas[por]),
+        ).astype(np.int64)
+        mejores = np.argsort(-conteos, kind="stable")[:n]
+        return [
+            {"valor": self.etiquetas[por][c], "total": int(conteos[c])}
+            for c in mejores
+            if conteos[c] > 0
+        ]
+
+    def _preparar_series(self):
+        """Día de cada fila desde la primera fecha y, por frecuencia, el periodo
+        de cada día del calendario con la fecha en que empieza"""
+        if len(self.fechas) == 0:
+            self.dia, self.periodos = np.zeros(0, dtype=np.int64), {}
+            return
+        calendario = np.arange(self.fechas[0], self.fechas[-1] + 1)
+        self.dia = (self.fechas - self.fechas[0]).astype(np.int64)
+        # 1970-01-01 fue jueves: +3 deja el lunes en 0
+        lunes = calendario - (calendario.astype(np.int64) + 3) % 7
+        primero_de_mes = calendario.astype("datetime64[M]").astype("datetime64[D]")
+        self.periodos = {}
+        for frecuencia, inicios in (
+            ("D", calendario),
+            ("W", lunes),
+            ("M", primero_de_mes),
+        ):
+            etiquetas, periodo = np.unique(inicios, return_inverse=True)
+            self.periodos[frecuencia] = (periodo, etiquetas.astype(str).tolist())
+
+    def serie(self, filas: np.ndarray, frecuencia: str) -> list:
+        """Totales por periodo, del primero al último con accidentes filtrados"""
+        if len(filas) == 0:
+            return []
+        periodo, etiquetas = self.periodos[frecuencia]
+        dias = self.dia[filas]
+        totales = np.bincount(
+            periodo[dias], weights=self.total[filas], minlength=len(etiquetas)
+        ).astype(np.int64)
+        # filas va en orden de fecha: la primera y la última marcan el rango
+        primero, ultimo = periodo[dias[0]], periodo[dias[-1]]
+        return [
+            {"fecha": etiquetas[i], "total": total}
+            for i, total in enumerate(
+                totales[primero : ultimo + 1].tolist(), start=primero
+            )
+        ]
+
+
+class Servicio:
+    def __init__(self, indice: IndiceAgregados, tamano_cache: int = TAMANO_CACHE):
+        self.indice = indice
+        self.responder_cacheado = lru_cache(maxsize=tamano_cache)(self._responder)
+        self.rutas = {
+            "/conteo": self._conteo,
+            "/top": self._top,
+            "/serie": self._serie,
+            "/dimensiones": self._dimensiones,
+        }
+
+    def _filtrar(self, parametros: dict):
+        desde, hasta = parametros.pop("desde", None), parametros.pop("hasta", None)
+        try:
+            desde = None if desde is None else np.datetime64(desde, "D")
+            hasta = None if hasta is None else np.datetime64(hasta, "D")
+        except ValueError:
+            raise ErrorConsulta("desde y hasta van como AAAA-MM-DD") from None
+        filtros = {
+            parametro: self.indice.codigos_de(parametro, valor)
+            for parametro, valor in parametros.items()
+        }
+        return self.indice.filas(filtros, desde, hasta)
+
+    def _conteo(self, parametros: dict) -> dict:
+        return {"total": self.indice.conteo(self._filtrar(parametros))}
+
+    def _top(self, parametros: dict) -> dict:
+        por = parametros.pop("por", "colonia")
+        if por not in DIMENSIONES:
+            raise ErrorConsulta(f"por debe ser una de: {', '.join(DIMENSIONES)}")
+        try:
+            n = int(parametros.pop("n", 10))
+        except ValueError:
+            raise ErrorConsulta("n debe ser un entero") from None
+        if n < 1:
+            raise ErrorConsulta("n debe ser de al menos 1")
+        return {"por": por, "top": self.indice.top(self._filtrar(parametros), por, n)}
+
+    def _serie(self, parametros: dict) -> dict:
+        frecuencia = parametros.pop("frecuencia", "D").upper()
+        if frecuencia not in FRECUENCIAS:
+            raise ErrorConsulta(f"frecuencia debe ser una de: {', '.join(FRECUENCIAS)}")
+        filas = self._filtrar(parametros)
+        return {"frecuencia": frecuencia, "serie": self.indice.serie(filas, frecuencia)}
+
+    def _dimensiones(self, parametros: dict) -> dict:
+        return self.indice.etiquetas
+
+    def _responder(self, ruta: str, parametros: tuple) -> tuple:
+        """(estado HTTP, cuerpo JSON) de una consulta normalizada"""
+        if ruta not in self.rutas:
+            return 404, json.dumps({"error": f"Ruta desconocida: {ruta}"}).encode()
+        try:
+            resultado = self.rutas[ruta](dict(parametros))
+        except ErrorConsulta as e:
+            return 400, json.dumps({"error": str(e)}, ensure_ascii=False).encode()
+        return 200, json.dumps(resultado, ensure_ascii=False).encode()
+
+    def responder(self, destino: str) -> tuple:
+        """(estado, cuerpo, si vino del caché) de una ruta con query string"""
+        partes = urlsplit(destino)
+        if partes.path == "/salud":
+            info = self.responder_cacheado.cache_info()
+            cuerpo = {
+                "filas_cubo": len(self.indice.total),
+                "accidentes": int(self.indice.total.sum()),
+                "cache": {
+                    "aciertos": info.hits,
+                    "fallos": info.misses,
+                    "tamano": info.currsize,
+                },
+            }
+            return 200, json.dumps(cuerpo).encode(), False
+        # Un parámetro repetido equivale a sus valores separados por coma (las
+        # comillas de cada valor se conservan), y el mismo orden de parámetros
+        # da la misma entrada del caché
+        juntos = {}
+        for nombre, valor in parse_qsl(partes.query):
+            if nombre in juntos and nombre not in DIMENSIONES:
+                error = json.dumps({"error": f"{nombre} va una sola vez"}).encode()
+                return 400, error, False
+            juntos[nombre] = f"{juntos[nombre]},{valor}" if nombre in juntos else valor
+        parametros = tuple(sorted(juntos.items()))
+        aciertos = self.responder_cacheado.cache_info().hits
+        estado, cuerpo = self.responder_cacheado(partes.path, parametros)
+        return estado, cuerpo, self.responder_cacheado.cache_info().hits > aciertos
+
+    async def atender(self, lector, escritor):
+        """HTTP/1.1 mínimo: GET con keep-alive"""
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                try:
+                    metodo, destino, version = linea.decode("latin-1").split()
+                except ValueError:
+                    await self._enviar(
+                        escritor,
+                        400,
+                        b'{"error": "Solicitud mal formada"}',
+                        cerrar=True,
+                    )
+                    break
+                encabezados = {}
+                while (linea := await lector.readline()) not in (b"\r\n", b"\n", b""):
+                    nombre, _, valor = linea.decode("latin-1").partition(":")
+                    encabezados[nombre.strip().lower()] = valor.strip().lower()
+                cerrar = (
+                    version == "HTTP/1.0" or encabezados.get("connection") == "close"
+                )
+                inicio = time.perf_counter()
+                if metodo != "GET":
+                    estado, cuerpo, cacheada = 405, b'{"error": "Solo GET"}', False
+                else:
+                    try:
+                        estado, cuerpo, cacheada = self.responder(destino)
+                    except Exception:
+                        traceback.print_exc()
+                        estado, cuerpo, cacheada = (
+                            500,
+                            b'{"error": "Error interno"}',
+                            False,
+                        )
+                await self._enviar(
+                    escritor,
+                    estado,
+                    cuerpo,
+                    cacheada,
+                    (time.perf_counter() - inicio) * 1000,
+                    cerrar,
+                )
+                if cerrar:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            escritor.close()
+
+    @staticmethod
+    async def _enviar(
+        escritor, estado, cuerpo, cacheada=False, milisegundos=0.0, cerrar=False
+    ):
+        escritor.write(
+            (
+                f"HTTP/1.1 {estado} {'OK' if estado == 200 else 'Error'}\r\n"
+                "Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(cuerpo)}\r\n"
+                f"X-Cache: {'hit' if cacheada else 'miss'}\r\n"
+                f"X-Tiempo-Ms: {milisegundos:.3f}\r\n"
+                f"Connection: {'close' if cerrar else 'keep-alive'}\r\n\r\n"
+            ).encode()
+            + cuerpo
+        )
+        await escritor.drain()
+
+
+async def servir(servicio: Servicio, host: str, puerto: int):
+    servidor = await asyncio.start_server(servicio.atender, host, puerto)
+    print(f"Escuchando en http://{host}:{puerto}", flush=True)
+    async with servidor:
+        await servidor.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Servicio HTTP local de conteos, top-k y series sobre el cubo."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="(default: 127.0.0.1)")
+    parser.add_argument("--puerto", type=int, default=8765, help="(default: 8765)")
+    parser.add_argument(
+        "--cache",
+        type=int,
+        default=TAMANO_CACHE,
+        help=f"Respuestas guardadas en el LRU (default: {TAMANO_CACHE})",
+    )
+    args = parser.parse_args()
+
+    cubo = cargar_etapa(
+        [columna for columna in DIMENSIONES.values() if columna != "Mes"] + ["Fecha"],
+        cargador=cargar_cubo,
+    )
+    servicio = Servicio(IndiceAgregados(cubo), args.cache)
+    print(f"Cubo indexado: {len(cubo)} filas, {servicio.indice.total.sum()} accidentes")
+    try:
+        asyncio.run(servir(servicio, args.host, args.puerto))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""Accidentes sintéticos con el mismo formato que la exportación del portal.
+
+python -m accidentes.sintetico --filas 1000000 --salida csv/sintetico.csv
+python p1/dataAdquisition.py --archivo csv/sintetico.csv
+
+Las horas, días, meses, tipos, resoluciones y colonias siguen las
+distribuciones de PERFIL (o las del dataset actual con --calibrar). Cada
+colonia tiene un centro y sus accidentes caen alrededor de él; una fracción
+pequeña de filas trae los problemas que la limpieza y p1/calidad.py esperan:
+hora "SD", colonia o coordenadas vacías, latitud y longitud intercambiadas y
+reportes duplicados.
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from accidentes.carga import cargar_etapa
+from accidentes.constantes import DIAS_ORDEN, MES_ORDEN
+
+# Columnas de la exportación con use_labels=true, en su orden
+COLUMNAS_CRUDAS = [
+    "Folio",
+    "Fecha",
+    "Hora",
+    "Día",
+    "Mes",
+    "Ejercicio",
+    "Tipo de accidente",
+    "Resolución",
+    "Origen de reporte",
+    "Tipo de asentamiento",
+    "Nombre de asentamiento",
+    "Tipo de vialidad",
+    "Nombre de la Vialidad",
+    "Georreferencia",
+    "Nota",
+]
+
+# Pesos relativos; no necesitan sumar 1
+PERFIL = {
+    # 0-23 h: valle en la madrugada, picos a la entrada y salida del trabajo
+    "horas": [
+        2.0, 1.5, 1.2, 1.0, 1.0, 1.5, 3.0, 5.0, 6.0, 5.0, 4.5, 4.8,
+        5.2, 5.8, 6.3, 6.5, 6.5, 6.8, 6.8, 6.0, 5.0, 4.2, 3.5, 2.6,
+    ],  # fmt: skip
+    # Lunes a Domingo
+    "dias": [14.5, 14.3, 14.5, 14.7, 16.0, 14.2, 11.8],
+    # Enero a Diciembre
+    "meses": [8.0, 7.9, 8.4, 8.0, 8.5, 8.3, 8.2, 8.4, 8.3, 8.6, 8.5, 8.9],
+    "tipos": {
+        "Choque de Crucero": 30,
+        "Alcance": 25,
+        "Choque Lateral": 15,
+        "Estrellamiento": 10,
+        "Atropello": 6,
+        "Volcadura": 4,
+        "Choque de Reversa": 4,
+        "Choque de Frente": 2,
+        "Caida de Persona": 2,
+        "Incendio": 1,
+        "Otros": 1,
+    },
+    "resoluciones": {"Convenio": 40, "Finiquitado": 35, "Consignado": 25},
+    "vialidades": {"Calle": 60, "Avenida": 35, "Carretera": 5},
+    "n_calles": 2000,
+    # Colonias con frecuencia Zipf alrededor del centro de Monterrey
+    "n_colonias": 600,
+    "zipf": 1.05,
+    "centro": (25.6866, -100.3161),
+    "dispersion_colonias": (0.045, 0.055),
+    # Desviación en grados de los accidentes alrededor del centro de su colonia
+    "dispersion": 0.004,
+}
+
+# Fracción de filas con cada problema de calidad
+PROBLEMAS = {
+    "hora_sin_dato": 0.01,
+    "sin_colonia": 0.005,
+    "sin_coordenadas": 0.003,
+    "coordenadas_invertidas": 0.001,
+    "duplicados": 0.002,
+}
+
+
+def _probabilidades(pesos) -> np.ndarray:
+    pesos = np.asarray(pesos, dtype=np.float64)
+    return pesos / pesos.sum()
+
+
+def colonias(perfil: dict = PERFIL, semilla: int = 42) -> pd.DataFrame:
+    """Nombre, probabilidad y centro (Latitud, Longitud) de cada colonia.
+
+    Con un perfil calibrado se usan las colonias y centros del dataset; si no,
+    se inventan `n_colonias` con pesos Zipf y centros alrededor de `centro`.
+    """
+    if "colonias" in perfil:
+        tabla = pd.DataFrame(perfil["colonias"])
+        tabla["Probabilidad"] = _probabilidades(tabla["Probabilidad"])
+        return tabla
+    rng = np.random.default_rng(semilla)
+    n = perfil["n_colonias"]
+    latitud, longitud = perfil["centro"]
+    dispersion_lat, dispersion_lon = perfil["dispersion_colonias"]
+    return pd.DataFrame(
+        {
+            "Nombre": [f"Colonia {i:03d}" for i in range(1, n + 1)],
+            "Probabilidad": _probabilidades(1 / np.arange(1, n + 1) ** perfil["zipf"]),
+            "Latitud": rng.normal(latitud, dispersion_lat, n),
+            "Longitud": rng.normal(longitud, dispersion_lon, n),
+        }
+    )
+
+
+def _fechas(rng, n: int, inicio, fin, perfil: dict) -> pd.DatetimeIndex:
+    """Días del rango pesados por día de la semana y mes"""
+    dias = pd.date_range(inicio, fin, freq="D")
+    pesos = (
+        np.asarray(perfil["dias"])[dias.dayofweek]
+        * np.asarray(perfil["meses"])[dias.month - 1]
+    )
+    return dias[rng.choice(len(dias), n, p=_probabilidades(pesos))]
+
+
+def _elegir(rng, n: int, pesos: dict) -> np.ndarray:
+    etiquetas = np.array(list(pesos), dtype=object)
+    return etiquetas[
+        rng.choice(len(etiquetas), n, p=_probabilidades(list(pesos.values())))
+    ]
+
+
+def _texto_coordenadas(latitud, longitud) -> pa.Array:
+    """Texto "lat, lon" con 6 decimales, armado en arrow"""
+    return pc.binary_join_element_wise(
+        pc.cast(pa.array(np.round(latitud, 6)), pa.string()),
+        pc.cast(pa.array(np.round(longitud, 6)), pa.string()),
+        ", ",
+    )
+
+
+def _bloque(
+    rng, n: int, folio_inicial: int, tabla_colonias, perfil, problemas, inicio, fin
+) -> pd.DataFrame:
+    fechas = _fechas(rng, n, inicio, fin, perfil)
+    horas = rng.choice(24, n, p=_probabilidades(perfil["horas"]))
+    minutos = horas * 60 + rng.integers(0, 60, n)
+    # Los 1440 textos HH:MM se arman una vez y se indexan
+    textos_hora = np.array(
+        [f"{m // 60:02d}:{m % 60:02d}" for m in range(1440)], dtype=object
+    )
+
+    colonia = rng.choice(len(tabla_colonias), n, p=tabla_colonias["Probabilidad"])
+    latitud = tabla_colonias["Latitud"].to_numpy()[colonia] + rng.normal(
+        0, perfil["dispersion"], n
+    )
+    longitud = tabla_colonias["Longitud"].to_numpy()[colonia] + rng.normal(
+        0, perfil["dispersion"], n
+    )
+    invertidas = rng.random(n) < problemas["coordenadas_invertidas"]
+    latitud[invertidas], longitud[invertidas] = (
+        longitud[invertidas],
+        latitud[invertidas],
+    )
+
+    df = pd.DataFrame(
+        {
+            "Folio": np.arange(folio_inicial, folio_inicial + n),
+            "Fecha": fechas.strftime("%Y-%m-%d"),
+            "Hora": textos_hora[minutos],
+            "Día": np.array(DIAS_ORDEN, dtype=object)[fechas.dayofweek],
+            "Mes": np.array(MES_ORDEN, dtype=object)[fechas.month - 1],
+            "Ejercicio": fechas.year,
+            "Tipo de accidente": _elegir(rng, n, perfil["tipos"]),
+            "Resolución": _elegir(rng, n, perfil["resoluciones"]),
+            "Origen de reporte": "C4",
+            "Tipo de asentamiento": "Colonia",
+            "Nombre de asentamiento": tabla_colonias["Nombre"].to_numpy()[colonia],
+            "Tipo de vialidad": _elegir(rng, n, perfil["vialidades"]),
+            "Nombre de la Vialidad": np.char.add(
+                "Calle ", rng.integers(1, perfil["n_calles"] + 1, n).astype(str)
+            ).astype(object),
+            "Georreferencia": _texto_coordenadas(latitud, longitud).to_numpy(
+                zero_copy_only=False
+            ),
+            "Nota": None,
+        },
+        columns=COLUMNAS_CRUDAS,
+    )
+    df.loc[rng.random(n) < problemas["hora_sin_dato"], "Hora"] = "SD"
+    df.loc[rng.random(n) < problemas["sin_colonia"], "Nombre de asentamiento"] = None
+    df.loc[rng.random(n) < problemas["sin_coordenadas"], "Georreferencia"] = None
+
+    # Segundo reporte del mismo accidente: mismo momento, unos metros de diferencia
+    copias = df[rng.random(n) < problemas["duplicados"]].copy()
+    if len(copias):
+        copias["Folio"] = np.arange(folio_inicial + n, folio_inicial + n + len(copias))
+        latitud, longitud = latitud[copias.index], longitud[copias.index]
+        copias["Georreferencia"] = _texto_coordenadas(
+            latitud + rng.normal(0, 0.0001, len(copias)),
+            longitud + rng.normal(0, 0.0001, len(copias)),
+        ).to_numpy(zero_copy_only=False)
+        df = pd.concat([df, copias], ignore_index=True)
+    return df
+
+
+def bloques(
+    filas: int,
+    chunksize: int = 100_000,
+    semilla: int = 42,
+    perfil: dict = PERFIL,
+    problemas: dict = PROBLEMAS,
+    inicio: str = "2019-01-01",
+    fin: str = "2023-12-31",
+):
+    """Genera `filas` accidentes (más los duplicados) en bloques de `chunksize`.
+
+    Cada bloque usa su propio generador derivado de `semilla`, así que el
+    resultado no depende de la memoria disponible, solo de los parámetros.
+    """
+    tabla_colonias = colonias(perfil, semilla)
+    semillas = np.random.SeedSequence(semilla).spawn(-(-filas // chunksize))
+    folio = 1
+    for numero, hijo in enumerate(semillas):
+        n = min(chunksize, filas - numero * chunksize)
+        df = _bloque(
+            np.random.default_rng(hijo),
+            n,
+            folio,
+            tabla_colonias,
+            perfil,
+            problemas,
+            inicio,
+            fin,
+        )
+        folio += len(df)
+        yield df
+
+
+def generar(filas: int, **opciones) -> pd.DataFrame:
+    """Todas las filas en un DataFrame con las columnas crudas del portal"""
+    return pd.concat(list(bloques(filas, **opciones)), ignore_index=True)
+
+
+def escribir_csv(ruta: str, filas: int, **opciones) -> int:
+    """Escribe el csv por bloques; regresa el número de filas escritas"""
+    Path(ruta).parent.mkdir(parents=True, exist_ok=True)
+    escritas = 0
+    for numero, df in enumerate(bloques(filas, **opciones)):
+        df.to_csv(
+            ruta, mode="w" if numero == 0 else "a", header=numero == 0, index=False
+        )
+        escritas += len(df)
+    return escritas
+
+
+def perfil_de_datos(df: pd.DataFrame, perfil: dict = PERFIL) -> dict:
+    """PERFIL con las distribuciones observadas en el dataset limpio.
+
+    Usa Hora_num, Dia_num, Fecha, Tipo_de_accidente, Resolucion,
+    Nombre_de_asentamiento, Latitud y Longitud. Los centros de colonia son la
+    mediana de sus coordenadas.
+    """
+    por_colonia = df.groupby("Nombre_de_asentamiento", observed=True).agg(
+        Probabilidad=("Latitud", "size"),
+        Latitud=("Latitud", "median"),
+        Longitud=("Longitud", "median"),
+    )
+    return {
+        **perfil,
+        "horas": np.bincount(df["Hora_num"], minlength=24).tolist(),
+        "dias": np.bincount(df["Dia_num"], minlength=7).tolist(),
+        "meses": np.bincount(df["Fecha"].dt.month - 1, minlength=12).tolist(),
+        "tipos": df["Tipo_de_accidente"].value_counts().to_dict(),
+        "resoluciones": df["Resolucion"].value_counts().to_dict(),
+        "colonias": por_colonia.rename_axis("Nombre").reset_index().to_dict("list"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Genera un csv de accidentes sintéticos con el formato del portal."
+    )
+    parser.add_argument("--filas", type=int, default=100_000, help="(default: 100000)")
+    parser.add_argument(
+        "--salida",
+        default="csv/sintetico.csv",
+        help="Archivo a escribir (default: csv/sintetico.csv)",
+    )
+    parser.add_argument("--semilla", type=int, default=42, help="(default: 42)")
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=100_000,
+        help="Filas por bloque (default: 100000)",
+    )
+    parser.add_argument("--inicio", default="2019-01-01", help="(default: 2019-01-01)")
+    parser.add_argument("--fin", default="2023-12-31", help="(default: 2023-12-31)")
+    parser.add_argument(
+        "--calibrar",
+        action="store_true",
+        help="Usar las distribuciones del dataset actual en lugar de PERFIL",
+    )
+    args = parser.parse_args()
+
+    perfil = PERFIL
+    if args.calibrar:
+        perfil = perfil_de_datos(
+            cargar_etapa(
+                [
+                    "Fecha",
+                    "Hora_num",
+                    "Dia_num",
+                    "Tipo_de_accidente",
+                    "Resolucion",
+                    "Nombre_de_asentamiento",
+                    "Latitud",
+                    "Longitud",
+                ]
+            )
+        )
+    escritas = escribir_csv(
+        args.salida,
+        args.filas,
+        chunksize=args.chunksize,
+        semilla=args.semilla,
+        perfil=perfil,
+        inicio=args.inicio,
+        fin=args.fin,
+    )
+    print(f"{escritas} accidentes sintéticos escritos en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.neighbors import KDTree
+
+# Máximo de pares (consulta, punto) por bloque al medir distancias en IVF
+MAX_PARES_BLOQUE = 2_000_000
+
+
+def deduplicar(X, y, pesos=None):
+    """Filas (X, y) únicas y cuántas veces aparece cada una.
+
+    RandomOverSampler solo copia filas, así que el conjunto sobremuestreado se
+    guarda como los puntos originales con su multiplicidad como peso.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    clases, codigos = np.unique(np.asarray(y), return_inverse=True)
+    unicas, inverso = np.unique(
+        np.column_stack([X, codigos]), axis=0, return_inverse=True
+    )
+    multiplicidad = np.bincount(inverso.ravel(), weights=pesos, minlength=len(unicas))
+    return unicas[:, :-1], clases[unicas[:, -1].astype(np.int64)], multiplicidad
+
+
+class IndiceExacto:
+    """Búsqueda exacta con KDTree (manhattan por omisión, o euclidean)"""
+
+    def __init__(self, hoja: int = 40, metrica: str = "manhattan"):
+        self.hoja = hoja
+        self.metrica = metrica
+
+    def construir(self, X):
+        self.arbol = KDTree(X, leaf_size=self.hoja, metric=self.metrica)
+        return self
+
+    def buscar(self, Q, k):
+        return self.arbol.query(Q, k=k)
+
+
+class IndiceIVF:
+    """Índice aproximado: celdas gruesas de k-means y vectores cuantizados a int8.
+
+    Cada punto se guarda en la celda de su centroide más cercano, ordenado por
+    celda (inicio y fin de cada celda en `inicios`). Una consulta solo mide
+    distancia contra los puntos de sus `nprobe` celdas más cercanas; las
+    celdas se recorren una vez por lote de consultas en lugar de consulta por
+    consulta. Más `nprobe` = más recall y menos consultas por segundo.
+    """
+
+    def __init__(self, n_celdas: int = None, nprobe: int = 4, semilla: int = 42):
+        self.n_celdas = n_celdas
+        self.nprobe = nprobe
+        self.semilla = semilla
+
+    def construir(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        n_celdas = min(self.n_celdas or max(1, int(np.sqrt(len(X)))), len(X))
+        gruesos = MiniBatchKMeans(
+            n_clusters=n_celdas, random_state=self.semilla, n_init=3
+        )
+        celda = gruesos.fit_predict(X)
+        self.centros = gruesos.cluster_centers_.astype(np.float32)
+
+        self.orden = np.argsort(celda, kind="stable")
+        self.inicios = np.searchsorted(celda[self.orden], np.arange(n_celdas + 1))
+
+        # Cuantización por dimensión: x ~ minimo + (codigo + 128) * escala
+        self.minimo = X.min(axis=0)
+        self.escala = (X.max(axis=0) - self.minimo) / 255
+        self.escala[self.escala == 0] = 1
+        self.codigos = (
+            np.round((X[self.orden] - self.minimo) / self.escala) - 128
+        ).astype(np.int8)
+        return self
+
+    def _decodificar(self, inicio, fin):
+        return (self.codigos[inicio:fin] + np.float32(128)) * self.escala + self.minimo
+
+    def buscar(self, Q, k):
+        Q = np.asarray(Q, dtype=np.float32)
+        nprobe = min(self.nprobe, len(self.centros))
+        # Dimensión por dimensión para no crear un arreglo consultas x celdas x d
+        distancia_centros = sum(
+            np.abs(Q[:, j, None] - self.centros[None, :, j]) for j in range(Q.shape[1])
+        )
+        sondas = np.argpartition(distancia_centros, nprobe - 1, axis=1)[:, :nprobe]
+
+        mejores_d = np.full((len(Q), k), np.inf, dtype=np.float32)
+        mejores_i = np.full((len(Q), k), -1, dtype=np.int64)
+        for celda in np.unique(sondas):
+            inicio, fin = self.inicios[celda], self.inicios[celda + 1]
+            if inicio == fin:
+                continue
+            puntos = self._decodificar(inicio, fin)
+            consultas = np.flatnonzero((sondas == celda).any(axis=1))
+            bloque = max(1, MAX_PARES_BLOQUE // (fin - inicio))
+            for desde in range(0, len(consultas), bloque):
+                filas = consultas[desde : desde + bloque]
+                d = np.abs(Q[filas, None, :] - puntos[None]).sum(axis=2)
+                candidatos_d = np.concatenate([mejores_d[filas], d], axis=1)
+                candidatos_i = np.concatenate(
+                    [
+                        mejores_i[filas],
+                        np.broadcast_to(np.arange(inicio, fin), d.shape),
+                    ],
+                    axis=1,
+                )
+                elegidos = np.argpartition(candidatos_d, k - 1, axis=1)[:, :k]
+                mejores_d[filas] = np.take_along_axis(candidatos_d, elegidos, axis=1)
+                mejores_i[filas] = np.take_along_axis(candidatos_i, elegidos, axis=1)
+
+        orden = np.argsort(mejores_d, axis=1)
+        mejores_d = np.take_along_axis(mejores_d, orden, axis=1)
+        mejores_i = np.take_along_axis(mejores_i, orden, axis=1)
+        indices = np.where(mejores_i >= 0, self.orden[np.maximum(mejores_i, 0)], -1)
+        return mejores_d.astype(np.float64), indices
+
+
+class ClasificadorVecinos:
+    """KNN con votos por distancia (o uniformes) sobre un índice intercambiable.
+
+    Con `deduplicar` las filas repetidas se guardan una vez con su
+    multiplicidad; al votar, cada punto ocupa tantos de los `n_neighbors`
+    lugares como copias tenía, así que el resultado es el mismo que
+    KNeighborsClassifier(weights=weights) sobre las filas copiadas.
+    Expone fit/predict/kneighbors para usarse donde va el de sklearn.
+    """
+
+    def __init__(
+        self,
+        indice=None,
+        n_neighbors: int = 5,
+        deduplicar: bool = True,
+        weights: str = "distance",
+    ):
+        self.indice = indice or IndiceExacto()
+        self.n_neighbors = n_neighbors
+        self.deduplicar = deduplicar
+        self.weights = weights
+
+    def fit(self, X, y, sample_weight=None):
+        X = np.asarray(X, dtype=np.float64)
+        if self.deduplicar:
+            X, y, pesos = deduplicar(X, y, sample_weight)
+        else:
+            pesos = np.ones(len(X)) if sample_weight is None else sample_weight
+        self.classes_, self._y = np.unique(np.asarray(y), return_inverse=True)
+        self.pesos_ = np.asarray(pesos, dtype=np.float64)
+        self.indice.construir(X)
+        return self
+
+    def kneighbors(self, X):
+        # Cada punto único vale al menos una copia: k únicos siempre alcanzan
+        return self.indice.buscar(X, min(self.n_neighbors, len(self.pesos_)))
+
+    def predict_proba(self, X):
+        distancias, indices = self.kneighbors(X)
+        validos = indices >= 0
+        multiplicidad = np.where(validos, self.pesos_[np.maximum(indices, 0)], 0)
+        previos = np.cumsum(multiplicidad, axis=1) - multiplicidad
+        tomados = np.clip(self.n_neighbors - previos, 0, multiplicidad)
+
+        if self.weights == "uniform":
+            inversa = np.ones(distancias.shape)
+        else:
+            # Igual que sklearn: si hay vecinos a distancia 0 solo votan esos
+            ceros = distancias == 0
+            with np.errstate(divide="ignore"):
+                inversa = 1 / distancias
+            inversa = np.where(ceros.any(axis=1, keepdims=True), ceros, inversa)
+
+        n_clases = len(self.classes_)
+        filas = np.arange(len(indices))[:, None]
+        votos = np.bincount(
+            (filas * n_clases + self._y[np.maximum(indices, 0)]).ravel(),
+            weights=(tomados * inversa).ravel(),
+            minlength=len(indices) * n_clases,
+        ).reshape(len(indices), n_clases)
+        with np.errstate(invalid="ignore"):
+            return votos / votos.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return self.classes_[np.nan_to_num(self.predict_proba(X)).argmax(axis=1)]
@@ -0,0 +1,201 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+RAIZ = Path(__file__).resolve().parents[1]
+
+
+async def pedir(lector, escritor, destino: str, host: str):
+    """GET con keep-alive; (estado, cuerpo, encabezados)"""
+    escritor.write(f"GET {destino} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+    await escritor.drain()
+    estado = int((await lector.readline()).split()[1])
+    encabezados = {}
+    while (linea := await lector.readline()) not in (b"\r\n", b""):
+        nombre, _, valor = linea.decode("latin-1").partition(":")
+        encabezados[nombre.strip().lower()] = valor.strip()
+    cuerpo = await lector.readexactly(int(encabezados["content-length"]))
+    return estado, cuerpo, encabezados
+
+
+def consultas(dimensiones: dict, peticiones: int, repetidas: float, semilla: int):
+    """Mezcla de consultas: `repetidas` salen de un grupo chico fijo (las de un
+    tablero) y el resto son combinaciones al azar"""
+    rng = np.random.default_rng(semilla)
+
+    def al_azar():
+        ruta = rng.choice(["/conteo", "/top", "/serie"])
+        parametros = {}
+        for dimension in rng.choice(
+            list(dimensiones), size=rng.integers(1, 4), replace=False
+        ):
+            etiquetas = dimensiones[dimension]
+            if dimension == "hora":
+                inicio = rng.integers(0, 23)
+                parametros[dimension] = f"{inicio}-{rng.integers(inicio + 1, 25)}"
+            else:
+                parametros[dimension] = str(etiquetas[rng.integers(len(etiquetas))])
+        if ruta == "/top":
+            parametros["por"] = rng.choice(list(dimensiones))
+            parametros["n"] = 10
+        if ruta == "/serie":
+            parametros["frecuencia"] = rng.choice(["D", "W", "M"])
+        return f"{ruta}?{urlencode(parametros)}"
+
+    tablero = [al_azar() for _ in range(50)]
+    return [
+        tablero[rng.integers(len(tablero))] if rng.random() < repetidas else al_azar()
+        for _ in range(peticiones)
+    ]
+
+
+async def cliente(url, pendientes: asyncio.Queue, resultados: list):
+    lector, escritor = await asyncio.open_connection(url.hostname, url.port)
+    try:
+        while not pendientes.empty():
+            destino = pendientes.get_nowait()
+            inicio = time.perf_counter()
+            estado, _, encabezados = await pedir(lector, escritor, destino, url.netloc)
+            resultados.append(
+                (
+                    time.perf_counter() - inicio,
+                    float(encabezados["x-tiempo-ms"]) / 1000,
+                    estado,
+                    encabezados["x-cache"] == "hit",
+                )
+            )
+    finally:
+        escritor.close()
+
+
+async def correr_carga(url, destinos, concurrencia: int):
+    pendientes = asyncio.Queue()
+    for destino in destinos:
+        pendientes.put_nowait(destino)
+    resultados = []
+    inicio = time.perf_counter()
+    await asyncio.gather(
+        *(cliente(url, pendientes, resultados) for _ in range(concurrencia))
+    )
+    return resultados, time.perf_counter() - inicio
+
+
+async def leer_json(url, destino: str):
+    lector, escritor = await asyncio.open_connection(url.hostname, url.port)
+    try:
+        _, cuerpo, _ = await pedir(lector, escritor, destino, url.netloc)
+    finally:
+        escritor.close()
+    return json.loads(cuerpo)
+
+
+def esperar_servicio(url, proceso, segundos: float = 60):
+    limite = time.monotonic() + segundos
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            sys.exit("El servicio terminó antes de responder")
+        try:
+            return asyncio.run(leer_json(url, "/salud"))
+        except OSError:
+            time.sleep(0.2)
+    sys.exit(f"El servicio no respondió en {segundos:.0f} s")
+
+
+def latencias(segundos) -> str:
+    ms = np.asarray(segundos) * 1000
+    if len(ms) == 0:
+        return "sin peticiones"
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+    return (
+        f"p50 {p50:.2f} ms, p90 {p90:.2f} ms, p99 {p99:.2f} ms, máx {ms.max():.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Prueba de carga del servicio de conteos: latencias p50/p99 con clientes concurrentes."
+    )
+    parser.add_argument(
+        "--url",
+        default="http://127.0.0.1:8765",
+        help="(default: http://127.0.0.1:8765)",
+    )
+    parser.add_argument(
+        "--iniciar",
+        action="store_true",
+        help="Levanta el servicio con el cubo de csv/ y lo detiene al terminar",
+    )
+    parser.add_argument("--peticiones", type=int, default=5000, help="(default: 5000)")
+    parser.add_argument(
+        "--concurrencia",
+        type=int,
+        default=32,
+        help="Conexiones keep-alive simultáneas (default: 32)",
+    )
+    parser.add_argument(
+        "--repetidas",
+        type=float,
+        default=0.8,
+        help="Fracción de consultas que repiten las de un tablero (default: 0.8)",
+    )
+    parser.add_argument("--semilla", type=int, default=42, help="(default: 42)")
+    args = parser.parse_args()
+    url = urlsplit(args.url)
+
+    proceso = None
+    if args.iniciar:
+        proceso = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "accidentes.servicio",
+                "--host",
+                url.hostname,
+                "--puerto",
+                str(url.port),
+            ],
+            env={**os.environ, "PYTHONPATH": str(RAIZ)},
+        )
+        inicio = time.perf_counter()
+        esperar_servicio(url, proceso)
+        print(f"Servicio listo en {time.perf_counter() - inicio:.1f} s")
+
+    try:
+        dimensiones = asyncio.run(leer_json(url, "/dimensiones"))
+        destinos = consultas(dimensiones, args.peticiones, args.repetidas, args.semilla)
+        resultados, total = asyncio.run(correr_carga(url, destinos, args.concurrencia))
+        salud = asyncio.run(leer_json(url, "/salud"))
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait()
+
+    segundos, en_servicio, estados, aciertos = (
+        np.array(columna) for columna in zip(*resultados)
+    )
+    print(
+        f"\n{len(resultados)} peticiones, {args.concurrencia} conexiones: "
+        f"{len(resultados) / total:.0f} peticiones/s"
+    )
+    print(f"Todas: {latencias(segundos)}")
+    print(f"Del caché ({aciertos.mean():.0%}): {latencias(segundos[aciertos])}")
+    print(f"Calculadas: {latencias(segundos[~aciertos])}")
+    # Sin la espera en cola ni el cliente, que comparten CPU con el servicio
+    print(f"Dentro del servicio: {latencias(en_servicio)}")
+    print(f"  calculadas: {latencias(en_servicio[~aciertos])}")
+    errores = int((estados != 200).sum())
+    if errores:
+        print(f"Respuestas con error: {errores}")
+    print(f"Caché del servicio: {salud['cache']}")
+
+
+if __name__ == "__main__":
+    main()
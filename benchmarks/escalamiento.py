@@ -0,0 +1,178 @@
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from accidentes.graficas import Grafica, renderizar
+from accidentes.instrumentacion import leer_reporte
+from accidentes.sintetico import escribir_csv
+
+RAIZ = Path(__file__).resolve().parents[1]
+RUTA_RESULTADOS = "csv/escalamiento.csv"
+
+# nombre -> (script, argumentos); corren en este orden sobre el dataset sintético
+ETAPAS = {
+    "ingesta": ("p1/dataAdquisition.py", ["--archivo", "csv/sintetico.csv"]),
+    "p2": ("p2/descriptiveStatistics.py", []),
+    "p4": ("p4/statisticTest.py", ["--permutaciones", "1000"]),
+    "p6": ("p6/knn.py", []),
+    "p7": ("p7/k-means.py", []),
+    "p8": ("p8/linearRegression.py", []),
+}
+
+
+def correr_tamano(filas: int, directorio: Path, etapas, semilla: int) -> pd.DataFrame:
+    """Genera `filas` accidentes en `directorio` y corre las etapas con perfil"""
+    shutil.rmtree(directorio, ignore_errors=True)
+    (directorio / "csv").mkdir(parents=True)
+    inicio = time.perf_counter()
+    escribir_csv(str(directorio / "csv/sintetico.csv"), filas, semilla=semilla)
+    print(f"{filas} filas generadas en {time.perf_counter() - inicio:.1f} s")
+
+    corrida = f"escala-{filas}"
+    entorno = {
+        **os.environ,
+        "MPLBACKEND": "Agg",
+        "ACCIDENTES_PERFIL": "tiempos",
+        "ACCIDENTES_CORRIDA": corrida,
+    }
+    procesos = []
+    for nombre in etapas:
+        script, argumentos = ETAPAS[nombre]
+        inicio = time.perf_counter()
+        with open(directorio / f"{nombre}.log", "w", encoding="utf-8") as log:
+            proceso = subprocess.run(
+                [sys.executable, str(RAIZ / script), *argumentos],
+                cwd=directorio,
+                env=entorno,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+            )
+        segundos = time.perf_counter() - inicio
+        estado = (
+            "ok" if proceso.returncode == 0 else f"falló ({directorio / nombre}.log)"
+        )
+        print(f"  {nombre}: {segundos:.1f} s {estado}")
+        procesos.append({"etapa_benchmark": nombre, "proceso_s": segundos})
+
+    reporte = leer_reporte(corrida, directorio / "csv/perfiles")
+    # El nombre de la etapa en el reporte es carpeta-script; se traduce al del benchmark
+    scripts = {
+        "-".join(Path(script).with_suffix("").parts): nombre
+        for nombre, (script, _) in ETAPAS.items()
+    }
+    reporte["etapa_benchmark"] = reporte["etapa"].map(scripts)
+    reporte = reporte.merge(pd.DataFrame(procesos), on="etapa_benchmark", how="left")
+    reporte.insert(0, "filas_generadas", filas)
+    return reporte
+
+
+def exponente(grupo: pd.DataFrame) -> float:
+    """Pendiente de log(segundos) contra log(filas): 1 = lineal, 2 = cuadrático"""
+    grupo = grupo[grupo["segundos"] > 0]
+    if grupo["filas_generadas"].nunique() < 2:
+        return np.nan
+    return np.polyfit(np.log(grupo["filas_generadas"]), np.log(grupo["segundos"]), 1)[0]
+
+
+def dibujar_escalamiento(fig, tabla):
+    ax = fig.subplots()
+    for etapa, serie in tabla.items():
+        ax.plot(serie.index, serie.values, marker="o", label=etapa)
+    filas = np.array(tabla.index, dtype=np.float64)
+    # Referencia lineal que pasa por la etapa más lenta en el tamaño menor
+    ax.plot(
+        filas,
+        tabla.iloc[0].max() * filas / filas[0],
+        linestyle="--",
+        color="gray",
+        label="lineal",
+    )
+    ax.set_xscale("log")
+    ax.set_yscale("log")
+    ax.set_xlabel("Accidentes sintéticos")
+    ax.set_ylabel("Segundos")
+    ax.set_title("Escalamiento de las etapas")
+    ax.legend()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Tiempos y filas/s de las etapas sobre datasets sintéticos de varios tamaños."
+    )
+    parser.add_argument(
+        "--tamanos",
+        type=int,
+        nargs="+",
+        default=[10_000, 30_000, 100_000],
+        help="Filas a generar (default: 10000 30000 100000)",
+    )
+    parser.add_argument(
+        "--etapas",
+        nargs="+",
+        default=list(ETAPAS),
+        help=f"Subconjunto de {', '.join(ETAPAS)} (ingesta siempre corre primero)",
+    )
+    parser.add_argument(
+        "--directorio",
+        default="csv/escalamiento",
+        help="Donde se generan los datasets; se borra en cada tamaño (default: csv/escalamiento)",
+    )
+    parser.add_argument("--semilla", type=int, default=42, help="(default: 42)")
+    args = parser.parse_args()
+    desconocidas = set(args.etapas) - set(ETAPAS)
+    if desconocidas:
+        parser.error(f"Etapas desconocidas: {', '.join(sorted(desconocidas))}")
+    etapas = ["ingesta", *[e for e in ETAPAS if e in args.etapas and e != "ingesta"]]
+
+    reportes = []
+    for filas in sorted(args.tamanos):
+        reportes.append(
+            correr_tamano(
+                filas, Path(args.directorio) / str(filas), etapas, args.semilla
+            )
+        )
+    reporte = pd.concat(reportes, ignore_index=True)
+    Path(RUTA_RESULTADOS).parent.mkdir(parents=True, exist_ok=True)
+    reporte.drop(columns=["argumentos"], errors="ignore").to_csv(
+        RUTA_RESULTADOS, index=False
+    )
+
+    pd.set_option("display.width", 160)
+    etapas_totales = reporte[reporte["tipo"] == "etapa"]
+    segundos = etapas_totales.pivot_table(
+        index="filas_generadas", columns="etapa_benchmark", values="segundos"
+    )[etapas]
+    print("\nSegundos por etapa (sin el arranque de Python):")
+    print(segundos.round(2).to_string())
+
+    tramos = reporte[reporte["tipo"] == "tramo"]
+    resumen = tramos.groupby(["etapa_benchmark", "nombre", "filas_generadas"])[
+        ["segundos", "filas"]
+    ].sum(min_count=1)
+    resumen["filas_por_s"] = resumen["filas"] / resumen["segundos"]
+    resumen = resumen.reset_index()
+    mayor = resumen[resumen["filas_generadas"] == resumen["filas_generadas"].max()]
+    escalas = resumen.groupby(["etapa_benchmark", "nombre"])[
+        ["filas_generadas", "segundos"]
+    ].apply(exponente)
+    tabla = mayor.set_index(["etapa_benchmark", "nombre"])[
+        ["segundos", "filas", "filas_por_s"]
+    ].assign(exponente=escalas)
+    print(f"\nTramos con {mayor['filas_generadas'].max()} filas y exponente de escala:")
+    print(tabla.round(3).to_string())
+
+    renderizar([Grafica("escalamiento.png", dibujar_escalamiento, segundos, (10, 6))])
+    print(f"\nResultados en {RUTA_RESULTADOS}")
+
+
+if __name__ == "__main__":
+    main()
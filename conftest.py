@@ -0,0 +1 @@
+# Pone la raíz del repositorio en sys.path para que las pruebas importen accidentes
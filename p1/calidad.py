@@ -0,0 +1,42 @@
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from accidentes import calidad
+from accidentes.carga import cargar_etapa
+from accidentes.instrumentacion import registrar_etapa
+
+registrar_etapa()
+
+parser = argparse.ArgumentParser(
+    description="Revisa coordenadas fuera de la zona metropolitana y reportes duplicados."
+)
+parser.add_argument(
+    "--ventana",
+    type=int,
+    default=30,
+    help="Minutos entre dos reportes del mismo choque (default: 30)",
+)
+parser.add_argument(
+    "--metros",
+    type=float,
+    default=50,
+    help="Distancia máxima entre dos reportes del mismo choque (default: 50)",
+)
+args = parser.parse_args()
+
+df = cargar_etapa(calidad.COLUMNAS)
+marcas, reporte = calidad.revisar(df, ventana=args.ventana, metros=args.metros)
+calidad.guardar(marcas, reporte)
+
+print(f"\n=== Calidad de {reporte['filas']} accidentes ({reporte['segundos']} s) ===")
+print(f"Coordenadas fuera de la zona metropolitana: {reporte['fuera_de_caja']}")
+print(f"  con latitud y longitud intercambiadas: {reporte['coordenadas_invertidas']}")
+print(f"  con el signo de la longitud invertido: {reporte['signo_invertido']}")
+print(
+    f"Reportes duplicados (a {args.ventana} min y {args.metros:g} m o menos): "
+    f"{reporte['duplicado']} en {reporte['grupos_duplicados']} grupos"
+)
+print(f"\nReporte en {calidad.RUTA_REPORTE}, filas marcadas en {calidad.RUTA_MARCAS}")
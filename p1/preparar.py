@@ -0,0 +1,31 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from accidentes.carga import cargar_datos
+from accidentes.espacial import cargar_indice
+from accidentes.instrumentacion import registrar_etapa
+
+registrar_etapa()
+
+parser = argparse.ArgumentParser(
+    description="Arma los cachés del dataset y del índice espacial en csv/.cache."
+)
+parser.parse_args()
+
+# Arma los cachés de csv/.cache una sola vez después de la ingesta, antes de
+# que calidad, p6, p7 y hotspots los pidan en paralelo
+inicio = time.perf_counter()
+try:
+    df = cargar_datos()
+    indice = cargar_indice()
+except Exception as e:
+    print(f"Error al leer archivo: {e}")
+    sys.exit(1)
+print(
+    f"Cachés listos: {len(df)} accidentes, {len(indice.celdas)} celdas "
+    f"({time.perf_counter() - inicio:.1f} s)"
+)
@@ -1,50 +1,59 @@
-import pandas as pd
+import argparse
 import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from accidentes.agregacion import Agregador
+from accidentes.carga import cargar_etapa
+from accidentes.cubo import cargar_cubo
+from accidentes.instrumentacion import registrar_etapa
+
+registrar_etapa()
+
+parser = argparse.ArgumentParser(
+    description="Estadísticas descriptivas de los accidentes desde el cubo."
+)
+parser.parse_args()
+
+cubo = cargar_etapa(
+    [
+        "Fecha",
+        "Dia",
+        "Hora_num",
+        "Tipo_de_accidente",
+        "Nombre_de_asentamiento",
+        "Resolucion",
+    ],
+    cargador=cargar_cubo,
+)
 
+print("\n=== Estadísticas generales ===")
+print(f"Total de accidentes registrados: {cubo['Total'].sum()}")
+print(
+    f"Periodo cubierto: desde {cubo['Fecha'].min():%Y-%m-%d} "
+    f"hasta {cubo['Fecha'].max():%Y-%m-%d}"
+)
 
-def primera_moda(series):
-    """Función auxiliar para obtener la primera moda de una serie"""
-    moda = series.mode()
-    return moda.iloc[0] if not moda.empty else None
-
-
-def top_tres_dict(series):
-    """Función auxiliar para obtener los 3 valores más comunes en formato dict"""
-    return series.value_counts().head(3).to_dict()
-
+agregador = Agregador(cubo, pesos="Total")
 
 try:
-    df = pd.read_csv("csv/accidentes_viales_mty.csv")
-except Exception as e:
-    print(f"Error al leer archivo: {e}")
-    sys.exit(1)
-else:
-    print("Archivo cargado correctamente :)")
-
-print("\n=== Estadísticas generales ===")
-print(f"Total de accidentes registrados: {len(df)}")
-print(f"Periodo cubierto: desde {df['Fecha'].min()} hasta {df['Fecha'].max()}")
-
-try:
-    accidentes_por_tipo = (
-        df.groupby("Tipo_de_accidente")
-        .agg(Total=("Folio", "count"), Hora_promedio=("Hora_num", "mean"))
-        .sort_values("Total", ascending=False)
-    )
+    accidentes_por_tipo = agregador.agregar(
+        "Tipo_de_accidente",
+        Total=(None, "count"),
+        Hora_promedio=("Hora_num", "mean"),
+    ).sort_values("Total", ascending=False)
 
 except Exception as e:
     print(f"\nError en análisis por tipo: {e}")
 
 try:
-    accidentes_por_dia = (
-        df.groupby("Dia")
-        .agg(
-            Total=("Folio", "count"),
-            Hora_moda=("Hora_num", primera_moda),
-            Tipo_mas_comun=("Tipo_de_accidente", primera_moda),
-        )
-        .sort_values("Total", ascending=False)
-    )
+    accidentes_por_dia = agregador.agregar(
+        "Dia",
+        Total=(None, "count"),
+        Hora_moda=("Hora_num", "moda"),
+        Tipo_mas_comun=("Tipo_de_accidente", "moda"),
+    ).sort_values("Total", ascending=False)
 
     print("\n=== Accidentes por día ===")
     print(accidentes_por_dia)
@@ -54,11 +63,11 @@ except Exception as e:
 
 try:
     top_colonias = (
-        df.groupby("Nombre_de_asentamiento")
-        .agg(
-            Total=("Folio", "count"),
-            Tipo_mas_comun=("Tipo_de_accidente", primera_moda),
-            Hora_moda=("Hora_num", primera_moda),
+        agregador.agregar(
+            "Nombre_de_asentamiento",
+            Total=(None, "count"),
+            Tipo_mas_comun=("Tipo_de_accidente", "moda"),
+            Hora_moda=("Hora_num", "moda"),
         )
         .sort_values("Total", ascending=False)
         .head(10)
@@ -71,9 +80,7 @@ except Exception as e:
     print(f"\nError en análisis por colonia: {e}")
 
 try:
-    resolucion_por_tipo = (
-        df.groupby(["Tipo_de_accidente", "Resolucion"]).size().unstack(fill_value=0)
-    )
+    resolucion_por_tipo = agregador.tabla_cruzada("Tipo_de_accidente", "Resolucion")
 
     if "Finiquitado" in resolucion_por_tipo.columns:
         resolucion_por_tipo["Porcentaje_Finiquitado"] = (
@@ -87,13 +94,11 @@ except Exception as e:
     print(f"\nError en análisis de resoluciones: {e}")
 
 try:
-    accidentes_por_hora = (
-        df.groupby("Hora_num")
-        .agg(
-            Total=("Folio", "count"), Tipo_mas_comun=("Tipo_de_accidente", primera_moda)
-        )
-        .sort_index()
-    )
+    accidentes_por_hora = agregador.agregar(
+        "Hora_num",
+        Total=(None, "count"),
+        Tipo_mas_comun=("Tipo_de_accidente", "moda"),
+    ).sort_index()
 
     print("\n=== Distribución horaria de accidentes ===")
     print(accidentes_por_hora)
@@ -1,155 +1,198 @@
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy import stats
-from statsmodels.stats.multicomp import pairwise_tukeyhsd
-import statsmodels.api as sm
-from statsmodels.formula.api import ols
+import argparse
 import sys
+from pathlib import Path
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
 
-def primera_moda(series):
-    """Función auxiliar para obtener la primera moda de una serie"""
-    moda = series.mode()
-    return moda.iloc[0] if not moda.empty else None
+from accidentes.agregacion import Agregador
+from accidentes.carga import cargar_etapa
+from accidentes.constantes import DIAS_ORDEN
+from accidentes.cubo import cargar_cubo
+from accidentes.graficas import Grafica, renderizar
+from accidentes.instrumentacion import registrar_etapa
 
+GUARDAR = {"bbox_inches": "tight"}
 
-def top_tres_dict(series):
-    """Función auxiliar para obtener los 3 valores más comunes en formato dict"""
-    return series.value_counts().head(3).to_dict()
-
-
-try:
-    df = pd.read_csv("csv/accidentes_viales_mty.csv")
-except Exception as e:
-    print(f"Error al leer archivo: {e}")
-    sys.exit(1)
-
-print("Archivo cargado correctamente :)")
-print("Generado gráficas")
 
 # 1. Distribución de tipos de accidente (Barras horizontales)
-accidentes_por_tipo = (
-    df.groupby("Tipo_de_accidente")
-    .agg(Total=("Folio", "count"), Hora_promedio=("Hora_num", "mean"))
-    .sort_values("Total", ascending=False)
-)
-
-plt.figure(figsize=(12, 6))
-accidentes_por_tipo["Total"].sort_values().plot(kind="barh", color="steelblue")
-plt.title("Tipos de accidentes más frecuentes en Monterrey", fontsize=16)
-plt.xlabel("Número de accidentes", fontsize=12)
-plt.ylabel("Tipo de accidente", fontsize=12)
-plt.grid(axis="x", alpha=0.3)
-plt.tight_layout()
-plt.savefig("distribucion_tipos_accidentes.png", bbox_inches="tight")
+def dibujar_tipos(fig, accidentes_por_tipo):
+    ax = fig.subplots()
+    accidentes_por_tipo["Total"].sort_values().plot(
+        kind="barh", color="steelblue", ax=ax
+    )
+    ax.set_title("Tipos de accidentes más frecuentes en Monterrey", fontsize=16)
+    ax.set_xlabel("Número de accidentes", fontsize=12)
+    ax.set_ylabel("Tipo de accidente", fontsize=12)
+    ax.grid(axis="x", alpha=0.3)
+    fig.tight_layout()
+
 
 # 2. Patrón de accidentes por hora (Gráfica de línea)
-accidentes_por_hora = (
-    df.groupby("Hora_num")
-    .agg(Total=("Folio", "count"), Tipo_mas_comun=("Tipo_de_accidente", primera_moda))
-    .sort_index()
-)
-
-plt.figure()
-sns.lineplot(
-    x=accidentes_por_hora.index,
-    y="Total",
-    data=accidentes_por_hora,
-    marker="o",
-    color="crimson",
-    linewidth=2.5,
-)
-plt.title("Distribución horaria de accidentes viales", fontsize=16)
-plt.xlabel("Hora del día (formato 24h)", fontsize=12)
-plt.ylabel("Número de accidentes", fontsize=12)
-plt.xticks(range(0, 24))
-plt.grid(alpha=0.3)
-plt.tight_layout()
-plt.savefig("patron_accidentes_hora.png", bbox_inches="tight")
+def dibujar_horas(fig, accidentes_por_hora):
+    import seaborn as sns
+
+    ax = fig.subplots()
+    sns.lineplot(
+        x=accidentes_por_hora.index,
+        y="Total",
+        data=accidentes_por_hora,
+        marker="o",
+        color="crimson",
+        linewidth=2.5,
+        ax=ax,
+    )
+    ax.set_title("Distribución horaria de accidentes viales", fontsize=16)
+    ax.set_xlabel("Hora del día (formato 24h)", fontsize=12)
+    ax.set_ylabel("Número de accidentes", fontsize=12)
+    ax.set_xticks(range(0, 24))
+    ax.grid(alpha=0.3)
+    fig.tight_layout()
+
 
 # 3. Accidentes por día de la semana (Barras con anotaciones)
-accidentes_por_dia = (
-    df.groupby("Dia")
-    .agg(
-        Total=("Folio", "count"),
-        Hora_moda=("Hora_num", primera_moda),
-        Tipo_mas_comun=("Tipo_de_accidente", primera_moda),
-    )
-    .sort_values("Total", ascending=False)
-)
-
-dias_orden = ["Lunes", "Martes", "Miercoles", "Jueves", "Viernes", "Sabado", "Domingo"]
-accidentes_por_dia = accidentes_por_dia.reindex(dias_orden)
-
-plt.figure()
-ax = accidentes_por_dia["Total"].plot(kind="bar", color="teal", alpha=0.8)
-plt.title("Accidentes por día de la semana", fontsize=16)
-plt.xlabel("Día de la semana", fontsize=12)
-plt.ylabel("Número de accidentes", fontsize=12)
-
-# Añadir valores en las barras
-for p in ax.patches:
-    ax.annotate(
-        f"{int(p.get_height())}",
-        (p.get_x() + p.get_width() / 2.0, p.get_height()),
-        ha="center",
-        va="center",
-        xytext=(0, 5),
-        textcoords="offset points",
-    )
+def dibujar_dias(fig, accidentes_por_dia):
+    ax = fig.subplots()
+    accidentes_por_dia["Total"].plot(kind="bar", color="teal", alpha=0.8, ax=ax)
+    ax.set_title("Accidentes por día de la semana", fontsize=16)
+    ax.set_xlabel("Día de la semana", fontsize=12)
+    ax.set_ylabel("Número de accidentes", fontsize=12)
+
+    # Añadir valores en las barras
+    for p in ax.patches:
+        ax.annotate(
+            f"{int(p.get_height())}",
+            (p.get_x() + p.get_width() / 2.0, p.get_height()),
+            ha="center",
+            va="center",
+            xytext=(0, 5),
+            textcoords="offset points",
+        )
+
+    ax.grid(axis="y", alpha=0.3)
+    fig.tight_layout()
 
-plt.grid(axis="y", alpha=0.3)
-plt.tight_layout()
-plt.savefig("accidentes_por_dia.png", bbox_inches="tight")
 
 # 4. Top 10 colonias con más accidentes (Mapa de calor)
-top_colonias = (
-    df.groupby("Nombre_de_asentamiento")
-    .agg(
-        Total=("Folio", "count"),
-        Tipo_mas_comun=("Tipo_de_accidente", primera_moda),
-        Hora_moda=("Hora_num", primera_moda),
+def dibujar_colonias(fig, top_colonias_para_heatmap):
+    import seaborn as sns
+
+    ax = fig.subplots()
+    sns.heatmap(
+        top_colonias_para_heatmap.T,
+        annot=True,
+        fmt=".1f",
+        cmap="YlOrRd",
+        linewidths=0.5,
+        cbar_kws={"label": "Valor"},
+        ax=ax,
     )
-    .sort_values("Total", ascending=False)
-    .head(10)
-)
-
-top_colonias_para_heatmap = top_colonias[["Total", "Hora_moda"]].sort_values(
-    "Total", ascending=False
-)
-
-plt.figure()
-sns.heatmap(
-    top_colonias_para_heatmap.T,
-    annot=True,
-    fmt=".1f",
-    cmap="YlOrRd",
-    linewidths=0.5,
-    cbar_kws={"label": "Valor"},
-)
-plt.title("Top 10 colonias: Total de accidentes y hora más frecuente", fontsize=16)
-plt.xlabel("Colonia", fontsize=12)
-plt.ylabel("Métrica", fontsize=12)
-plt.tight_layout()
-plt.savefig("top_colonias_heatmap.png", bbox_inches="tight")
+    ax.set_title(
+        "Top 10 colonias: Total de accidentes y hora más frecuente", fontsize=16
+    )
+    ax.set_xlabel("Colonia", fontsize=12)
+    ax.set_ylabel("Métrica", fontsize=12)
+    fig.tight_layout()
 
 
 # Proporción de los 5 tipos más comunes (Pastel)
-top5_tipos = accidentes_por_tipo["Total"].nlargest(5)
-plt.figure()
-top5_tipos.plot(
-    kind="pie",
-    autopct="%1.1f%%",
-    startangle=90,
-    colors=["#ff9999", "#66b3ff", "#99ff99", "#ffcc99", "#c2c2f0"],
-    explode=(0.05, 0, 0, 0, 0),
-)
-plt.title("Los 5 tipos de accidente más frecuentes", fontsize=16)
-plt.ylabel("")
-plt.tight_layout()
-plt.savefig("top5_tipos_pie.png", bbox_inches="tight")
-
-
-print("Gráficas generadas :)")
+def dibujar_top5(fig, top5_tipos):
+    ax = fig.subplots()
+    top5_tipos.plot(
+        kind="pie",
+        autopct="%1.1f%%",
+        startangle=90,
+        colors=["#ff9999", "#66b3ff", "#99ff99", "#ffcc99", "#c2c2f0"],
+        explode=(0.05, 0, 0, 0, 0),
+        ax=ax,
+    )
+    ax.set_title("Los 5 tipos de accidente más frecuentes", fontsize=16)
+    ax.set_ylabel("")
+    fig.tight_layout()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Gráficas de tipos de accidente, horas, días y colonias desde el cubo."
+    )
+    parser.parse_args()
+
+    cubo = cargar_etapa(
+        ["Dia", "Hora_num", "Tipo_de_accidente", "Nombre_de_asentamiento"],
+        cargador=cargar_cubo,
+    )
+    agregador = Agregador(cubo, pesos="Total")
+    print("Generado gráficas")
+
+    accidentes_por_tipo = agregador.agregar(
+        "Tipo_de_accidente",
+        Total=(None, "count"),
+        Hora_promedio=("Hora_num", "mean"),
+    ).sort_values("Total", ascending=False)
+
+    accidentes_por_hora = agregador.agregar(
+        "Hora_num",
+        Total=(None, "count"),
+        Tipo_mas_comun=("Tipo_de_accidente", "moda"),
+    ).sort_index()
+
+    accidentes_por_dia = agregador.agregar(
+        "Dia",
+        Total=(None, "count"),
+        Hora_moda=("Hora_num", "moda"),
+        Tipo_mas_comun=("Tipo_de_accidente", "moda"),
+    ).sort_values("Total", ascending=False)
+    accidentes_por_dia = accidentes_por_dia.reindex(DIAS_ORDEN)
+
+    top_colonias = (
+        agregador.agregar(
+            "Nombre_de_asentamiento",
+            Total=(None, "count"),
+            Tipo_mas_comun=("Tipo_de_accidente", "moda"),
+            Hora_moda=("Hora_num", "moda"),
+        )
+        .sort_values("Total", ascending=False)
+        .head(10)
+    )
+    top_colonias_para_heatmap = top_colonias[["Total", "Hora_moda"]].sort_values(
+        "Total", ascending=False
+    )
+
+    top5_tipos = accidentes_por_tipo["Total"].nlargest(5)
+
+    renderizar(
+        [
+            Grafica(
+                "distribucion_tipos_accidentes.png",
+                dibujar_tipos,
+                accidentes_por_tipo[["Total"]],
+                (12, 6),
+                GUARDAR,
+            ),
+            Grafica(
+                "patron_accidentes_hora.png",
+                dibujar_horas,
+                accidentes_por_hora[["Total"]],
+                guardar=GUARDAR,
+            ),
+            Grafica(
+                "accidentes_por_dia.png",
+                dibujar_dias,
+                accidentes_por_dia[["Total"]],
+                guardar=GUARDAR,
+            ),
+            Grafica(
+                "top_colonias_heatmap.png",
+                dibujar_colonias,
+                top_colonias_para_heatmap,
+                guardar=GUARDAR,
+            ),
+            Grafica("top5_tipos_pie.png", dibujar_top5, top5_tipos, guardar=GUARDAR),
+        ]
+    )
+
+    print("Gráficas generadas :)")
+
+
+if __name__ == "__main__":
+    registrar_etapa()
+    main()
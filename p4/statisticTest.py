@@ -1,74 +1,181 @@
+import argparse
+import numpy as np
 import pandas as pd
 import sys
-import matplotlib.pyplot as plt
-import seaborn as sns
 from scipy import stats
+from pathlib import Path
 
-try:
-    datos = pd.read_csv("csv/accidentes_viales_mty.csv")
-except Exception as e:
-    print(f"Error al leer archivo: {e}")
-    sys.exit(1)
-else:
-    print("Archivo cargado correctamente :)")
-
-# 2. Preparar los días en orden correcto
-dias_orden = ["Lunes", "Martes", "Miercoles", "Jueves", "Viernes", "Sabado", "Domingo"]
-datos["Dia"] = pd.Categorical(datos["Dia"], categories=dias_orden, ordered=True)
-
-accidentes_por_dia = datos["Dia"].value_counts().sort_index()
-
-plt.figure(figsize=(10, 5))
-accidentes_por_dia.plot(kind="bar", color="tomato")
-plt.title("Accidentes por día de la semana")
-plt.ylabel("Cantidad de accidentes")
-plt.xlabel("Día")
-plt.xticks(rotation=45)
-plt.grid(axis="y", linestyle="--", alpha=0.7)
-plt.savefig("accidentes_por_dia.png")
-
-chi2, p = stats.chisquare(accidentes_por_dia)
-print(f"\n¿Los días son diferentes? p = {p:.4f}")
-if p < 0.05:
-    print("RESULTADO: Hay días con más accidentes que otros")
-else:
-    print("RESULTADO: No hay diferencia importante entre días")
-
-plt.figure(figsize=(12, 6))
-sns.boxplot(x="Dia", y="Hora_num", data=datos, palette="pastel")
-plt.title("Horario de accidentes por día")
-plt.ylabel("Hora del día (0-24)")
-plt.xlabel("Día de la semana")
-plt.xticks(rotation=45)
-plt.grid(axis="y", linestyle="--", alpha=0.7)
-plt.savefig("horario_de_accidentes.png")
-
-tabla_tipos = pd.crosstab(datos["Dia"], datos["Tipo_de_accidente"])
-
-plt.figure(figsize=(12, 6))
-sns.heatmap(tabla_tipos, cmap="YlOrRd", annot=True, fmt="d", linewidths=0.5)
-plt.title("Tipos de accidente por día")
-plt.ylabel("Día de la semana")
-plt.xlabel("Tipo de accidente")
-plt.tight_layout()
-plt.savefig("tipos_accidentes_semana.png")
-
-# Ver si los tipos cambian por día
-chi2, p, _, _ = stats.chi2_contingency(tabla_tipos)
-print(f"\n¿Cambian los tipos de accidente por día? p = {p:.4f}")
-if p < 0.05:
-    print("RESULTADO: Sí hay diferencias en los tipos de accidente según el día")
-else:
-    print("RESULTADO: No hay diferencia en los tipos de accidente entre días")
-
-datos["Tipo_dia"] = datos["Dia"].apply(
-    lambda x: "Fin de semana" if x in ["Sábado", "Domingo"] else "Día laboral"
-)
-
-# Comparar cantidad
-plt.figure(figsize=(6, 4))
-datos["Tipo_dia"].value_counts().plot(kind="bar", color=["skyblue", "lightgreen"])
-plt.title("Accidentes: Días laborales vs Fin de semana")
-plt.ylabel("Cantidad de accidentes")
-plt.xticks(rotation=0)
-plt.savefig("accidentes_dias_laborales.png")
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from accidentes.agregacion import Agregador, estadisticas_caja
+from accidentes.carga import cargar_etapa
+from accidentes.constantes import DIAS_ORDEN
+from accidentes.cubo import cargar_cubo
+from accidentes.estadistica import bateria
+from accidentes.graficas import Grafica, renderizar
+from accidentes.instrumentacion import registrar_etapa
+
+
+def dibujar_dias(fig, accidentes_por_dia):
+    ax = fig.subplots()
+    accidentes_por_dia.plot(kind="bar", color="tomato", ax=ax)
+    ax.set_title("Accidentes por día de la semana")
+    ax.set_ylabel("Cantidad de accidentes")
+    ax.set_xlabel("Día")
+    ax.tick_params(axis="x", labelrotation=45)
+    ax.grid(axis="y", linestyle="--", alpha=0.7)
+
+
+def dibujar_cajas(fig, cajas):
+    import seaborn as sns
+
+    ax = fig.subplots()
+    lineas = {"color": "dimgray"}
+    partes = ax.bxp(
+        cajas,
+        widths=0.8,
+        patch_artist=True,
+        boxprops=lineas,
+        whiskerprops=lineas,
+        capprops=lineas,
+        medianprops=lineas,
+    )
+    for caja, color in zip(partes["boxes"], sns.color_palette("pastel", desat=0.75)):
+        caja.set_facecolor(color)
+    ax.set_title("Horario de accidentes por día")
+    ax.set_ylabel("Hora del día (0-24)")
+    ax.set_xlabel("Día de la semana")
+    ax.tick_params(axis="x", labelrotation=45)
+    ax.grid(axis="y", linestyle="--", alpha=0.7)
+
+
+def dibujar_tipos(fig, tabla_tipos):
+    import seaborn as sns
+
+    ax = fig.subplots()
+    sns.heatmap(tabla_tipos, cmap="YlOrRd", annot=True, fmt="d", linewidths=0.5, ax=ax)
+    ax.set_title("Tipos de accidente por día")
+    ax.set_ylabel("Día de la semana")
+    ax.set_xlabel("Tipo de accidente")
+    fig.tight_layout()
+
+
+def dibujar_tipo_dia(fig, accidentes_tipo_dia):
+    ax = fig.subplots()
+    accidentes_tipo_dia.plot(kind="bar", color=["skyblue", "lightgreen"], ax=ax)
+    ax.set_title("Accidentes: Días laborales vs Fin de semana")
+    ax.set_ylabel("Cantidad de accidentes")
+    ax.tick_params(axis="x", labelrotation=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pruebas de hipótesis sobre los accidentes por día, hora y tipo."
+    )
+    parser.add_argument(
+        "--permutaciones",
+        type=int,
+        default=10_000,
+        help="Permutaciones por prueba de la batería; 0 la omite (default: 10000)",
+    )
+    args = parser.parse_args()
+
+    cubo = cargar_etapa(
+        [
+            "Fecha",
+            "Dia",
+            "Dia_num",
+            "Hora_num",
+            "Tipo_de_accidente",
+            "Tipo_simplificado",
+            "Resolucion",
+            "Nombre_de_asentamiento",
+        ],
+        cargador=cargar_cubo,
+    )
+    agregador = Agregador(cubo, pesos="Total")
+
+    # 2. Preparar los días en orden correcto
+    accidentes_por_dia = agregador.agregar("Dia", Total=(None, "count"))[
+        "Total"
+    ].reindex(DIAS_ORDEN, fill_value=0)
+
+    chi2, p = stats.chisquare(accidentes_por_dia)
+    print(f"\n¿Los días son diferentes? p = {p:.4f}")
+    if p < 0.05:
+        print("RESULTADO: Hay días con más accidentes que otros")
+    else:
+        print("RESULTADO: No hay diferencia importante entre días")
+
+    # Cajas calculadas desde los conteos por (día, hora) en lugar de las filas
+    horas_por_dia = agregador.tabla_cruzada("Dia", "Hora_num")
+    dias_presentes = [dia for dia in DIAS_ORDEN if dia in horas_por_dia.index]
+    cajas = [
+        estadisticas_caja(horas_por_dia.columns, horas_por_dia.loc[dia], dia)
+        for dia in dias_presentes
+    ]
+
+    tabla_tipos = agregador.tabla_cruzada("Dia", "Tipo_de_accidente").loc[
+        dias_presentes
+    ]
+
+    # Ver si los tipos cambian por día
+    chi2, p, _, _ = stats.chi2_contingency(tabla_tipos)
+    print(f"\n¿Cambian los tipos de accidente por día? p = {p:.4f}")
+    if p < 0.05:
+        print("RESULTADO: Sí hay diferencias en los tipos de accidente según el día")
+    else:
+        print("RESULTADO: No hay diferencia en los tipos de accidente entre días")
+
+    if args.permutaciones:
+        resultados = bateria(cubo, n_permutaciones=args.permutaciones)
+        resultados.to_csv("csv/pruebas_estadisticas.csv", index=False)
+        print(
+            f"\nBatería de pruebas ({args.permutaciones} permutaciones, "
+            "p ajustados por Holm y Benjamini-Hochberg):"
+        )
+        with pd.option_context("display.width", 200):
+            print(resultados.round(4).to_string(index=False))
+        significativas = resultados[resultados["p_holm"] < 0.05]
+        print(
+            f"\nSignificativas después de corregir (Holm, 0.05): "
+            f"{', '.join(significativas['factores']) or 'ninguna'}"
+        )
+
+    # Los nombres en los datos van sin acento (DIAS_ORDEN)
+    tipo_dia = np.where(
+        cubo["Dia"].isin(DIAS_ORDEN[5:]), "Fin de semana", "Día laboral"
+    )
+    accidentes_tipo_dia = (
+        cubo["Total"]
+        .groupby(tipo_dia)
+        .sum()
+        .sort_values(ascending=False)
+        .rename_axis("Tipo_dia")
+    )
+
+    renderizar(
+        [
+            # p3 dibuja su propio accidentes_por_dia.png
+            Grafica(
+                "accidentes_por_dia_chi2.png",
+                dibujar_dias,
+                accidentes_por_dia,
+                (10, 5),
+            ),
+            Grafica("horario_de_accidentes.png", dibujar_cajas, cajas, (12, 6)),
+            Grafica("tipos_accidentes_semana.png", dibujar_tipos, tabla_tipos, (12, 6)),
+            # Comparar cantidad
+            Grafica(
+                "accidentes_dias_laborales.png",
+                dibujar_tipo_dia,
+                accidentes_tipo_dia,
+                (6, 4),
+            ),
+        ]
+    )
+
+
+if __name__ == "__main__":
+    registrar_etapa()
+    main()
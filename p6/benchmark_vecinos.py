@@ -0,0 +1,120 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.preprocessing import StandardScaler
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from accidentes.carga import cargar_etapa
+from accidentes.clasificacion import CARACTERISTICAS, entrenar, pesos_sobremuestreo
+from accidentes.instrumentacion import registrar_etapa
+from accidentes.vecinos import ClasificadorVecinos, IndiceExacto, IndiceIVF
+
+registrar_etapa()
+
+K = 5
+
+
+def recall(aproximados, exactos):
+    """Fracción de los k vecinos exactos que también regresó el índice"""
+    aciertos = [len(np.intersect1d(a[a >= 0], e)) for a, e in zip(aproximados, exactos)]
+    return np.sum(aciertos) / exactos.size
+
+
+def medir(nombre, modelo, X_train, y_train, pesos, X_test, y_test, exactos=None):
+    inicio = time.perf_counter()
+    entrenar(modelo, X_train, y_train, pesos)
+    construccion = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    y_pred = modelo.predict(X_test)
+    segundos = time.perf_counter() - inicio
+
+    fila = {
+        "backend": nombre,
+        # Puntos guardados: únicos con peso, o las filas copiadas en sklearn
+        "puntos": (
+            len(modelo.pesos_) if hasattr(modelo, "pesos_") else modelo.n_samples_fit_
+        ),
+        "construccion_s": construccion,
+        "consultas_s": len(X_test) / segundos,
+        "exactitud": np.mean(y_pred == y_test),
+    }
+    if exactos is not None:
+        fila["recall@5"] = recall(modelo.kneighbors(X_test)[1], exactos)
+    return fila
+
+
+parser = argparse.ArgumentParser(
+    description="Compara los motores de vecinos del KNN de p6 (recall@5 y consultas/s)."
+)
+parser.add_argument(
+    "--nprobe",
+    type=int,
+    nargs="+",
+    default=[1, 2, 4, 8],
+    help="Valores de nprobe a probar con IVF (default: 1 2 4 8)",
+)
+args = parser.parse_args()
+
+df = cargar_etapa([*CARACTERISTICAS, "Tipo_simplificado"])
+X = df[CARACTERISTICAS].to_numpy("float64")
+y = df["Tipo_simplificado"].astype(str).to_numpy()
+
+# Igual que p6/knn.py: dividir, escalar con el entrenamiento y sobremuestrear
+# con pesos, para que ninguna copia de una consulta esté en el entrenamiento
+X_train, X_test, y_train, y_test = train_test_split(
+    X, y, test_size=0.3, random_state=42, stratify=y
+)
+escalador = StandardScaler().fit(X_train)
+X_train, X_test = escalador.transform(X_train), escalador.transform(X_test)
+pesos = pesos_sobremuestreo(y_train)
+print(
+    f"Entrenamiento: {len(X_train)} filas ({pesos.sum()} con sobremuestreo), "
+    f"consultas: {len(X_test)}"
+)
+
+# Referencia: vecinos exactos sobre el almacén deduplicado, contra el que se
+# mide el recall de los demás backends deduplicados
+exacto = ClasificadorVecinos(IndiceExacto(), n_neighbors=K)
+entrenar(exacto, X_train, y_train, pesos)
+_, exactos = exacto.kneighbors(X_test)
+
+resultados = [
+    medir(
+        "sklearn kd_tree (filas copiadas)",
+        KNeighborsClassifier(
+            n_neighbors=K, weights="distance", metric="manhattan", algorithm="kd_tree"
+        ),
+        X_train,
+        y_train,
+        pesos,
+        X_test,
+        y_test,
+    ),
+    medir(
+        "exacto deduplicado", exacto, X_train, y_train, pesos, X_test, y_test, exactos
+    ),
+]
+for nprobe in args.nprobe:
+    resultados.append(
+        medir(
+            f"ivf int8 nprobe={nprobe}",
+            ClasificadorVecinos(IndiceIVF(nprobe=nprobe), n_neighbors=K),
+            X_train,
+            y_train,
+            pesos,
+            X_test,
+            y_test,
+            exactos,
+        )
+    )
+
+pd.set_option("display.width", 120)
+print(pd.DataFrame(resultados).set_index("backend").round(3).to_string())
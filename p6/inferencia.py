@@ -0,0 +1,41 @@
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from accidentes.clasificacion import RUTA_MODELO, cargar_modelo, puntuar_archivo
+from accidentes.instrumentacion import registrar_etapa
+
+registrar_etapa()
+
+parser = argparse.ArgumentParser(
+    description="Predice el tipo de accidente de reportes nuevos con el KNN guardado."
+)
+parser.add_argument(
+    "archivos", nargs="+", help="CSV o parquet (exportación del portal o ya limpios)"
+)
+parser.add_argument(
+    "--chunksize",
+    type=int,
+    default=50_000,
+    help="Filas por bloque al predecir (default: 50000)",
+)
+parser.add_argument("--modelo", default=RUTA_MODELO, help=f"(default: {RUTA_MODELO})")
+args = parser.parse_args()
+
+try:
+    artefacto = cargar_modelo(args.modelo)
+except (FileNotFoundError, ValueError) as e:
+    print(f"Error al leer el modelo: {e}")
+    sys.exit(1)
+print(f"Modelo cargado (entrenado {artefacto['creado']})")
+
+for archivo in args.archivos:
+    resultado, filas_por_segundo = puntuar_archivo(archivo, artefacto, args.chunksize)
+    salida = Path(archivo).with_name(f"{Path(archivo).stem}_predicciones.csv")
+    resultado.to_csv(salida, index=False)
+    print(
+        f"{archivo}: {len(resultado)} filas ({filas_por_segundo:,.0f} filas/s) -> {salida}"
+    )
+    print(resultado["Prediccion"].value_counts().to_string())
@@ -1,64 +1,104 @@
-import pandas as pd
-from sklearn.neighbors import KNeighborsClassifier
+import argparse
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import classification_report
-from imblearn.over_sampling import RandomOverSampler
 from sklearn.model_selection import train_test_split
+import sys
+from pathlib import Path
 
-try:
-    df = pd.read_csv("csv/accidentes_viales_mty.csv")
-    print("Archivo cargado correctamente :)")
-except Exception as e:
-    print(f"Error al leer archivo: {e}")
-    exit(1)
-
-df = df.drop(
-    columns=[
-        "Folio",
-        "Fecha",
-        "Dia",
-        "Hora",
-        "Tipo_de_accidente",
-        "Resolucion",
-        "Origen_de_reporte",
-        "Tipo_de_asentamiento",
-        "Nombre_de_asentamiento",
-        "Tipo_de_vialidad",
-        "Nombre_de_la_Vialidad",
-        "Georreferencia",
-    ],
-    errors="ignore",
-)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
 
-X = df[
-    [
-        "Dia_num",
-        "Hora_num",
-        "Latitud",
-        "Longitud",
-        "Mes_num",
-        "es_fin_semana",
-        "colonia_alto_riesgo",
-    ]
-]
-y = df["Tipo_simplificado"]
-
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
-
-ros = RandomOverSampler(random_state=42)
-X_res, y_res = ros.fit_resample(X_scaled, y)
-
-X_train, X_test, y_train, y_test = train_test_split(
-    X_res, y_res, test_size=0.3, random_state=42, stratify=y_res
+from accidentes.busqueda import buscar
+from accidentes.carga import cargar_etapa, huella
+from accidentes.clasificacion import (
+    CARACTERISTICAS,
+    INDICES,
+    RUTA_MODELO,
+    crear_artefacto,
+    crear_knn,
+    entrenar,
+    guardar_modelo,
+    pesos_sobremuestreo,
 )
+from accidentes.instrumentacion import registrar_etapa, tramo
+
+REJILLA = {
+    "n_neighbors": [3, 5, 7, 11, 15],
+    "weights": ["uniform", "distance"],
+    "metric": ["manhattan", "euclidean"],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Entrena el KNN de tipo de accidente y guarda el modelo."
+    )
+    parser.add_argument(
+        "--indice",
+        choices=INDICES,
+        default="exacto",
+        help="Búsqueda de vecinos (default: exacto; ver p6/benchmark_vecinos.py)",
+    )
+    parser.add_argument(
+        "--nprobe", type=int, default=4, help="Celdas a revisar con --indice ivf"
+    )
+    parser.add_argument(
+        "--buscar",
+        action="store_true",
+        help="Validación cruzada de una rejilla de hiperparámetros en lugar de entrenar",
+    )
+    parser.add_argument("--folds", type=int, default=5, help="(default: 5)")
+    parser.add_argument(
+        "--procesos", type=int, default=None, help="(default: todos los núcleos)"
+    )
+    args = parser.parse_args()
+
+    df = cargar_etapa([*CARACTERISTICAS, "Nombre_de_asentamiento", "Tipo_simplificado"])
+
+    X = df[CARACTERISTICAS]
+    y = df["Tipo_simplificado"].astype(str)
+
+    if args.buscar:
+        # Cada pliegue ajusta su propio escalador con sus filas de entrenamiento
+        resultados = buscar(
+            "knn",
+            X.to_numpy("float64"),
+            y,
+            REJILLA,
+            n_pliegues=args.folds,
+            procesos=args.procesos,
+        )
+        print(resultados.round(4).to_string())
+        print(f"\nMejores parámetros: {resultados.index[0]}")
+        return
+
+    # Dividir antes de escalar y sobremuestrear: ninguna fila de prueba (ni
+    # copia de ella) llega al entrenamiento
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.3, random_state=42, stratify=y
+    )
+
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X_train)
+    X_test = scaler.transform(X_test)
+
+    # Sobremuestreo como número de copias por fila, sin materializar la matriz
+    pesos = pesos_sobremuestreo(y_train)
+
+    knn = crear_knn(args.indice, args.nprobe)
+    entrenar(knn, X_train, y_train, pesos)
+
+    with tramo("knn.predict", "prediccion", filas=len(X_test)):
+        y_pred = knn.predict(X_test)
+    print(classification_report(y_test, y_pred))
+
+    # Guardar escalador + índice para p6/inferencia.py
+    top_colonias = df.loc[df["colonia_alto_riesgo"] == 1, "Nombre_de_asentamiento"]
+    guardar_modelo(
+        crear_artefacto(scaler, knn, top_colonias.astype(str).unique(), huella())
+    )
+    print(f"Modelo guardado en {RUTA_MODELO}")
 
-knn = KNeighborsClassifier(
-    n_neighbors=5,
-    weights="distance",
-    metric="manhattan",
-)
-knn.fit(X_train, y_train)
 
-y_pred = knn.predict(X_test)
-print(classification_report(y_test, y_pred))
+if __name__ == "__main__":
+    registrar_etapa()
+    main()
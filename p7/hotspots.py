@@ -0,0 +1,147 @@
+import argparse
+import sys
+import time
+import numpy as np
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from accidentes.constantes import DIAS_ORDEN
+from accidentes.espacial import cargar_indice
+from accidentes.graficas import Grafica, renderizar
+from accidentes.instrumentacion import registrar_etapa
+
+
+# Superficie de densidad con los hotspots marcados
+def dibujar_hotspots(fig, datos):
+    from matplotlib.colors import LogNorm
+
+    ax = fig.subplots()
+    superficie = np.where(datos["superficie"] > 0.01, datos["superficie"], np.nan)
+    imagen = ax.imshow(
+        superficie,
+        extent=datos["extension"],
+        origin="lower",
+        aspect="auto",
+        cmap="inferno",
+        norm=LogNorm(),
+    )
+    top = datos["hotspots"]
+    ax.scatter(top["Longitud"], top["Latitud"], marker="x", color="cyan", s=60)
+    for numero, (lat, lon) in enumerate(zip(top["Latitud"], top["Longitud"]), 1):
+        ax.annotate(
+            str(numero),
+            (lon, lat),
+            color="cyan",
+            xytext=(4, 4),
+            textcoords="offset points",
+        )
+    ax.set_title("Densidad de accidentes (kernel gaussiano) y hotspots")
+    ax.set_xlabel("Longitud")
+    ax.set_ylabel("Latitud")
+    fig.colorbar(imagen, ax=ax, label="Accidentes por km²")
+
+
+def consultar(indice, args):
+    hasta = indice.fecha.max()
+    desde = hasta - np.timedelta64(args.dias - 1, "D") if args.dias else None
+    inicio = time.perf_counter()
+    if args.caja:
+        filas = indice.en_caja(*args.caja, desde=desde, hasta=hasta)
+        lugar = f"en la caja {args.caja}"
+    else:
+        filas = indice.en_radio(args.lat, args.lon, args.radio, desde, hasta)
+        lugar = f"a {args.radio:g} m o menos de ({args.lat}, {args.lon})"
+    milisegundos = (time.perf_counter() - inicio) * 1000
+
+    periodo = f"del {desde} al {hasta}" if desde is not None else "en todo el historial"
+    print(f"\n{len(filas)} accidentes {lugar} {periodo} ({milisegundos:.2f} ms)")
+    if len(filas) == 0:
+        return
+    accidentes = indice.filas(filas)
+    print("\nPor tipo:")
+    print(accidentes["Tipo_simplificado"].value_counts().to_string())
+    print("\nPor día:")
+    dias = accidentes["Dia_num"].value_counts().reindex(range(7), fill_value=0)
+    print(dias.set_axis(DIAS_ORDEN).to_string())
+    print("\nMás recientes:")
+    print(
+        accidentes.sort_values("Fecha", ascending=False).head(10).to_string(index=False)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Hotspots de accidentes y consultas por radio o caja sobre la rejilla espacial."
+    )
+    parser.add_argument("--lat", type=float, help="Latitud del punto a consultar")
+    parser.add_argument("--lon", type=float, help="Longitud del punto a consultar")
+    parser.add_argument(
+        "--radio", type=float, default=500, help="Radio en metros (default: 500)"
+    )
+    parser.add_argument(
+        "--caja",
+        type=float,
+        nargs=4,
+        metavar=("LAT_MIN", "LON_MIN", "LAT_MAX", "LON_MAX"),
+        help="Consultar una caja en lugar de un radio",
+    )
+    parser.add_argument(
+        "--dias",
+        type=int,
+        default=30,
+        help="Últimos días del historial a consultar; 0 = todo (default: 30)",
+    )
+    parser.add_argument(
+        "--ancho-banda",
+        type=float,
+        default=300,
+        help="Desviación del kernel en metros (default: 300)",
+    )
+    parser.add_argument(
+        "--top", type=int, default=10, help="Hotspots a mostrar (default: 10)"
+    )
+    args = parser.parse_args()
+    if (args.lat is None) != (args.lon is None):
+        parser.error("--lat y --lon van juntos")
+
+    try:
+        indice = cargar_indice()
+    except Exception as e:
+        print(f"Error al leer archivo: {e}")
+        sys.exit(1)
+    print(
+        f"Índice espacial: {indice.inicios[-1]} accidentes en {len(indice.celdas)} celdas"
+    )
+
+    if args.caja or args.lat is not None:
+        consultar(indice, args)
+
+    try:
+        hotspots = indice.hotspots(args.top, args.ancho_banda)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f"\nHotspots (ancho de banda {args.ancho_banda:g} m):")
+    print(hotspots.round(6).to_string(index=False))
+
+    superficie, _, extension = indice.densidad(args.ancho_banda)
+    renderizar(
+        [
+            Grafica(
+                "hotspots.png",
+                dibujar_hotspots,
+                {
+                    "superficie": superficie,
+                    "extension": extension,
+                    "hotspots": hotspots,
+                },
+                (10, 10),
+            )
+        ]
+    )
+
+
+if __name__ == "__main__":
+    registrar_etapa()
+    main()
@@ -1,65 +1,253 @@
+import argparse
 import pandas as pd
 import numpy as np
 from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
-import matplotlib.pyplot as plt
+import sys
+from pathlib import Path
 
-try:
-    df = pd.read_csv("csv/accidentes_viales_mty.csv")
-    print("Archivo cargado correctamente :)")
-except Exception as e:
-    print(f"Error al leer archivo: {e}")
-    exit(1)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
 
+from accidentes import agrupamiento, calidad
+from accidentes.busqueda import buscar
+from accidentes.carga import cargar_etapa
+from accidentes.graficas import Grafica, imagen_densidad, rasterizar, renderizar
+from accidentes.instrumentacion import registrar_etapa, tramo
 
-def categorizar_hora(hora):
-    if 0 <= hora < 6:
-        return 0  # madrugada
-    elif 6 <= hora < 12:
-        return 1  # mañana
-    elif 12 <= hora < 18:
-        return 2  # tarde
-    else:
-        return 3  # noche
+# En modo auto, arriba de estos puntos el mapa se dibuja por densidad
+MAX_PUNTOS = 20_000
 
 
-df["grupo_horario"] = df["Hora_num"].apply(categorizar_hora)
+# Visualizar clusters en mapa
+def dibujar_clusters(fig, puntos):
+    ax = fig.subplots()
+    dispersion = ax.scatter(
+        puntos["Longitud"],
+        puntos["Latitud"],
+        c=puntos["Cluster"],
+        cmap="tab20",
+        alpha=0.6,
+    )
+    ax.set_title("Distribución Geográfica de Clusters de Accidentes")
+    ax.set_xlabel("Longitud")
+    ax.set_ylabel("Latitud")
+    fig.colorbar(dispersion, ax=ax, label="ID del Cluster")
+
 
-X = df[["Latitud", "Longitud", "es_fin_semana", "grupo_horario"]]
+# Mismo mapa rasterizado: color del cluster dominante en cada celda y opacidad
+# según el número de accidentes
+def dibujar_densidad(fig, datos):
+    from matplotlib import colormaps
+    from matplotlib.cm import ScalarMappable
+    from matplotlib.colors import Normalize
 
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
+    ax = fig.subplots()
+    norm = Normalize(0, len(datos["conteos"]) - 1)
+    cmap = colormaps["tab20"]
+    ax.imshow(
+        imagen_densidad(datos["conteos"], cmap, norm),
+        extent=datos["extension"],
+        origin="lower",
+        aspect="auto",
+        interpolation="nearest",
+    )
+    ax.set_title("Distribución Geográfica de Clusters de Accidentes")
+    ax.set_xlabel("Longitud")
+    ax.set_ylabel("Latitud")
+    fig.colorbar(ScalarMappable(norm, cmap), ax=ax, label="ID del Cluster")
 
-# Usar un número fijo de clusters (11 basado en tipos de accidente)
-n_clusters = 11
-kmeans = KMeans(n_clusters=n_clusters, random_state=42)
-clusters = kmeans.fit_predict(X_scaled)
 
-df["Cluster"] = clusters
+def grafica_clusters(df, n_clusters, modo):
+    if modo == "auto":
+        modo = "puntos" if len(df) <= MAX_PUNTOS else "densidad"
+    if modo == "puntos":
+        return Grafica(
+            "clusters.png",
+            dibujar_clusters,
+            df[["Longitud", "Latitud", "Cluster"]],
+            (12, 8),
+        )
+    return grafica_densidad(
+        *rasterizar(df["Longitud"], df["Latitud"], df["Cluster"], n_clusters)
+    )
 
-# Visualizar clusters en mapa
-plt.figure(figsize=(12, 8))
-plt.scatter(df["Longitud"], df["Latitud"], c=df["Cluster"], cmap="tab20", alpha=0.6)
-plt.title("Distribución Geográfica de Clusters de Accidentes")
-plt.xlabel("Longitud")
-plt.ylabel("Latitud")
-plt.colorbar(label="ID del Cluster")
-plt.savefig("clusters.png")
-
-# Perfiles de los clusters
-perfiles_cluster = (
-    df.groupby("Cluster")
-    .agg(
-        {
-            "Tipo_simplificado": lambda x: x.mode()[0],
-            "es_fin_semana": "mean",
-            "grupo_horario": lambda x: x.mode()[0],
-            "Latitud": "mean",
-            "Longitud": "mean",
-        }
+
+def grafica_densidad(conteos, extension):
+    return Grafica(
+        "clusters.png",
+        dibujar_densidad,
+        {"conteos": conteos, "extension": extension},
+        (12, 8),
+    )
+
+
+# Entrenamiento por lotes sobre el parquet: memoria acotada al tamaño del lote
+def main_minibatch(args):
+    escalador, extension, muestra = agrupamiento.explorar()
+    print(f"Muestra para evaluar k: {len(muestra)} filas")
+
+    curva, modelo = agrupamiento.seleccionar_k(
+        range(args.k_min, args.k_max + 1),
+        escalador,
+        muestra,
+        epocas=args.epocas,
+        procesos=args.procesos,
+    )
+    print("\nCurva de selección de k:")
+    print(curva)
+    print(f"\nk elegido (mejor silueta): {modelo.n_clusters}")
+
+    agrupamiento.guardar_modelo(escalador, modelo, curva)
+    print(f"Modelo guardado en {agrupamiento.RUTA_MODELO}")
+
+    conteos, perfiles_cluster = agrupamiento.resumir(
+        agrupamiento.cargar_modelo(), extension
+    )
+    renderizar([grafica_densidad(conteos, extension)])
+
+    print("\nPerfiles de los Clusters:")
+    print(perfiles_cluster)
+
+
+# Asignar clusters a accidentes nuevos con los centroides guardados
+def main_predecir(args):
+    ruta = Path(args.predecir)
+    try:
+        artefacto = agrupamiento.cargar_modelo()
+        if ruta.suffix == ".parquet":
+            nuevos = pd.read_parquet(ruta)
+        else:
+            nuevos = pd.read_csv(ruta)
+    except FileNotFoundError as e:
+        print(f"Error al leer archivo: {e}")
+        sys.exit(1)
+
+    try:
+        nuevos["Cluster"] = agrupamiento.predecir(nuevos, artefacto)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    salida = ruta.with_name(f"{ruta.stem}_clusters.csv")
+    nuevos.to_csv(salida, index=False)
+    print(f"Clusters asignados a {len(nuevos)} accidentes en {salida}")
+    print(nuevos["Cluster"].value_counts().sort_index())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Agrupa los accidentes con k-means y dibuja el mapa de clusters."
     )
-    .sort_values("grupo_horario")
-)
+    parser.add_argument(
+        "--modo",
+        choices=["auto", "densidad", "puntos"],
+        default="auto",
+        help=(
+            "puntos: un marcador por accidente; densidad: rejilla rasterizada de "
+            f"tamaño fijo; auto: puntos hasta {MAX_PUNTOS} filas (default: auto)"
+        ),
+    )
+    parser.add_argument(
+        "--minibatch",
+        action="store_true",
+        help="Entrena MiniBatchKMeans por lotes y elige k con la silueta",
+    )
+    parser.add_argument("--k-min", type=int, default=4, help="(default: 4)")
+    parser.add_argument("--k-max", type=int, default=16, help="(default: 16)")
+    parser.add_argument(
+        "--epocas",
+        type=int,
+        default=1,
+        help="Pasadas sobre el parquet en modo minibatch (default: 1)",
+    )
+    parser.add_argument(
+        "--buscar",
+        action="store_true",
+        help="Validación cruzada de n_clusters entre --k-min y --k-max",
+    )
+    parser.add_argument("--folds", type=int, default=5, help="(default: 5)")
+    parser.add_argument(
+        "--procesos", type=int, default=None, help="(default: todos los núcleos)"
+    )
+    parser.add_argument(
+        "--predecir",
+        metavar="ARCHIVO",
+        help="CSV o parquet con accidentes nuevos a los que asignar cluster",
+    )
+    args = parser.parse_args()
+
+    if args.predecir:
+        main_predecir(args)
+        return
+    if args.minibatch:
+        main_minibatch(args)
+        return
+
+    df = cargar_etapa(
+        [
+            "Folio",
+            "Latitud",
+            "Longitud",
+            "es_fin_semana",
+            "grupo_horario",
+            "Tipo_simplificado",
+        ]
+    )
+
+    # Sin coordenadas fuera de la zona ni reportes duplicados (p1/calidad.py)
+    filas = len(df)
+    df = calidad.descartar(df)
+    if len(df) < filas:
+        print(f"Accidentes marcados por la revisión de calidad: {filas - len(df)}")
+
+    # Códigos 0-3: madrugada, mañana, tarde, noche
+    df["grupo_horario"] = df["grupo_horario"].cat.codes
+
+    X = df[["Latitud", "Longitud", "es_fin_semana", "grupo_horario"]]
+
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    if args.buscar:
+        resultados = buscar(
+            "kmeans",
+            X_scaled,
+            rejilla={"n_clusters": list(range(args.k_min, args.k_max + 1))},
+            n_pliegues=args.folds,
+            procesos=args.procesos,
+        )
+        print(resultados.round(4).to_string())
+        print(f"\nMejores parámetros: {resultados.index[0]}")
+        return
+
+    # Usar un número fijo de clusters (11 basado en tipos de accidente)
+    n_clusters = 11
+    kmeans = KMeans(n_clusters=n_clusters, random_state=42)
+    with tramo("kmeans.fit_predict", "ajuste", filas=len(X_scaled)):
+        clusters = kmeans.fit_predict(X_scaled)
+
+    df["Cluster"] = clusters
+
+    renderizar([grafica_clusters(df, n_clusters, args.modo)])
+
+    # Perfiles de los clusters
+    perfiles_cluster = (
+        df.groupby("Cluster")
+        .agg(
+            {
+                "Tipo_simplificado": lambda x: x.mode()[0],
+                "es_fin_semana": "mean",
+                "grupo_horario": lambda x: x.mode()[0],
+                "Latitud": "mean",
+                "Longitud": "mean",
+            }
+        )
+        .sort_values("grupo_horario")
+    )
+
+    print("\nPerfiles de los Clusters:")
+    print(perfiles_cluster)
+
 
-print("\nPerfiles de los Clusters:")
-print(perfiles_cluster)
+if __name__ == "__main__":
+    registrar_etapa()
+    main()
@@ -1,90 +1,194 @@
-from sklearn.linear_model import LinearRegression
+import argparse
 import sys
 import pandas as pd
-import matplotlib.pyplot as plt
-from sklearn.metrics import r2_score
-import matplotlib.dates as mdates
-
-try:
-    df = pd.read_csv("csv/accidentes_viales_mty.csv")
-except Exception as e:
-    print(f"Error al leer archivo: {e}")
-    sys.exit(1)
-else:
-    print("Archivo cargado correctamente :)")
-
-# Preparar serie de tiempo (accidentes por fecha)
-df["Fecha"] = pd.to_datetime(df["Fecha"])
-ts_data = df.groupby("Fecha").size().reset_index(name="Accidentes")
-
-# Crear variables de tiempo
-ts_data["Dia_num"] = (ts_data["Fecha"] - ts_data["Fecha"].min()).dt.days
-
-# Modelo de regresión para pronóstico
-X = ts_data[["Dia_num"]]
-y = ts_data["Accidentes"]
-modelo_ts = LinearRegression()
-modelo_ts.fit(X, y)
-
-# Pronóstico para los próximos 7 días
-ultima_fecha = ts_data["Dia_num"].max()
-ultimo_dia_real = ts_data["Fecha"].max()
-futuro = pd.DataFrame({"Dia_num": range(ultima_fecha + 1, ultima_fecha + 8)})
-futuro["Prediccion"] = modelo_ts.predict(futuro[["Dia_num"]])
-futuro["Fecha"] = pd.date_range(start=ultimo_dia_real, periods=8)[1:]
+from pathlib import Path
 
-# Crear figura con dos gráficos
-fig, (ax1, ax2) = plt.subplots(
-    2, 1, figsize=(12, 10), gridspec_kw={"height_ratios": [2, 1]}
-)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
 
-# Gráfico 1: Serie temporal completa
-ax1.plot(ts_data["Fecha"], y, label="Datos reales")
-ax1.plot(
-    futuro["Fecha"],
-    futuro["Prediccion"],
-    "r--",
-    label="Pronóstico",
+from accidentes.carga import cargar_etapa
+from accidentes.cubo import cargar_cubo
+from accidentes.graficas import Grafica, renderizar
+from accidentes.instrumentacion import registrar_etapa
+from accidentes.pronostico import (
+    backtest,
+    matriz_series,
+    modelos,
+    pronosticar,
+    pronosticar_lote,
+    serie_diaria,
+    serie_horaria,
 )
-ax1.set_title("Serie Temporal Completa con Pronóstico")
-ax1.set_xlabel("Fecha")
-ax1.set_ylabel("Número de Accidentes")
-ax1.legend()
-ax1.grid(True)
-
-# Gráfico 2: Solo los últimos 30 días y el pronóstico
-# Filtrar solo los últimos 30 días de datos reales
-ultimos_30 = ts_data[ts_data["Fecha"] >= ts_data["Fecha"].max() - pd.Timedelta(days=30)]
-
-ax2.plot(ultimos_30["Fecha"], ultimos_30["Accidentes"], "b-", label="Últimos 30 días")
-ax2.plot(
-    futuro["Fecha"],
-    futuro["Prediccion"],
-    "r--",
-    marker="o",
-    label="Pronóstico (7 días)",
-)
-ax2.set_title("Detalle: Últimos 30 días y Pronóstico")
-ax2.set_xlabel("Fecha")
-ax2.set_ylabel("Número de Accidentes")
-ax2.legend()
-ax2.grid(True)
-
-# Mejorar formato de fechas en el eje x
-for ax in [ax1, ax2]:
-    ax.xaxis.set_major_formatter(mdates.DateFormatter("%d-%m-%Y"))
-    plt.setp(ax.xaxis.get_majorticklabels(), rotation=45)
-
-plt.tight_layout()
-plt.savefig("pronostico_accidentes.png")
-
-# Mostrar tabla con los valores pronosticados
-print("\nValores pronosticados para los próximos 7 días:")
-tabla_pronostico = futuro[["Fecha", "Prediccion"]].copy()
-tabla_pronostico["Fecha"] = tabla_pronostico["Fecha"].dt.strftime("%d-%m-%Y")
-tabla_pronostico["Prediccion"] = tabla_pronostico["Prediccion"].round(1)
-print(tabla_pronostico.to_string(index=False))
-
-# Evaluación del modelo
-r2_ts = r2_score(y, modelo_ts.predict(X))
-print(f"\nR² del modelo de serie de tiempo: {r2_ts:.4f}")
+
+# Horizonte, primer origen del backtest y separación entre orígenes
+CONFIGURACION = {
+    "diaria": {"horizonte": 7, "inicio": 365, "paso": 1},
+    "horaria": {"horizonte": 24, "inicio": 24 * 90, "paso": 24},
+}
+
+# --por -> columna del cubo que separa las series
+SERIES_POR = {"colonia": "Nombre_de_asentamiento", "tipo": "Tipo_simplificado"}
+
+
+# Crear figura con dos gráficos
+def dibujar_pronostico(fig, datos):
+    import matplotlib.dates as mdates
+
+    serie, futuro = datos["serie"], datos["futuro"]
+    ax1, ax2 = fig.subplots(2, 1, gridspec_kw={"height_ratios": [2, 1]})
+
+    # Gráfico 1: Serie temporal completa
+    ax1.plot(serie.index, serie, label="Datos reales")
+    ax1.plot(futuro.index, futuro["Prediccion"], "r--", label="Pronóstico")
+    ax1.set_title("Serie Temporal Completa con Pronóstico")
+    ax1.set_xlabel("Fecha")
+    ax1.set_ylabel("Número de Accidentes")
+    ax1.legend()
+    ax1.grid(True)
+
+    # Gráfico 2: Solo los últimos 30 días y el pronóstico con su intervalo
+    ultimos_30 = serie[serie.index >= serie.index.max() - pd.Timedelta(days=30)]
+
+    ax2.plot(ultimos_30.index, ultimos_30, "b-", label="Últimos 30 días")
+    ax2.plot(
+        futuro.index,
+        futuro["Prediccion"],
+        "r--",
+        marker="o",
+        label=f"Pronóstico ({len(futuro)} pasos)",
+    )
+    ax2.fill_between(
+        futuro.index,
+        futuro["Inferior"],
+        futuro["Superior"],
+        color="red",
+        alpha=0.15,
+        label="Intervalo 95% (backtest)",
+    )
+    ax2.set_title("Detalle: Últimos 30 días y Pronóstico")
+    ax2.set_xlabel("Fecha")
+    ax2.set_ylabel("Número de Accidentes")
+    ax2.legend()
+    ax2.grid(True)
+
+    # Mejorar formato de fechas en el eje x
+    for ax in [ax1, ax2]:
+        ax.xaxis.set_major_formatter(mdates.DateFormatter("%d-%m-%Y"))
+        ax.tick_params(axis="x", labelrotation=45)
+
+    fig.tight_layout()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compara modelos de pronóstico con backtest y pronostica accidentes."
+    )
+    parser.add_argument(
+        "--frecuencia",
+        choices=list(CONFIGURACION),
+        default="diaria",
+        help="Serie por día o por hora (default: diaria)",
+    )
+    parser.add_argument("--horizonte", type=int, help="Pasos a pronosticar")
+    parser.add_argument(
+        "--inicio", type=int, help="Pasos de historia del primer origen"
+    )
+    parser.add_argument("--paso", type=int, help="Pasos entre orígenes del backtest")
+    parser.add_argument(
+        "--por",
+        choices=list(SERIES_POR),
+        help="Una serie diaria por colonia o por tipo, pronosticadas en lote",
+    )
+    args = parser.parse_args()
+    configuracion = {
+        clave: valor if getattr(args, clave) is None else getattr(args, clave)
+        for clave, valor in CONFIGURACION[args.frecuencia].items()
+    }
+
+    if args.por:
+        if args.frecuencia != "diaria":
+            parser.error("--por solo está disponible con la frecuencia diaria")
+        try:
+            main_por_serie(SERIES_POR[args.por], configuracion)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        return
+
+    cubo = cargar_etapa(["Fecha", "Hora_num"], cargador=cargar_cubo)
+
+    # Serie completa: los días (u horas) sin accidentes cuentan como cero
+    if args.frecuencia == "diaria":
+        serie = serie_diaria(cubo)
+    else:
+        serie = serie_horaria(cubo)
+
+    candidatos = modelos(args.frecuencia)
+    try:
+        resumen, rmse_por_paso = backtest(serie, candidatos, **configuracion)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(
+        f"\nBacktest con origen móvil ({resumen.attrs['origenes']} orígenes, "
+        f"horizonte {configuracion['horizonte']}):"
+    )
+    print(resumen.round(3).to_string())
+
+    mejor = resumen.index[0]
+    print(f"\nMejor modelo fuera de muestra: {mejor}")
+    futuro = pronosticar(
+        serie, candidatos[mejor], configuracion["horizonte"], rmse_por_paso[mejor]
+    )
+
+    renderizar(
+        [
+            Grafica(
+                "pronostico_accidentes.png",
+                dibujar_pronostico,
+                {"serie": serie, "futuro": futuro},
+                (12, 10),
+            )
+        ]
+    )
+
+    # Mostrar tabla con los valores pronosticados
+    formato = "%d-%m-%Y" if args.frecuencia == "diaria" else "%d-%m-%Y %H:%M"
+    print(f"\nValores pronosticados para los próximos {len(futuro)} pasos:")
+    tabla_pronostico = futuro.round(1).reset_index()
+    tabla_pronostico["Fecha"] = tabla_pronostico["Fecha"].dt.strftime(formato)
+    print(tabla_pronostico.to_string(index=False))
+
+
+def main_por_serie(columna, configuracion):
+    """Backtest y pronóstico de todas las series de `columna` en una sola tabla"""
+    cubo = cargar_etapa(["Fecha", columna], cargador=cargar_cubo)
+    matriz = matriz_series(cubo, columna)
+    print(f"\n{matriz.shape[1]} series de {matriz.shape[0]} días ({columna})")
+
+    tabla = pronosticar_lote(matriz, modelos("diaria"), **configuracion)
+    ruta = f"csv/pronostico_{columna.lower()}.csv"
+    tabla.round(3).to_csv(ruta, index=False)
+    print(f"Pronósticos guardados en {ruta}")
+
+    # Una fila por serie: modelo elegido y total esperado en el horizonte
+    resumen = tabla.groupby(columna, sort=False).agg(
+        modelo=("modelo", "first"),
+        MAE_backtest=("MAE_backtest", "first"),
+        Total_pronosticado=("Prediccion", "sum"),
+    )
+    print("\nModelo elegido por serie:")
+    print(resumen["modelo"].value_counts().to_string())
+    print(
+        f"\nSeries con más accidentes esperados en {configuracion['horizonte']} días:"
+    )
+    print(
+        resumen.sort_values("Total_pronosticado", ascending=False)
+        .head(10)
+        .round(2)
+        .to_string()
+    )
+
+
+if __name__ == "__main__":
+    registrar_etapa()
+    main()
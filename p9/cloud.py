@@ -1,50 +1,156 @@
-from wordcloud import WordCloud
-from collections import Counter
-import pandas as pd
+import argparse
 import numpy as np
-import matplotlib.pyplot as plt
-
-try:
-    df = pd.read_csv("csv/accidentes_viales_mty.csv")
-except Exception as e:
-    print(f"Error al leer archivo: {e}")
-    sys.exit(1)
-else:
-    print("Archivo cargado correctamente :)")
-
-# Preparar el texto (combinamos tipo de accidente y colonia)
-text_data = df["Tipo_de_accidente"].str.cat(df["Nombre_de_asentamiento"], sep=" ")
-
-# Contar frecuencias de palabras
-all_text = " ".join(text_data).lower()
-word_counts = Counter(all_text.split())
-
-# Filtrar palabras irrelevantes (personalizable)
-stopwords_es = {"de", "la", "en", "y", "del", "los", "las", "el", "por", "con"}
-filtered_words = {
-    word: count
-    for word, count in word_counts.items()
-    if word not in stopwords_es and len(word) > 3
+import pandas as pd
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from accidentes.caracteristicas import GRUPOS_HORARIO, grupo_horario
+from accidentes.carga import cargar_etapa
+from accidentes.cubo import cargar_cubo
+from accidentes.frecuencias import LONGITUD_MINIMA, STOPWORDS, frecuencias
+from accidentes.graficas import Grafica, renderizar
+from accidentes.instrumentacion import registrar_etapa
+
+COLUMNAS_TEXTO = ["Tipo_de_accidente", "Nombre_de_asentamiento"]
+
+# --por -> columna del cubo con la que se separan las nubes
+FACETAS = {
+    "dia": "Dia",
+    "horario": "grupo_horario",
+    "colonia": "Nombre_de_asentamiento",
 }
 
-wordcloud = WordCloud(
-    width=800, height=400, background_color="white", colormap="viridis", max_words=50
-).generate_from_frequencies(filtered_words)
 
-plt.figure(figsize=(12, 8))
-plt.imshow(wordcloud, interpolation="bilinear")
-plt.axis("off")
-plt.title("Palabras más frecuentes en reportes de accidentes", pad=20, size=16)
-plt.savefig("palabras_frecuentes_accidentes.png")
+def dibujar_palabras(fig, filtered_words):
+    from wordcloud import WordCloud
+
+    wordcloud = WordCloud(
+        width=800,
+        height=400,
+        background_color="white",
+        colormap="viridis",
+        max_words=50,
+    ).generate_from_frequencies(filtered_words)
+
+    ax = fig.subplots()
+    ax.imshow(wordcloud, interpolation="bilinear")
+    ax.axis("off")
+    ax.set_title("Palabras más frecuentes en reportes de accidentes", pad=20, size=16)
+
 
 # Versión alternativa: solo tipos de accidente
-tipo_counts = df["Tipo_de_accidente"].value_counts().to_dict()
-wordcloud_tipos = WordCloud(
-    width=600, height=300, background_color="white"
-).generate_from_frequencies(tipo_counts)
-
-plt.figure(figsize=(10, 5))
-plt.imshow(wordcloud_tipos, interpolation="bilinear")
-plt.axis("off")
-plt.title("Tipos de accidente más frecuentes", pad=15, size=14)
-plt.savefig("tipos_accidentes_frecuentes.png")
+def dibujar_tipos(fig, tipo_counts):
+    from wordcloud import WordCloud
+
+    wordcloud_tipos = WordCloud(
+        width=600, height=300, background_color="white"
+    ).generate_from_frequencies(tipo_counts)
+
+    ax = fig.subplots()
+    ax.imshow(wordcloud_tipos, interpolation="bilinear")
+    ax.axis("off")
+    ax.set_title("Tipos de accidente más frecuentes", pad=15, size=14)
+
+
+# Una nube por valor de la faceta
+def dibujar_facetas(fig, tabla):
+    from wordcloud import WordCloud
+
+    columnas = 2
+    filas = int(np.ceil(len(tabla) / columnas))
+    ejes = np.atleast_1d(fig.subplots(filas, columnas)).ravel()
+    for ax, (faceta, conteos) in zip(ejes, tabla.iterrows()):
+        palabras = conteos[conteos > 0].to_dict()
+        if palabras:
+            nube = WordCloud(
+                width=600, height=300, background_color="white", max_words=30
+            ).generate_from_frequencies(palabras)
+            ax.imshow(nube, interpolation="bilinear")
+        ax.set_title(str(faceta), size=12)
+    for ax in ejes:
+        ax.axis("off")
+    fig.suptitle(f"Palabras más frecuentes por {tabla.index.name}", size=16)
+    fig.tight_layout()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Nubes de palabras de los tipos de accidente y las colonias."
+    )
+    parser.add_argument(
+        "--por",
+        choices=list(FACETAS),
+        help="Además, una nube por día, grupo horario o colonia",
+    )
+    parser.add_argument(
+        "--max-facetas",
+        type=int,
+        default=8,
+        help="Facetas con más accidentes a dibujar (default: 8)",
+    )
+    parser.add_argument(
+        "--stopwords",
+        nargs="*",
+        default=[],
+        help="Palabras a ignorar además de las comunes en español",
+    )
+    parser.add_argument(
+        "--longitud-minima",
+        type=int,
+        default=LONGITUD_MINIMA,
+        help=f"Letras mínimas por palabra (default: {LONGITUD_MINIMA})",
+    )
+    args = parser.parse_args()
+
+    # El cubo trae cada combinación distinta una vez con su número de accidentes
+    cubo = cargar_etapa(["Dia", "Hora_num", *COLUMNAS_TEXTO], cargador=cargar_cubo)
+    cubo["grupo_horario"] = pd.Categorical.from_codes(
+        grupo_horario(cubo["Hora_num"]), categories=GRUPOS_HORARIO
+    )
+
+    # Filtrar palabras irrelevantes (personalizable)
+    filtro = {
+        "stopwords": STOPWORDS | {palabra.lower() for palabra in args.stopwords},
+        "longitud_minima": args.longitud_minima,
+    }
+    filtered_words = frecuencias(
+        cubo, COLUMNAS_TEXTO, pesos="Total", **filtro
+    ).to_dict()
+
+    tipo_counts = (
+        cubo.groupby("Tipo_de_accidente", observed=True)["Total"]
+        .sum()
+        .sort_values(ascending=False, kind="stable")
+        .to_dict()
+    )
+
+    graficas = [
+        Grafica(
+            "palabras_frecuentes_accidentes.png",
+            dibujar_palabras,
+            filtered_words,
+            (12, 8),
+        ),
+        Grafica("tipos_accidentes_frecuentes.png", dibujar_tipos, tipo_counts, (10, 5)),
+    ]
+    if args.por:
+        tabla = frecuencias(
+            cubo, COLUMNAS_TEXTO, por=FACETAS[args.por], pesos="Total", **filtro
+        )
+        tabla = tabla.loc[tabla.sum(axis=1).nlargest(args.max_facetas).index]
+        graficas.append(
+            Grafica(
+                f"palabras_por_{args.por}.png",
+                dibujar_facetas,
+                tabla,
+                (14, 4 * int(np.ceil(len(tabla) / 2))),
+            )
+        )
+    renderizar(graficas)
+
+
+if __name__ == "__main__":
+    registrar_etapa()
+    main()
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from accidentes import agregacion
+from accidentes.agregacion import Agregador, estadisticas_caja
+
+
+@pytest.fixture
+def df():
+    generador = np.random.default_rng(3)
+    n = 400
+    return pd.DataFrame(
+        {
+            "grupo": generador.choice(["a", "b", "c", "d"], n),
+            # Pocas categorías: hay empates en la moda de algunos grupos
+            "valor": generador.choice(["x", "y", "z", None], n),
+            "numero": np.where(
+                generador.random(n) < 0.1, np.nan, generador.integers(0, 50, n)
+            ),
+            "peso": generador.integers(1, 4, n),
+        }
+    )
+
+
+def _moda_pandas(serie):
+    modas = serie.mode()
+    return modas.iloc[0] if len(modas) else None
+
+
+@pytest.mark.parametrize("densa", [True, False])
+def test_moda_igual_a_pandas(df, densa, monkeypatch):
+    if not densa:
+        monkeypatch.setattr(agregacion, "MAX_CELDAS_DENSAS", 0)
+    resultado = Agregador(df).agregar("grupo", moda=("valor", "moda"))
+    esperado = df.groupby("grupo")["valor"].agg(_moda_pandas)
+    assert resultado["moda"].tolist() == esperado.tolist()
+
+
+def test_moda_con_empate_elige_el_menor():
+    df = pd.DataFrame({"grupo": ["a"] * 4, "valor": ["z", "y", "z", "y"]})
+    assert Agregador(df).agregar("grupo", m=("valor", "moda"))["m"].iloc[0] == "y"
+
+
+def test_conteo_y_media_igual_a_pandas(df):
+    resultado = Agregador(df).agregar(
+        "grupo", filas=(None, "count"), n=("numero", "count"), media=("numero", "mean")
+    )
+    esperado = df.groupby("grupo").agg(
+        filas=("grupo", "size"), n=("numero", "count"), media=("numero", "mean")
+    )
+    np.testing.assert_array_equal(resultado["filas"], esperado["filas"])
+    np.testing.assert_array_equal(resultado["n"], esperado["n"])
+    np.testing.assert_allclose(resultado["media"], esperado["media"])
+
+
+@pytest.mark.parametrize("densa", [True, False])
+def test_pesos_igual_a_expandir_filas(df, densa, monkeypatch):
+    if not densa:
+        monkeypatch.setattr(agregacion, "MAX_CELDAS_DENSAS", 0)
+    expandido = df.loc[df.index.repeat(df["peso"])]
+    especificaciones = {
+        "n": ("numero", "count"),
+        "media": ("numero", "mean"),
+        "moda": ("valor", "moda"),
+    }
+    ponderado = Agregador(df, pesos="peso").agregar("grupo", **especificaciones)
+    esperado = Agregador(expandido).agregar("grupo", **especificaciones)
+    pd.testing.assert_frame_equal(ponderado, esperado, check_dtype=False)
+
+
+def test_tabla_cruzada_igual_a_pandas(df):
+    resultado = Agregador(df).tabla_cruzada("grupo", "valor")
+    esperado = df.groupby(["grupo", "valor"]).size().unstack(fill_value=0)
+    pd.testing.assert_frame_equal(resultado, esperado, check_dtype=False)
+
+
+def test_caja_igual_a_percentiles_expandidos():
+    valores, pesos = np.array([3.0, 1.0, 2.0, 40.0]), np.array([5, 2, 4, 1])
+    expandido = np.repeat(valores, pesos)
+    caja = estadisticas_caja(valores, pesos)
+    q1, mediana, q3 = np.percentile(expandido, [25, 50, 75])
+    assert (caja["q1"], caja["med"], caja["q3"]) == pytest.approx((q1, mediana, q3))
+    assert caja["mean"] == pytest.approx(expandido.mean())
+    assert caja["fliers"].tolist() == [40.0]
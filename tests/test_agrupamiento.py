@@ -0,0 +1,74 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from accidentes import agrupamiento
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    """Dos zonas separadas y una fila con latitud y longitud intercambiadas"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "csv").mkdir()
+    generador = np.random.default_rng(5)
+    n = 600
+    centro = np.where(generador.random(n) < 0.5, 25.65, 25.75)
+    df = pd.DataFrame(
+        {
+            "Folio": np.arange(n).astype(str),
+            "Latitud": centro + generador.normal(0, 0.005, n),
+            "Longitud": -100.3 + generador.normal(0, 0.005, n),
+            "es_fin_semana": generador.integers(0, 2, n),
+            "grupo_horario": generador.choice(agrupamiento.GRUPOS_HORARIO, n),
+        }
+    )
+    df.loc[0, ["Latitud", "Longitud"]] = [-100.3, 25.7]
+    ruta = tmp_path / "dataset.parquet"
+    ruta.mkdir()
+    df.iloc[:250].to_parquet(ruta / "parte-0.parquet")
+    df.iloc[250:].to_parquet(ruta / "parte-1.parquet")
+    return str(ruta)
+
+
+def test_lotes_respetan_tamano_y_descartan_marcados(dataset):
+    pd.DataFrame({"Folio": ["0"]}).to_csv("csv/calidad_marcas.csv", index=False)
+    tamanos = [len(df) for df in agrupamiento.lotes(tamano=200, ruta=dataset)]
+    # 599 filas válidas: todos los lotes llegan a 200 salvo el último
+    assert sum(tamanos) == 599
+    assert all(tamano >= 200 for tamano in tamanos[:-1])
+    latitudes = pd.concat(agrupamiento.lotes(ruta=dataset))["Latitud"]
+    assert latitudes.min() > 25
+
+
+def test_seleccionar_k_igual_en_serie_y_en_paralelo(dataset):
+    escalador, _, muestra = agrupamiento.explorar(ruta=dataset)
+    serie, modelo = agrupamiento.seleccionar_k(
+        [2, 3], escalador, muestra, procesos=1, ruta=dataset
+    )
+    paralelo, _ = agrupamiento.seleccionar_k(
+        [2, 3], escalador, muestra, procesos=2, ruta=dataset
+    )
+    pd.testing.assert_frame_equal(serie, paralelo)
+    assert modelo.n_clusters == serie["silueta"].idxmax()
+    # El temporal con la matriz escalada no queda en el caché
+    assert not list(Path(agrupamiento.DIR_CACHE).glob(".kmeans-*"))
+
+
+def test_predecir_valida_columnas(dataset):
+    escalador, _, muestra = agrupamiento.explorar(ruta=dataset)
+    _, modelo = agrupamiento.seleccionar_k([2], escalador, muestra, ruta=dataset)
+    agrupamiento.guardar_modelo(escalador, modelo, ruta="modelos/kmeans.joblib")
+    artefacto = agrupamiento.cargar_modelo("modelos/kmeans.joblib")
+    with pytest.raises(ValueError, match="Faltan columnas"):
+        agrupamiento.predecir(pd.DataFrame({"Latitud": [25.7]}), artefacto)
+    nuevos = pd.DataFrame(
+        {
+            "Latitud": [25.65, 25.75],
+            "Longitud": [-100.3, -100.3],
+            "es_fin_semana": [0, 0],
+            "grupo_horario": ["tarde", "noche"],
+        }
+    )
+    assert len(agrupamiento.predecir(nuevos, artefacto)) == 2
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from accidentes import busqueda
+from accidentes.busqueda import buscar
+
+
+@pytest.fixture
+def directorio(tmp_path, monkeypatch):
+    monkeypatch.setattr(busqueda, "DIR_BUSQUEDA", tmp_path / "busqueda")
+    return tmp_path / "busqueda"
+
+
+@pytest.fixture
+def datos():
+    generador = np.random.default_rng(0)
+    X = generador.normal(size=(120, 3))
+    return X, (X[:, 0] > 0).astype(int)
+
+
+def test_reanuda_desde_cache(directorio, datos, capsys):
+    X, y = datos
+    rejilla = {"n_neighbors": [3, 5]}
+    primera = buscar("knn", X, y, rejilla, n_pliegues=3, procesos=1)
+    segunda = buscar("knn", X, y, rejilla, n_pliegues=3, procesos=1)
+    assert "0 pliegues por calcular, 6 en caché" in capsys.readouterr().out
+    assert primera.equals(segunda)
+    # Las matrices compartidas no sobreviven a la búsqueda
+    assert not list(directorio.rglob("*.npy"))
+    assert len(list(directorio.glob("*.json"))) == 6
+
+
+def test_resultado_truncado_se_recalcula(directorio, datos, capsys):
+    X, y = datos
+    buscar("knn", X, y, {"n_neighbors": [3]}, n_pliegues=3, procesos=1)
+    truncado = sorted(directorio.glob("*.json"))[0]
+    truncado.write_text(truncado.read_text()[:10])
+    buscar("knn", X, y, {"n_neighbors": [3]}, n_pliegues=3, procesos=1)
+    assert "1 pliegues por calcular, 2 en caché" in capsys.readouterr().out
+    assert busqueda._leer_resultado(truncado) is not None
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+from accidentes import calidad
+from accidentes.rejilla import haversine
+
+
+def test_revisar_coordenadas():
+    marcas = calidad.revisar_coordenadas(
+        [25.67, -100.31, 25.67, 19.43, np.nan], [-100.31, 25.67, 100.31, -99.13, 0]
+    )
+    assert marcas.to_dict("list") == {
+        "fuera_de_caja": [False, True, True, True, True],
+        "coordenadas_invertidas": [False, True, False, False, False],
+        "signo_invertido": [False, False, True, False, False],
+    }
+
+
+def test_pares_cercanos_igual_a_todos_contra_todos():
+    generador = np.random.default_rng(1)
+    n = 400
+    momento = generador.integers(0, 2_000, n)
+    latitud = 25.67 + generador.normal(0, 0.002, n)
+    longitud = -100.31 + generador.normal(0, 0.002, n)
+    i, j = calidad.pares_cercanos(momento, latitud, longitud, ventana=30, metros=150)
+
+    a, b = np.triu_indices(n, k=1)
+    cerca = (np.abs(momento[a] - momento[b]) <= 30) & (
+        haversine(latitud[a], longitud[a], latitud[b], longitud[b]) <= 150
+    )
+    esperado = {tuple(sorted(par)) for par in zip(a[cerca], b[cerca])}
+    assert {tuple(sorted(par)) for par in zip(i, j)} == esperado
+    assert len(esperado) > 0
+
+
+def test_revisar_marca_copias_y_conserva_la_primera():
+    df = pd.DataFrame(
+        {
+            "Folio": ["1", "2", "3", "4", "5"],
+            "Fecha": pd.to_datetime(["2023-05-01"] * 4 + ["2023-05-02"]),
+            # 3 es copia de 1 (10 min, ~20 m) y 2 de 3; 4 está lejos; 5 es otro día
+            "Hora": ["08:00:00", "08:25:00", "08:10:00", "08:05:00", "08:00:00"],
+            "Latitud": [25.6700, 25.6702, 25.6701, 25.7000, 25.6700],
+            "Longitud": [-100.3100, -100.3100, -100.3101, -100.3100, -100.3100],
+            "Nombre_de_asentamiento": ["Centro"] * 3 + ["Mitras", "Centro"],
+        }
+    )
+    marcas, reporte = calidad.revisar(df)
+    assert marcas["duplicado"].tolist() == [False, True, True, False, False]
+    assert marcas.loc[marcas["duplicado"], "duplicado_de"].tolist() == ["1", "1"]
+    assert marcas.loc[~marcas["duplicado"], "duplicado_de"].isna().all()
+    assert reporte["duplicado"] == 2 and reporte["grupos_duplicados"] == 1
+    assert reporte["colonias_con_mas_marcas"] == {"Centro": 2}
+
+
+def test_descartar_quita_los_folios_guardados(tmp_path):
+    df = pd.DataFrame(
+        {
+            "Folio": ["1", "2", "3"],
+            "Fecha": pd.to_datetime(["2023-05-01"] * 3),
+            "Hora": ["08:00:00", "08:01:00", "12:00:00"],
+            "Latitud": [25.67, 25.67, -100.31],
+            "Longitud": [-100.31, -100.31, 25.67],
+            "Nombre_de_asentamiento": ["Centro"] * 3,
+        }
+    )
+    ruta_marcas = tmp_path / "marcas.csv"
+    calidad.guardar(*calidad.revisar(df), ruta_marcas, tmp_path / "reporte.json")
+    # Solo se guardan las filas con alguna marca
+    assert calidad.folios_marcados(ruta_marcas).tolist() == ["2", "3"]
+
+    numerico = df.assign(Folio=[1, 2, 3])
+    assert calidad.descartar(numerico, ruta_marcas)["Folio"].tolist() == [1]
+    assert calidad.descartar(df, tmp_path / "no_existe.csv").equals(df)
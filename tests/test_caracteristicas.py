@@ -0,0 +1,80 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from accidentes.caracteristicas import derivar, grupo_horario
+from accidentes.constantes import DIAS_ORDEN, MES_ORDEN
+
+
+def crudo():
+    return pd.DataFrame(
+        {
+            "Hora": ["8:05", "17:30:15", "00:00", "23:59:59", "12:00", "5:59"],
+            "Georreferencia": [
+                "25.67, -100.31",
+                "25.70, -100.25",
+                None,
+                "sin dato",
+                "25.60, -100.40",
+                "25.65, -100.30",
+            ],
+            "Dia": ["Lunes", "Sabado", "Domingo", "Miercoles", "Viernes", "Feriado"],
+            "Mes": ["Enero", "Diciembre", "Marzo", "Julio", "Mayo", "Junio"],
+            "Tipo_de_accidente": [
+                " Choque ",
+                "ALCANCE",
+                "choque",
+                None,
+                "Volcadura",
+                "x",
+            ],
+        }
+    )
+
+
+def test_igual_a_fila_por_fila():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        df = derivar(crudo())
+    original = crudo()
+
+    horas = [pd.to_datetime(h, format="mixed") for h in original["Hora"]]
+    assert df["Hora"].tolist() == [h.strftime("%H:%M:%S") for h in horas]
+    assert df["Hora_num"].tolist() == [h.hour for h in horas]
+    assert df["grupo_horario"].tolist() == [
+        "mañana",
+        "tarde",
+        "madrugada",
+        "noche",
+        "tarde",
+        "madrugada",
+    ]
+
+    assert df["Latitud"].iloc[:2].tolist() == [25.67, 25.70]
+    assert df["Longitud"].iloc[:2].tolist() == [-100.31, -100.25]
+    # Las coordenadas nulas o sin la forma "lat, lon" quedan nulas, y su celda también
+    assert df["Latitud"].iloc[2:4].isna().all()
+    assert (
+        df["Celda"].iloc[2:4].isna().all()
+        and df["Celda"].iloc[[0, 1, 4, 5]].notna().all()
+    )
+
+    assert df["Dia_num"].tolist() == [
+        DIAS_ORDEN.index(d) if d in DIAS_ORDEN else -1 for d in original["Dia"]
+    ]
+    assert df["Mes_num"].tolist() == [MES_ORDEN.index(m) for m in original["Mes"]]
+    assert df["es_fin_semana"].tolist() == [0, 1, 1, 0, 0, 0]
+    assert df["Tipo_de_accidente"].iloc[[0, 1, 2, 4]].tolist() == [
+        "choque",
+        "alcance",
+        "choque",
+        "volcadura",
+    ]
+    assert pd.isna(df["Tipo_de_accidente"].iloc[3])
+
+
+def test_grupo_horario_en_los_limites():
+    horas = np.arange(24)
+    esperado = np.select([horas < 6, horas < 12, horas < 18], [0, 1, 2], 3)
+    np.testing.assert_array_equal(grupo_horario(horas), esperado)
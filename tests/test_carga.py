@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+
+from accidentes import carga
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    monkeypatch.setattr(carga, "DIR_CACHE", str(tmp_path / "cache"))
+    monkeypatch.setattr(carga, "_memoria", {})
+    ruta = tmp_path / "dataset.parquet"
+    ruta.mkdir()
+    return ruta
+
+
+def _parte(ruta, nombre, filas):
+    pd.DataFrame(
+        {"Folio": range(filas), "grupo_horario": ["tarde"] * filas}
+    ).to_parquet(ruta / nombre)
+
+
+def test_memoria_solo_guarda_la_huella_vigente(dataset):
+    _parte(dataset, "parte-0.parquet", 3)
+    assert len(carga.cargar_datos(["Folio"], ruta=str(dataset))) == 3
+    _parte(dataset, "parte-1.parquet", 2)
+    df = carga.cargar_datos(ruta=str(dataset))
+    assert len(df) == 5
+    assert df["grupo_horario"].cat.categories.tolist()[2] == "tarde"
+    assert list(carga._memoria) == [str(dataset)]
+    assert len(list((dataset.parent / "cache").glob("preparado-*.feather"))) == 1
+
+
+def test_reintenta_una_sola_vez(dataset, monkeypatch):
+    _parte(dataset, "parte-0.parquet", 3)
+    llamadas = []
+
+    def desaparecido(*args, **kwargs):
+        llamadas.append(args)
+        raise FileNotFoundError("reemplazado")
+
+    monkeypatch.setattr(carga.pd, "read_feather", desaparecido)
+    with pytest.raises(FileNotFoundError):
+        carga.cargar_datos(["Folio"], ruta=str(dataset))
+    assert len(llamadas) == 2
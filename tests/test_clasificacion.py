@@ -0,0 +1,115 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from accidentes import clasificacion
+from accidentes.clasificacion import CARACTERISTICAS
+
+
+@pytest.fixture
+def limpio():
+    """Filas ya limpias como las del csv de p1, sin colonia_alto_riesgo"""
+    generador = np.random.default_rng(4)
+    n = 300
+    df = pd.DataFrame(
+        {
+            "Dia_num": generador.integers(0, 7, n),
+            "Hora_num": generador.integers(0, 24, n),
+            "Latitud": 25.67 + generador.normal(0, 0.05, n),
+            "Longitud": -100.31 + generador.normal(0, 0.05, n),
+            "Mes_num": generador.integers(0, 12, n),
+            "Nombre_de_asentamiento": generador.choice(
+                ["Centro", "Mitras", "Obispado"], n
+            ),
+        }
+    )
+    df["es_fin_semana"] = (df["Dia_num"] >= 5).astype(int)
+    df["Tipo_simplificado"] = np.where(df["Hora_num"] < 12, "alcance", "choque")
+    return df
+
+
+@pytest.fixture
+def ruta_modelo(limpio, tmp_path, monkeypatch):
+    monkeypatch.setattr(clasificacion, "_modelos", {})
+    df = clasificacion.preparar_lote(limpio.copy(), {"top_colonias": ["Centro"]})
+    escalador = StandardScaler().fit(df[CARACTERISTICAS])
+    knn = clasificacion.crear_knn("exacto")
+    clasificacion.entrenar(
+        knn,
+        escalador.transform(df[CARACTERISTICAS]),
+        df["Tipo_simplificado"],
+        np.ones(len(df), dtype=np.int64),
+    )
+    artefacto = clasificacion.crear_artefacto(escalador, knn, ["Centro"])
+    ruta = str(tmp_path / "modelos" / "knn.joblib")
+    clasificacion.guardar_modelo(artefacto, ruta)
+    return ruta
+
+
+def test_modelo_guardado_predice_igual(limpio, ruta_modelo, monkeypatch):
+    en_memoria = clasificacion.cargar_modelo(ruta_modelo)
+    monkeypatch.setattr(clasificacion, "_modelos", {})
+    leido = clasificacion.cargar_modelo(ruta_modelo)
+    assert leido is not en_memoria
+
+    df = clasificacion.preparar_lote(limpio.copy(), leido)
+    assert df["colonia_alto_riesgo"].tolist() == (
+        (limpio["Nombre_de_asentamiento"] == "Centro").astype(int).tolist()
+    )
+    pd.testing.assert_series_equal(
+        clasificacion.predecir(df, leido), clasificacion.predecir(df, en_memoria)
+    )
+
+
+def test_rechaza_otra_version(ruta_modelo, monkeypatch):
+    anterior = joblib.load(ruta_modelo)
+    anterior["version"] = clasificacion.VERSION_ARTEFACTO - 1
+    joblib.dump(anterior, ruta_modelo)
+    monkeypatch.setattr(clasificacion, "_modelos", {})
+    with pytest.raises(ValueError, match="vuelve a entrenar"):
+        clasificacion.cargar_modelo(ruta_modelo)
+
+
+@pytest.mark.parametrize("formato", ["csv", "parquet"])
+def test_puntuar_archivo_por_bloques(limpio, ruta_modelo, tmp_path, formato):
+    ruta = tmp_path / f"nuevos.{formato}"
+    entrada = limpio.drop(columns="Tipo_simplificado")
+    if formato == "csv":
+        entrada.to_csv(ruta, index=False)
+    else:
+        entrada.to_parquet(ruta, index=False)
+
+    modelo = clasificacion.cargar_modelo(ruta_modelo)
+    resultado, filas_por_segundo = clasificacion.puntuar_archivo(
+        ruta, modelo, chunksize=70
+    )
+    esperado = clasificacion.predecir(
+        clasificacion.preparar_lote(entrada.copy(), modelo), modelo
+    )
+    assert resultado["Prediccion"].tolist() == esperado.tolist()
+    assert len(resultado) == len(limpio) and filas_por_segundo > 0
+
+
+def test_pesos_completan_cada_clase_hasta_la_mayoritaria():
+    y = np.array(["a"] * 50 + ["b"] * 20 + ["c"] * 7)
+    pesos = clasificacion.pesos_sobremuestreo(y, semilla=1)
+    totales = pd.Series(pesos).groupby(y).sum()
+    assert totales.to_dict() == {"a": 50, "b": 50, "c": 50}
+    # La mayoritaria no se toca y las demás solo ganan copias
+    assert (pesos[y == "a"] == 1).all() and (pesos >= 1).all()
+
+
+def test_pesos_igual_a_repetir_filas(limpio):
+    X = StandardScaler().fit_transform(limpio[["Dia_num", "Hora_num", "Latitud"]])
+    y = np.where(limpio["Hora_num"] < 6, "noche", limpio["Tipo_simplificado"])
+    consultas = X[::7] + 0.01
+    pesos = clasificacion.pesos_sobremuestreo(y)
+
+    probabilidades = {}
+    # sklearn recibe las filas copiadas; el exacto, cada fila una vez con su peso
+    for indice in ("exacto", "sklearn"):
+        knn = clasificacion.entrenar(clasificacion.crear_knn(indice), X, y, pesos)
+        probabilidades[indice] = knn.predict_proba(consultas)
+    np.testing.assert_allclose(probabilidades["exacto"], probabilidades["sklearn"])
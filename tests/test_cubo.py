@@ -0,0 +1,71 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from accidentes.cubo import DIMENSIONES, TEXTO, construir_cubo, cubo_de, sumar_cubos
+
+
+def _filas(n, semilla):
+    generador = np.random.default_rng(semilla)
+    dia_num = generador.integers(0, 7, n).astype(np.int8)
+    tipo = generador.choice(["alcance", "choque lateral", "atropello"], n)
+    return pd.DataFrame(
+        {
+            "Fecha": pd.Timestamp("2023-01-01")
+            + pd.to_timedelta(generador.integers(0, 20, n), unit="D")
+            + pd.to_timedelta(generador.integers(0, 1440, n), unit="min"),
+            "Hora_num": generador.integers(0, 24, n).astype(np.int8),
+            "Dia_num": dia_num,
+            "Dia": np.array(["Lu", "Ma", "Mi", "Ju", "Vi", "Sa", "Do"])[dia_num],
+            "Tipo_de_accidente": tipo,
+            "Tipo_simplificado": np.where(tipo == "atropello", "otro", tipo),
+            "Nombre_de_asentamiento": generador.choice(["Centro", "Mitras"], n),
+            "Resolucion": generador.choice(["convenio", "juez"], n),
+        }
+    )
+
+
+def _conteos(cubo):
+    return Counter(
+        {
+            tuple(fila[:-1]): fila[-1]
+            for fila in cubo[[*DIMENSIONES, "Total"]].itertuples(index=False)
+        }
+    )
+
+
+def test_cubo_de_cuenta_por_combinacion():
+    df = _filas(300, 0)
+    cubo = cubo_de(df)
+    esperado = Counter(
+        df.assign(Fecha=df["Fecha"].dt.normalize())[DIMENSIONES].itertuples(
+            index=False, name=None
+        )
+    )
+    assert _conteos(cubo) == esperado
+    assert cubo["Total"].sum() == len(df)
+
+
+def test_construir_por_partes_igual_a_todo_junto(tmp_path):
+    partes = [_filas(200, semilla) for semilla in range(3)]
+    # Cada parte con sus propias categorías, como las escribe la ingesta
+    for numero, parte in enumerate(partes):
+        parte.astype({columna: "category" for columna in TEXTO}).to_parquet(
+            tmp_path / f"parte-{numero}.parquet"
+        )
+    cubo = construir_cubo(str(tmp_path))
+    assert _conteos(cubo) == _conteos(cubo_de(pd.concat(partes)))
+    assert not cubo.duplicated(DIMENSIONES).any()
+    assert cubo["Total"].dtype == np.int64
+    assert all(
+        isinstance(cubo[columna].dtype, pd.CategoricalDtype) for columna in TEXTO
+    )
+
+
+def test_sumar_cubos_suma_celdas_repetidas():
+    df = _filas(100, 5)
+    doble = sumar_cubos([cubo_de(df), cubo_de(df)])
+    assert _conteos(doble) == Counter(
+        {celda: 2 * total for celda, total in _conteos(cubo_de(df)).items()}
+    )
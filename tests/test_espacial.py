@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from accidentes import espacial
+from accidentes.espacial import IndiceEspacial
+from accidentes.rejilla import celda, haversine
+
+CENTROS = [(25.67, -100.31), (25.75, -100.20)]
+
+
+@pytest.fixture
+def df():
+    generador = np.random.default_rng(2)
+    n = 3000
+    # Dos zonas densas y ruido uniforme en la caja de Monterrey
+    zona = generador.choice(3, n, p=[0.45, 0.3, 0.25])
+    latitud = np.where(
+        zona == 0,
+        CENTROS[0][0] + generador.normal(0, 0.002, n),
+        np.where(
+            zona == 1,
+            CENTROS[1][0] + generador.normal(0, 0.002, n),
+            generador.uniform(25.5, 25.9, n),
+        ),
+    )
+    longitud = np.where(
+        zona == 0,
+        CENTROS[0][1] + generador.normal(0, 0.002, n),
+        np.where(
+            zona == 1,
+            CENTROS[1][1] + generador.normal(0, 0.002, n),
+            generador.uniform(-100.5, -100.0, n),
+        ),
+    )
+    return pd.DataFrame(
+        {
+            "Celda": celda(latitud, longitud),
+            "Fecha": pd.Timestamp("2023-01-01")
+            + pd.to_timedelta(generador.integers(0, 365, n), unit="D"),
+            "Hora_num": generador.integers(0, 24, n),
+            "Dia_num": generador.integers(0, 7, n),
+            "Tipo_simplificado": generador.choice(["alcance", "choque"], n),
+            "Latitud": latitud,
+            "Longitud": longitud,
+        }
+    )
+
+
+@pytest.fixture
+def indice(df):
+    return IndiceEspacial().construir(df)
+
+
+def _punto(indice, filas):
+    """(latitud, longitud, fecha) de cada fila, para comparar con el df original"""
+    return sorted(
+        zip(indice.latitud[filas], indice.longitud[filas], indice.fecha[filas])
+    )
+
+
+def _esperado(df, mascara):
+    return sorted(
+        zip(
+            df.loc[mascara, "Latitud"],
+            df.loc[mascara, "Longitud"],
+            df.loc[mascara, "Fecha"].to_numpy("datetime64[D]"),
+        )
+    )
+
+
+@pytest.mark.parametrize("metros", [50, 400, 3000])
+def test_radio_igual_a_fuerza_bruta(indice, df, metros):
+    latitud, longitud = CENTROS[0]
+    filas = indice.en_radio(latitud, longitud, metros, desde="2023-03-01")
+    distancia = haversine(latitud, longitud, df["Latitud"], df["Longitud"])
+    mascara = (distancia <= metros) & (df["Fecha"] >= "2023-03-01")
+    assert _punto(indice, filas) == _esperado(df, mascara)
+    # Ordenadas por distancia
+    assert np.all(
+        np.diff(
+            haversine(latitud, longitud, indice.latitud[filas], indice.longitud[filas])
+        )
+        >= 0
+    )
+
+
+def test_caja_igual_a_fuerza_bruta(indice, df):
+    caja = (25.60, -100.35, 25.70, -100.25)
+    filas = indice.en_caja(*caja, desde="2023-02-01", hasta="2023-06-30")
+    mascara = (
+        df["Latitud"].between(caja[0], caja[2])
+        & df["Longitud"].between(caja[1], caja[3])
+        & df["Fecha"].between("2023-02-01", "2023-06-30")
+    )
+    assert _punto(indice, filas) == _esperado(df, mascara)
+
+
+def test_conteos_por_celda(indice, df):
+    assert indice.totales.sum() == len(df)
+    por_celda = df.groupby("Celda").size()
+    np.testing.assert_array_equal(indice.celdas, por_celda.index)
+    np.testing.assert_array_equal(indice.totales, por_celda.to_numpy())
+
+
+def test_hotspots_en_las_zonas_densas(indice):
+    hotspots = indice.hotspots(n=2, ancho_banda=300)
+    for (latitud, longitud), fila in zip(CENTROS, hotspots.itertuples()):
+        assert haversine(latitud, longitud, fila.Latitud, fila.Longitud) < 300
+        assert fila.Accidentes_300m == len(
+            indice.en_radio(fila.Latitud, fila.Longitud, 300)
+        )
+    assert hotspots["Densidad_km2"].is_monotonic_decreasing
+
+
+def test_cargar_indice_reutiliza_el_guardado(df, tmp_path, monkeypatch):
+    monkeypatch.setattr(espacial, "DIR_CACHE", str(tmp_path / "cache"))
+    monkeypatch.setattr(espacial, "_indices", {})
+    (tmp_path / "cache").mkdir()
+    ruta = tmp_path / "dataset.parquet"
+    ruta.mkdir()
+    df.to_parquet(ruta / "parte-0.parquet")
+
+    primero = espacial.cargar_indice(str(ruta))
+    monkeypatch.setattr(espacial, "_indices", {})
+    segundo = espacial.cargar_indice(str(ruta))
+    for nombre in IndiceEspacial.ARREGLOS:
+        np.testing.assert_array_equal(
+            getattr(primero, nombre), getattr(segundo, nombre)
+        )
+    assert len(list((tmp_path / "cache").glob("espacial-*.npz"))) == 1
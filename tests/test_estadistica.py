@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+from accidentes.estadistica import (
+    bondad_ajuste,
+    chi2,
+    corregir,
+    p_permutacion_independencia,
+)
+
+
+def test_holm_a_mano():
+    # Ordenados: .005 .01 .03 .04 -> x4 x3 x2 x1 = .02 .03 .06 .04 -> máximo acumulado
+    p = [0.01, 0.04, 0.03, 0.005]
+    np.testing.assert_allclose(corregir(p, "holm"), [0.03, 0.06, 0.06, 0.02])
+
+
+def test_bh_a_mano():
+    # p(i) * m / i = .02 .02 .04 .04 -> mínimo acumulado desde el final
+    p = [0.01, 0.04, 0.03, 0.005]
+    np.testing.assert_allclose(corregir(p, "bh"), [0.02, 0.04, 0.04, 0.02])
+
+
+def test_correcciones_topan_en_uno():
+    p = [0.5, 0.9, 0.7]
+    assert corregir(p, "holm").max() == 1
+    assert corregir(p, "bh").max() <= 1
+
+
+def test_metodo_desconocido():
+    with pytest.raises(ValueError):
+        corregir([0.1], "bonferroni")
+
+
+def test_chi2_igual_a_scipy():
+    tabla = np.array([[12, 5, 7], [3, 9, 14]])
+    estadistico, gl, p = chi2(tabla)
+    esperado = stats.chi2_contingency(tabla, correction=False)
+    assert estadistico == pytest.approx(esperado.statistic)
+    assert gl == esperado.dof
+    assert p == pytest.approx(esperado.pvalue)
+
+
+def _p_exacto_2x2(tabla):
+    """P(chi2 >= observado) enumerando la celda (0, 0) con márgenes fijos"""
+    filas, columnas = tabla.sum(axis=1), tabla.sum(axis=0)
+    observado = chi2(tabla)[0]
+    total = 0.0
+    for a in range(max(0, filas[0] - columnas[1]), min(filas[0], columnas[0]) + 1):
+        candidata = np.array(
+            [[a, filas[0] - a], [columnas[0] - a, filas[1] - columnas[0] + a]]
+        )
+        if chi2(candidata)[0] >= observado * (1 - 1e-9):
+            total += stats.hypergeom.pmf(a, tabla.sum(), columnas[0], filas[0])
+    return total
+
+
+def test_permutacion_coincide_con_la_distribucion_exacta():
+    tabla = np.array([[9, 3], [4, 10]])
+    p_mc = p_permutacion_independencia(tabla, n_permutaciones=40_000)
+    assert p_mc == pytest.approx(_p_exacto_2x2(tabla), abs=0.01)
+
+
+def test_permutacion_coincide_con_permutar_filas():
+    # 3 x 4: contra permutar las etiquetas de los accidentes uno por uno
+    tabla = np.array([[8, 2, 3, 1], [2, 6, 1, 4], [1, 2, 7, 3]])
+    a = np.repeat(np.arange(3), tabla.sum(axis=1))
+    b = np.concatenate([np.repeat(np.arange(4), fila) for fila in tabla])
+    observado = chi2(tabla)[0]
+    generador = np.random.default_rng(0)
+    simulados = []
+    for _ in range(4_000):
+        permutada = np.zeros_like(tabla)
+        np.add.at(permutada, (a, generador.permutation(b)), 1)
+        simulados.append(chi2(permutada)[0])
+    p_fuerza_bruta = np.mean(np.array(simulados) >= observado * (1 - 1e-9))
+    p_mc = p_permutacion_independencia(tabla, n_permutaciones=20_000)
+    assert p_mc == pytest.approx(p_fuerza_bruta, abs=0.02)
+
+
+def test_permutacion_con_asociacion_fuerte():
+    tabla = np.array([[500, 0], [0, 500]])
+    assert p_permutacion_independencia(tabla, n_permutaciones=999) == 1 / 1000
+
+
+def test_bondad_ajuste():
+    conteos = np.array([30, 20, 10])
+    estadistico, gl, p, p_mc = bondad_ajuste(conteos, [1, 1, 1], 20_000)
+    esperado = stats.chisquare(conteos)
+    assert estadistico == pytest.approx(esperado.statistic)
+    assert gl == 2
+    assert p == pytest.approx(esperado.pvalue)
+    assert p_mc == pytest.approx(esperado.pvalue, abs=0.01)
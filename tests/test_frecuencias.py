@@ -0,0 +1,65 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from accidentes.frecuencias import STOPWORDS, frecuencias
+
+COLUMNAS = ["Tipo_de_accidente", "Nombre_de_asentamiento"]
+
+
+@pytest.fixture
+def df():
+    generador = np.random.default_rng(9)
+    n = 500
+    return pd.DataFrame(
+        {
+            "Tipo_de_accidente": generador.choice(
+                ["alcance", "choque de crucero", "Choque Lateral", "caida de persona"],
+                n,
+            ),
+            "Nombre_de_asentamiento": generador.choice(
+                [
+                    "Centro",
+                    "Valle de las Flores",
+                    "Mitras Centro",
+                    "La Fe",
+                    "Del Paseo",
+                ],
+                n,
+            ),
+            "Dia": generador.choice(["Lunes", "Sabado"], n),
+        }
+    )
+
+
+def _counter(df):
+    """El conteo original de p9: un Counter sobre todo el texto unido"""
+    texto = " ".join(df[COLUMNAS[0]].str.cat(df[COLUMNAS[1]], sep=" ")).lower()
+    return {
+        palabra: conteo
+        for palabra, conteo in Counter(texto.split()).items()
+        if palabra not in STOPWORDS and len(palabra) > 3
+    }
+
+
+def test_igual_al_counter(df):
+    resultado = frecuencias(df, COLUMNAS)
+    assert resultado.to_dict() == _counter(df)
+    assert resultado.is_monotonic_decreasing
+
+
+def test_por_faceta(df):
+    tabla = frecuencias(df, COLUMNAS, por="Dia")
+    for dia, grupo in df.groupby("Dia"):
+        fila = tabla.loc[dia]
+        assert fila[fila > 0].to_dict() == _counter(grupo)
+
+
+def test_cubo_con_pesos_igual_a_las_filas(df):
+    cubo = df.groupby(COLUMNAS).size().rename("Total").reset_index()
+    pd.testing.assert_series_equal(
+        frecuencias(cubo, COLUMNAS, pesos="Total").sort_index(),
+        frecuencias(df, COLUMNAS).sort_index(),
+    )
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from accidentes import graficas
+from accidentes.graficas import Grafica, rasterizar, renderizar
+
+
+def dibujar_barras(fig, datos):
+    fig.subplots().bar(range(len(datos)), datos)
+
+
+@pytest.fixture
+def huellas(tmp_path, monkeypatch):
+    monkeypatch.setattr(graficas, "DIR_HUELLAS", tmp_path / "huellas")
+    return tmp_path
+
+
+def test_mismo_nombre_en_directorios_distintos(huellas, capsys):
+    (huellas / "a").mkdir()
+    (huellas / "b").mkdir()
+    lote = [
+        Grafica(str(huellas / "a" / "g.png"), dibujar_barras, np.array([1, 2])),
+        Grafica(str(huellas / "b" / "g.png"), dibujar_barras, np.array([3, 1])),
+    ]
+    renderizar(lote, procesos=2)
+    assert (huellas / "a" / "g.png").exists() and (huellas / "b" / "g.png").exists()
+    # Cada ruta tiene su huella: la segunda corrida no regenera ninguna
+    renderizar(lote, procesos=2)
+    assert "Gráficas generadas: 0, sin cambios: 2" in capsys.readouterr().out
+
+
+def test_cambio_de_datos_regenera(huellas, capsys):
+    archivo = str(huellas / "g.png")
+    renderizar([Grafica(archivo, dibujar_barras, np.array([1, 2]))])
+    renderizar([Grafica(archivo, dibujar_barras, np.array([1, 3]))])
+    assert capsys.readouterr().out.count("Gráficas generadas: 1") == 2
+
+
+def test_rasterizar_igual_a_histogram2d():
+    generador = np.random.default_rng(0)
+    x, y = generador.random(500), generador.random(500)
+    categorias = generador.integers(0, 3, 500)
+    conteos, extension = rasterizar(x, y, categorias, 3, pixeles=(8, 5))
+    for c in range(3):
+        esperado, _, _ = np.histogram2d(
+            y[categorias == c],
+            x[categorias == c],
+            bins=(5, 8),
+            range=[extension[2:], extension[:2]],
+        )
+        np.testing.assert_array_equal(conteos[c], esperado)
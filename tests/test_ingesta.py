@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+
+from accidentes import ingesta, sintetico
+from accidentes.cubo import cargar_cubo
+
+MARCA = "2023-03-01"
+
+
+@pytest.fixture
+def crudo(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return sintetico.generar(3000, inicio="2023-01-01", fin="2023-03-31", semilla=7)
+
+
+def _folios_limpios(df):
+    df = df.copy()
+    df.columns = ingesta.limpiar_columnas(df.columns)
+    return set(ingesta.limpiar_chunk(df)["Folio"].astype(str))
+
+
+def _ingestar(crudo, funcion, ruta):
+    crudo.to_csv(ruta, index=False)
+    return funcion(url=ruta, params=None, chunksize=500)
+
+
+def test_actualizar_agrega_solo_lo_nuevo(crudo):
+    fecha = pd.to_datetime(crudo["Fecha"])
+    del_dia = crudo[fecha == MARCA]
+    inicial = pd.concat(
+        [crudo[fecha < MARCA], del_dia.iloc[: len(del_dia) // 2]], ignore_index=True
+    )
+    _ingestar(inicial, ingesta.ingestar, "inicial.csv")
+
+    estado = ingesta.leer_estado()
+    assert estado["fecha_max"] == MARCA
+    assert set(estado["folios_fecha_max"]) == _folios_limpios(
+        del_dia.iloc[: len(del_dia) // 2]
+    )
+
+    # El portal regresa desde la marca (aquí desde antes) y repite un folio nuevo
+    nuevos = crudo[fecha >= "2023-02-15"]
+    agregados = _ingestar(
+        pd.concat([nuevos, nuevos.tail(1)]), ingesta.actualizar, "nuevos.csv"
+    )
+
+    csv = pd.read_csv(ingesta.RUTA_CSV, index_col=0)
+    assert agregados == len(_folios_limpios(crudo)) - len(_folios_limpios(inicial))
+    assert not csv["Folio"].duplicated().any()
+    assert set(csv["Folio"].astype(str)) == _folios_limpios(crudo)
+    # Los nuevos siguen la numeración de las filas crudas de la descarga inicial
+    assert csv.index.is_unique and csv.index[-agregados] == len(inicial)
+    assert cargar_cubo()["Total"].sum() == len(csv)
+
+    estado = ingesta.leer_estado()
+    assert estado["fecha_max"] == pd.to_datetime(crudo["Fecha"]).max().strftime(
+        "%Y-%m-%d"
+    )
+    # Con la misma descarga ya no hay nada nuevo
+    assert _ingestar(nuevos, ingesta.actualizar, "nuevos.csv") == 0
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from accidentes import pronostico
+from accidentes.pronostico import (
+    backtest,
+    holt_winters,
+    ingenuo,
+    modelos,
+    pronosticar,
+    pronosticar_lote,
+    regresion,
+    suavizar,
+)
+
+
+def _serie(valores):
+    indice = pd.date_range("2023-01-02", periods=len(valores), freq="D")
+    return pd.Series(np.asarray(valores, dtype=np.float64), index=indice)
+
+
+def test_ingenuo_repite_el_ultimo_ciclo():
+    # Origen 10, periodo 7: los pasos 0-6 leen 3-9 y los pasos 7-8 vuelven a 3-4
+    Y = np.arange(20, dtype=np.float64)[:, None]
+    resultado = ingenuo(7)(Y, None, np.array([10]), 9)[0, :, 0]
+    assert resultado.tolist() == [3, 4, 5, 6, 7, 8, 9, 3, 4]
+
+
+def test_holt_winters_sin_aprendizaje_repite_el_primer_ciclo():
+    # Con alfa = gamma = 0 el nivel y la estación se quedan en los del primer ciclo
+    Y = np.array([1, 2, 6, 9, 0, 4, 7, 7, 1, 3], dtype=np.float64)[:, None]
+    resultado = holt_winters(3, alfa=0, gamma=0)(Y, None, np.array([4, 8]), 5)
+    assert resultado[0, :, 0].tolist() == [2, 6, 1, 2, 6]
+    assert resultado[1, :, 0].tolist() == [6, 1, 2, 6, 1]
+
+
+def test_holt_winters_igual_a_la_formula_por_origen():
+    # y(o + h) = nivel(o - 1) + estacion(o - 1 + h - periodo * ceil(h / periodo))
+    generador = np.random.default_rng(1)
+    Y = generador.poisson(5, 60).astype(np.float64)[:, None]
+    origenes, horizonte, periodo = np.array([7, 20, 45]), 10, 7
+    resultado = holt_winters(periodo, 0.3, 0.2)(Y, None, origenes, horizonte)
+    for m, origen in enumerate(origenes):
+        nivel, estacion = suavizar(Y[:origen, 0], periodo, 0.3, 0.2)
+        for h in range(1, horizonte + 1):
+            fase = origen - 1 + h - periodo * int(np.ceil(h / periodo))
+            assert resultado[m, h - 1, 0] == pytest.approx(nivel[-1] + estacion[fase])
+
+
+@pytest.mark.parametrize(
+    "modelo",
+    [ingenuo(7), holt_winters(7), regresion(["tendencia", "dia_semana"])],
+    ids=["ingenuo", "holt_winters", "regresion"],
+)
+def test_sin_datos_del_futuro(modelo):
+    # Cambiar lo que viene después de cada origen no cambia su pronóstico
+    generador = np.random.default_rng(2)
+    Y = generador.poisson(5, 70).astype(np.float64)[:, None]
+    indice = _serie(Y[:, 0]).index
+    origenes = np.array([14, 30, 50])
+    antes = modelo(Y, indice, origenes, 7)
+    for m, origen in enumerate(origenes):
+        alterada = Y.copy()
+        alterada[origen:] += 100
+        despues = modelo(alterada, indice, origenes, 7)
+        np.testing.assert_allclose(despues[m], antes[m])
+
+
+def test_regresion_exacta_en_tendencia_lineal():
+    serie = _serie(3 + 0.5 * np.arange(40))
+    futuro = pronosticar(serie, regresion(["tendencia"]), 5)
+    np.testing.assert_allclose(futuro["Prediccion"], 3 + 0.5 * np.arange(40, 45))
+    assert futuro.index[0] == serie.index[-1] + pd.Timedelta(days=1)
+
+
+def test_backtest_cuenta_origenes():
+    serie = _serie(np.arange(30) % 7)
+    resumen, rmse = backtest(serie, {"ingenuo": ingenuo(7)}, 7, inicio=7, paso=2)
+    # Orígenes 7, 9, ..., 23: el último deja 7 pasos hasta el final
+    assert resumen.attrs["origenes"] == 9
+    assert resumen.loc["ingenuo", "MAE"] == 0
+    assert rmse.index.tolist() == list(range(1, 8))
+
+
+@pytest.mark.parametrize(
+    "argumentos",
+    [
+        {"horizonte": 7, "inicio": 3},
+        {"horizonte": 0, "inicio": 7},
+        {"horizonte": 7, "inicio": 7, "paso": 0},
+        {"horizonte": 7, "inicio": 25},
+    ],
+    ids=["historia_corta", "horizonte_cero", "paso_cero", "serie_corta"],
+)
+def test_backtest_rechaza_configuraciones_invalidas(argumentos):
+    with pytest.raises(ValueError):
+        backtest(_serie(np.arange(30)), {"ingenuo": ingenuo(7)}, **argumentos)
+
+
+def _matriz(n_dias=120, n_series=5):
+    generador = np.random.default_rng(4)
+    indice = pd.date_range("2023-01-02", periods=n_dias, freq="D")
+    valores = generador.poisson(np.arange(1, n_series + 1) * 2, (n_dias, n_series))
+    return pd.DataFrame(
+        valores,
+        index=indice,
+        columns=pd.Index([f"s{i}" for i in range(n_series)], name="colonia"),
+    )
+
+
+def test_lote_igual_a_cada_serie_por_separado():
+    matriz = _matriz()
+    tabla = pronosticar_lote(matriz, modelos("diaria"), horizonte=7, inicio=60)
+    for columna in matriz.columns:
+        resumen, rmse = backtest(
+            matriz[columna], modelos("diaria"), horizonte=7, inicio=60
+        )
+        mejor = resumen.index[0]
+        futuro = pronosticar(matriz[columna], modelos("diaria")[mejor], 7, rmse[mejor])
+        serie = tabla[tabla["colonia"] == columna]
+        assert serie["modelo"].iloc[0] == mejor
+        np.testing.assert_allclose(serie["Prediccion"], futuro["Prediccion"])
+        np.testing.assert_allclose(serie["Superior"], futuro["Superior"])
+
+
+def test_lote_no_depende_del_tamano_de_bloque(monkeypatch):
+    matriz = _matriz()
+    completa = pronosticar_lote(matriz, modelos("diaria"), horizonte=7, inicio=60)
+    # Un bloque por serie
+    monkeypatch.setattr(pronostico, "MAX_VALORES_BLOQUE", 1)
+    por_serie = pronosticar_lote(matriz, modelos("diaria"), horizonte=7, inicio=60)
+    pd.testing.assert_frame_equal(completa, por_serie)
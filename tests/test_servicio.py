@@ -0,0 +1,155 @@
+import json
+
+import pandas as pd
+import pytest
+
+from accidentes.servicio import ErrorConsulta, IndiceAgregados, Servicio
+
+
+@pytest.fixture
+def servicio():
+    cubo = pd.DataFrame(
+        {
+            "Fecha": pd.to_datetime(
+                ["2023-01-02", "2023-01-04", "2023-01-10", "2023-02-15", "2023-03-01"]
+            ),
+            "Dia_num": [0, 2, 1, 2, 2],
+            "Hora_num": [18, 19, 20, 8, 18],
+            "Tipo_simplificado": ["alcance", "choque", "alcance", "choque", "alcance"],
+            "Nombre_de_asentamiento": ["Centro", "Centro", "Mitras", None, "Mitras"],
+            "Resolucion": ["convenio", "convenio", "juez", "juez", "convenio"],
+            "Total": [3, 1, 2, 5, 4],
+        }
+    )
+    return Servicio(IndiceAgregados(cubo))
+
+
+def _json(servicio, destino):
+    estado, cuerpo, _ = servicio.responder(destino)
+    return estado, json.loads(cuerpo)
+
+
+@pytest.mark.parametrize(
+    "texto, codigos",
+    [
+        ("18-20", [18, 19]),
+        ("18", [18]),
+        ("8,18-19", [8, 18]),
+        ("0-24", list(range(24))),
+    ],
+)
+def test_rangos_de_hora(servicio, texto, codigos):
+    assert servicio.indice.codigos_de("hora", texto).tolist() == codigos
+
+
+def test_meses_por_numero_y_nombre(servicio):
+    indice = servicio.indice
+    assert indice.codigos_de("mes", "1-3").tolist() == [0, 1]
+    assert indice.codigos_de("mes", "Febrero,12").tolist() == [1, 11]
+    # Con nombres el final del rango queda incluido
+    assert indice.codigos_de("mes", "enero-marzo").tolist() == [0, 1, 2]
+    assert indice.codigos_de("mes", "enero-diciembre").tolist() == list(range(12))
+    assert indice.codigos_de("mes", "1-13").tolist() == list(range(12))
+
+
+def test_valores_con_coma_entre_comillas():
+    cubo = pd.DataFrame(
+        {
+            "Fecha": pd.to_datetime(["2023-01-02", "2023-01-03", "2023-01-04"]),
+            "Dia_num": [0, 1, 2],
+            "Hora_num": [8, 9, 10],
+            "Tipo_simplificado": ["alcance"] * 3,
+            "Nombre_de_asentamiento": ["Valle, Sector 1", "Valle", "Centro"],
+            "Resolucion": ["convenio"] * 3,
+            "Total": [1, 2, 4],
+        }
+    )
+    servicio = Servicio(IndiceAgregados(cubo))
+    for destino, total in [
+        ('/conteo?colonia="Valle, Sector 1"', 1),
+        ('/conteo?colonia="Valle, Sector 1",Centro', 5),
+        ('/conteo?colonia="Valle, Sector 1"&colonia=Valle', 3),
+    ]:
+        assert _json(servicio, destino) == (200, {"total": total})
+    # Sin comillas la coma separa valores
+    assert servicio.responder("/conteo?colonia=Valle, Sector 1")[0] == 400
+
+
+@pytest.mark.parametrize(
+    "parametro, texto",
+    [
+        ("hora", "20-18"),
+        ("hora", "24"),
+        ("hora", "25-26"),
+        ("hora", "x"),
+        ("mes", "0"),
+        ("colonia", "Inexistente"),
+        ("color", "rojo"),
+    ],
+)
+def test_valores_invalidos(servicio, parametro, texto):
+    with pytest.raises(ErrorConsulta):
+        servicio.indice.codigos_de(parametro, texto)
+
+
+@pytest.mark.parametrize(
+    "destino, total",
+    [
+        ("/conteo", 15),
+        ("/conteo?hora=18-20", 8),
+        ("/conteo?colonia=centro", 4),
+        ("/conteo?tipo=alcance&dia=Miercoles", 4),
+        ("/conteo?desde=2023-01-04&hasta=2023-02-15", 8),
+        # Parámetro repetido = valores separados por coma
+        ("/conteo?colonia=Centro&colonia=Mitras", 10),
+        ("/conteo?colonia=Centro,Mitras", 10),
+    ],
+)
+def test_conteos_a_mano(servicio, destino, total):
+    assert _json(servicio, destino) == (200, {"total": total})
+
+
+def test_top_omite_nulos_y_ceros(servicio):
+    estado, cuerpo = _json(servicio, "/top?por=colonia&n=5")
+    assert estado == 200
+    assert cuerpo["top"] == [
+        {"valor": "Mitras", "total": 6},
+        {"valor": "Centro", "total": 4},
+    ]
+
+
+@pytest.mark.parametrize(
+    "destino, estado",
+    [
+        ("/top?n=-3", 400),
+        ("/top?n=0", 400),
+        ("/top?n=x", 400),
+        ("/top?n=2&n=3", 400),
+        ("/top?por=color", 400),
+        ("/conteo?hora=20-18", 400),
+        ("/conteo?desde=ayer", 400),
+        ("/serie?frecuencia=Y", 400),
+        ("/otra", 404),
+    ],
+)
+def test_errores(servicio, destino, estado):
+    assert servicio.responder(destino)[0] == estado
+
+
+def test_serie_semanal_empieza_en_lunes(servicio):
+    estado, cuerpo = _json(servicio, "/serie?frecuencia=W&hasta=2023-01-15")
+    assert estado == 200
+    assert cuerpo["serie"] == [
+        {"fecha": "2023-01-02", "total": 4},
+        {"fecha": "2023-01-09", "total": 2},
+    ]
+
+
+def test_serie_mensual_con_meses_vacios(servicio):
+    _, cuerpo = _json(servicio, "/serie?frecuencia=M&colonia=Mitras")
+    assert [periodo["total"] for periodo in cuerpo["serie"]] == [2, 0, 4]
+
+
+def test_cache_por_consulta_normalizada(servicio):
+    assert servicio.responder("/conteo?dia=Lunes&hora=18")[2] is False
+    assert servicio.responder("/conteo?hora=18&dia=Lunes")[2] is True
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from sklearn.neighbors import KNeighborsClassifier
+
+from accidentes import vecinos
+from accidentes.clasificacion import crear_knn
+from accidentes.vecinos import ClasificadorVecinos, IndiceExacto, IndiceIVF
+
+
+@pytest.fixture
+def datos():
+    generador = np.random.default_rng(6)
+    X = generador.normal(size=(600, 4))
+    y = np.where(X[:, 0] + generador.normal(0, 0.5, 600) > 0, "alcance", "choque")
+    return X[:500], y[:500], X[500:]
+
+
+@pytest.mark.parametrize("weights", ["distance", "uniform"])
+def test_exacto_igual_a_sklearn(datos, weights):
+    X, y, consultas = datos
+    propio = ClasificadorVecinos(IndiceExacto(), n_neighbors=5, weights=weights)
+    sklearn = KNeighborsClassifier(n_neighbors=5, weights=weights, metric="manhattan")
+    np.testing.assert_allclose(
+        propio.fit(X, y).predict_proba(consultas),
+        sklearn.fit(X, y).predict_proba(consultas),
+    )
+
+
+@pytest.fixture
+def enteros():
+    """Valores 0-255 en cada dimensión: la cuantización a int8 no pierde nada"""
+    generador = np.random.default_rng(8)
+    X = generador.integers(0, 256, (800, 3)).astype(np.float64)
+    X[0], X[1] = 0, 255
+    return X, generador.integers(0, 256, (100, 3)).astype(np.float64)
+
+
+def test_ivf_con_todas_las_celdas_es_exacto(enteros, monkeypatch):
+    X, consultas = enteros
+    # Bloques chicos para pasar también por el recorrido en partes
+    monkeypatch.setattr(vecinos, "MAX_PARES_BLOQUE", 500)
+    ivf = IndiceIVF(n_celdas=16, nprobe=16).construir(X)
+    distancias, indices = ivf.buscar(consultas, 5)
+    esperadas, _ = IndiceExacto().construir(X).buscar(consultas, 5)
+    np.testing.assert_array_equal(distancias, esperadas)
+    np.testing.assert_allclose(
+        np.abs(X[indices] - consultas[:, None]).sum(axis=2), distancias
+    )
+
+
+def test_ivf_mas_sondas_mas_recall(enteros):
+    X, consultas = enteros
+    esperadas, _ = IndiceExacto().construir(X).buscar(consultas, 5)
+    recall = []
+    for nprobe in (1, 4, 16):
+        distancias, _ = (
+            IndiceIVF(n_celdas=16, nprobe=nprobe).construir(X).buscar(consultas, 5)
+        )
+        # Por distancia y no por índice: con enteros hay muchos empates
+        recall.append(np.mean(distancias <= esperadas[:, -1:]))
+    assert recall[0] < recall[1] <= recall[2] == 1
+
+
+def test_crear_knn_rechaza_indice_desconocido():
+    with pytest.raises(ValueError, match="Índice desconocido"):
+        crear_knn("faiss")